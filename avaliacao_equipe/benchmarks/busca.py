@@ -0,0 +1,87 @@
+"""Latência da busca de pessoas (type-ahead) com FTS5 e com ILIKE '%termo%'.
+
+Gera um banco SQLite temporário com N usuários (padrão 100 mil) com nomes
+acentuados, cria os índices FTS5 pela migração e mede services.busca.buscar
+contra a busca anterior por substring, para termos digitados aos poucos.
+
+    python avaliacao_equipe/benchmarks/busca.py [--usuarios 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRIMEIROS = ['João', 'José', 'Antônio', 'Maria', 'Ana', 'Luíza', 'Sérgio', 'Fábio', 'Márcia', 'Letícia',
+             'Conceição', 'Inês', 'Vinícius', 'Caio', 'Rafael', 'Gabriela', 'Tânia', 'Otávio', 'Lúcia', 'Mônica']
+SOBRENOMES = ['Araújo', 'Gonçalves', 'Conceição', 'Magalhães', 'Simões', 'Brandão', 'Calderaro', 'Assunção',
+              'Falcão', 'Guimarães', 'Silva', 'Souza', 'Teodoro', 'Sardinha', 'Pietrobon', 'Abranches']
+CARGOS = ['Editor', 'Produtor', 'Repórter', 'Coordenador', 'Analista', 'Cinegrafista', 'Diretor']
+REGIOES = ['SP', 'RJ', 'MG', 'DF', 'PE', 'RS']
+
+# Sequências de um usuário digitando no campo de busca
+DIGITACAO = ['jo', 'joa', 'joao', 'joao ara', 'joao arau', 'conc', 'conceicao gon', 'edit rj', 'guimar']
+
+
+def gerar_usuarios(total):
+    rnd = random.Random(7)
+    for i in range(1, total + 1):
+        nome = f'{rnd.choice(PRIMEIROS)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}'
+        yield {'id': i, 'matricula': i, 'nome': nome, 'email': f'usuario{i}@empresa.com',
+               'cargo': rnd.choice(CARGOS), 'regiao': rnd.choice(REGIOES), 'tipo': 'funcionario', 'ativo': True}
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'busca.db')}"
+        from sqlalchemy import insert, or_
+
+        from src.main import create_app
+        from src.migrations import aplicar_migracoes
+        from src.models.avaliacao import db
+        from src.models.usuario import Usuario
+        from src.services.busca import _termos, buscar
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(Usuario), list(gerar_usuarios(args.usuarios)))
+            db.session.commit()
+            inicio = time.perf_counter()
+            aplicar_migracoes()
+            print(f'{args.usuarios} usuários; migrações (inclui índice FTS5) em {time.perf_counter() - inicio:.1f} s\n')
+
+            def ilike(texto):
+                consulta = Usuario.query.filter(Usuario.ativo == True)
+                for termo in _termos(texto):
+                    consulta = consulta.filter(or_(Usuario.nome.ilike(f'%{termo}%'), Usuario.cargo.ilike(f'%{termo}%'),
+                                                   Usuario.regiao.ilike(f'%{termo}%'), Usuario.email.ilike(f'%{termo}%')))
+                return consulta.order_by(Usuario.nome).limit(20).all()
+
+            print(f"{'termo':16} {'FTS5 (ms)':>10} {'ILIKE (ms)':>11}")
+            for texto in DIGITACAO:
+                fts, _ = medir(lambda: buscar(Usuario, texto, 20, filtros=[Usuario.ativo == True]), args.repeticoes)
+                substring, _ = medir(lambda: ilike(texto), args.repeticoes)
+                print(f'{texto:16} {fts:10.2f} {substring:11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Latência e número de consultas dos endpoints quentes em organizações sintéticas.
+
+Para cada tamanho de organização gera um banco SQLite temporário
+(benchmarks/org_sintetica.py) e executa as requisições pelo test client do
+app real: login, subordinados, listagem e criação de avaliações,
+estatísticas (sem painel pré-calculado e lendo o painel do gestor, também
+logo após escritas de outros usuários), os dois rankings (com o cache de
+respostas vazio e cheio), a análise por critério, a tendência de um
+avaliado entre os ciclos e o enfileiramento do ranking como tarefa em
+segundo plano (sem executor: só o custo da requisição, que deixa de
+depender do tamanho da organização).
+Informa p50/p95/p99 e as consultas SQL por requisição (do Server-Timing).
+
+    python avaliacao_equipe/benchmarks/endpoints.py [--usuarios 100 10000 100000]
+    python avaliacao_equipe/benchmarks/endpoints.py --salvar benchmarks/baseline.json
+    python avaliacao_equipe/benchmarks/endpoints.py --comparar benchmarks/baseline.json
+
+Com --comparar, termina com código 1 se algum cenário passou a fazer mais
+consultas que a linha de base ou ficou com p95 acima de --tolerancia vezes
+o da linha de base.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from org_sintetica import popular_org
+
+AQUECIMENTO = 5
+# Rankings sem cache levam segundos com 100 mil usuários: menos repetições
+CENARIOS_LENTOS = {'ranking_geral': 10, 'admin_ranking': 10, 'analise_criterios': 10}
+NOTAS = {
+    'producao': 8, 'edicao': 7, 'coordenacao': 8, 'co_coordenacao': 6, 'pro_atividade': 9,
+    'criatividade': 7, 'resolucao_problemas': 8, 'flexibilidade_adaptabilidade': 7,
+    'relacionamento_equipe': 9, 'relacionamento_outras_areas': 8, 'inteligencia_emocional': 7,
+    'lideranca': 6, 'visao_institucional': 8,
+}
+
+
+def cenarios(org):
+    """Cada cenário sorteia uma requisição: url, método, corpo, usuário logado,
+    se o cache de respostas deve ser esvaziado antes (frio), se os painéis dos
+    gestores também (sem_painel) e a url a remover depois, fora da medição
+    (desfazer)"""
+    # As avaliações criadas são removidas em seguida: os pares pendentes se repetem
+    pendentes = itertools.cycle(org['pendentes'])
+
+    def criar_avaliacao(rnd):
+        gestor, avaliado = next(pendentes)
+        return {'metodo': 'POST', 'url': '/api/avaliacoes', 'usuario': gestor,
+                'json': dict(NOTAS, avaliado_id=avaliado, tipo_avaliacao='subordinado'),
+                'desfazer': lambda resposta: f"/api/avaliacoes/{resposta.get_json()['id']}"}
+
+    # Um gestor fixo para o cenário com cache cheio
+    gestor_fixo = org['gestores'][0]
+    return {
+        'login': lambda rnd: {'metodo': 'POST', 'url': '/api/login',
+                              'json': {'email': rnd.choice(org['emails'])}},
+        'subordinados': lambda rnd: {'url': '/api/subordinados', 'usuario': rnd.choice(org['gestores'])},
+        'avaliacoes_listar': lambda rnd: {'url': '/api/avaliacoes', 'usuario': rnd.choice(org['gestores'])},
+        'avaliacoes_criar': criar_avaliacao,
+        'estatisticas': lambda rnd: {'url': '/api/avaliacoes/estatisticas',
+                                     'usuario': rnd.choice(org['gestores']), 'frio': True, 'sem_painel': True},
+        'estatisticas_cache': lambda rnd: {'url': '/api/avaliacoes/estatisticas', 'usuario': gestor_fixo},
+        # Escritas de outros gestores esvaziam o cache de respostas, mas não o painel deste
+        'estatisticas_painel': lambda rnd: {'url': '/api/avaliacoes/estatisticas', 'usuario': gestor_fixo,
+                                            'frio': True},
+        'ranking_geral': lambda rnd: {'url': '/api/ranking-geral', 'usuario': org['admin_id'], 'frio': True},
+        'ranking_geral_cache': lambda rnd: {'url': '/api/ranking-geral', 'usuario': org['admin_id']},
+        'admin_ranking': lambda rnd: {'url': '/admin/ranking_geral', 'usuario': org['admin_id'], 'frio': True},
+        'admin_ranking_cache': lambda rnd: {'url': '/admin/ranking_geral', 'usuario': org['admin_id']},
+        'analise_criterios': lambda rnd: {'url': '/admin/analytics/criterios?agrupar=regiao',
+                                          'usuario': org['admin_id'], 'frio': True},
+        'tendencias': lambda rnd: {'url': f"/admin/ciclos/tendencias?avaliado={rnd.choice(org['funcionarios'])}",
+                                   'usuario': org['admin_id'], 'frio': True},
+        'tarefa_enfileirar': lambda rnd: {'metodo': 'POST', 'url': '/admin/jobs', 'usuario': org['admin_id'],
+                                          'json': {'tipo': 'ranking', 'parametros': {'por': 'funcionario'}}},
+    }
+
+
+def _consultas(resposta):
+    encontrado = re.search(r'desc="(\d+) consultas"', resposta.headers.get('Server-Timing', ''))
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def executar(app, cenario, repeticoes, rnd):
+    from src.models.avaliacao import db
+    from src.models.painel import PainelGestor
+    from src.services.cache import AVALIACOES, USUARIOS, invalidar
+
+    cliente = app.test_client()
+    tempos, consultas = [], []
+    for i in range(AQUECIMENTO + repeticoes):
+        pedido = cenario(rnd)
+        if pedido.get('usuario'):
+            with cliente.session_transaction() as sessao:
+                sessao['user_id'] = pedido['usuario']
+        if pedido.get('frio'):
+            with app.app_context():
+                invalidar(AVALIACOES, USUARIOS)
+        if pedido.get('sem_painel'):
+            with app.app_context():
+                db.session.execute(db.delete(PainelGestor))
+                db.session.commit()
+
+        inicio = time.perf_counter()
+        resposta = cliente.open(pedido['url'], method=pedido.get('metodo', 'GET'), json=pedido.get('json'))
+        duracao = time.perf_counter() - inicio
+        if resposta.status_code >= 400:
+            raise RuntimeError(f"{pedido['url']}: {resposta.status_code} {resposta.get_data(as_text=True)[:200]}")
+        if pedido.get('desfazer'):
+            cliente.delete(pedido['desfazer'](resposta))
+        if i >= AQUECIMENTO:
+            tempos.append(duracao * 1000)
+            consultas.append(_consultas(resposta))
+
+    percentis = statistics.quantiles(tempos, n=100, method='inclusive')
+    return {
+        'p50_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(percentis[94], 3),
+        'p99_ms': round(percentis[98], 3),
+        'consultas': max(consultas) if None not in consultas else None,
+    }
+
+
+def medir_org(total, repeticoes):
+    from src.main import create_app
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(diretorio, 'org.db')}",
+            'RESPOSTA_CACHE_DIR': os.path.join(diretorio, 'cache'),
+            'SESSAO_DIR': os.path.join(diretorio, 'sessoes'),
+            'TAREFAS_DIR': os.path.join(diretorio, 'tarefas'),
+            'METRICAS_LIMITE_CONSULTAS': 0,
+        })
+        inicio = time.perf_counter()
+        with app.app_context():
+            org = popular_org(total)
+        print(f"\n{total} usuários, {len(org['gestores'])} gestores, {org['avaliacoes']} avaliações "
+              f"e {org['arquivadas']} arquivadas (gerados em {time.perf_counter() - inicio:.1f} s)")
+
+        rnd = random.Random(1)
+        print(f"{'cenário':22} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'consultas':>10}")
+        resultados = {}
+        for nome, cenario in cenarios(org).items():
+            vezes = min(repeticoes, CENARIOS_LENTOS.get(nome, repeticoes))
+            resultado = resultados[nome] = executar(app, cenario, vezes, rnd)
+            print(f"{nome:22} {resultado['p50_ms']:9.2f} {resultado['p95_ms']:9.2f} "
+                  f"{resultado['p99_ms']:9.2f} {resultado['consultas']!s:>10}")
+        with app.app_context():
+            from src.models.avaliacao import db
+            db.engine.dispose()
+        return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista as regressões em relação à linha de base"""
+    regressoes = []
+    for total, cenarios_base in base['resultados'].items():
+        for nome, anterior in cenarios_base.items():
+            atual = resultados.get(total, {}).get(nome)
+            if atual is None:
+                continue
+            if anterior['consultas'] is not None and (atual['consultas'] or 0) > anterior['consultas']:
+                regressoes.append(f"{total}/{nome}: {atual['consultas']} consultas (antes {anterior['consultas']})")
+            if atual['p95_ms'] > anterior['p95_ms'] * tolerancia:
+                regressoes.append(f"{total}/{nome}: p95 {atual['p95_ms']:.2f} ms (antes {anterior['p95_ms']:.2f} ms)")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, nargs='+', default=[100, 10_000, 100_000])
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--salvar', metavar='JSON', help='grava os resultados como linha de base')
+    parser.add_argument('--comparar', metavar='JSON', help='compara com uma linha de base gravada')
+    parser.add_argument('--tolerancia', type=float, default=1.5,
+                        help='p95 aceito em relação à linha de base (padrão 1.5x)')
+    args = parser.parse_args()
+
+    resultados = {str(total): medir_org(total, args.repeticoes) for total in args.usuarios}
+
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'repeticoes': args.repeticoes,
+                'resultados': resultados,
+            }, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write('\n')
+        print(f'\nLinha de base gravada em {args.salvar}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print('\nRegressões:')
+            for regressao in regressoes:
+                print(f'  {regressao}')
+            sys.exit(1)
+        print('\nSem regressões em relação à linha de base')
+
+
+if __name__ == '__main__':
+    main()
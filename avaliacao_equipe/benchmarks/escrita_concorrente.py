@@ -0,0 +1,171 @@
+"""Carga concorrente de escritas e leituras no SQLite, como com gunicorn -w N.
+
+Cria um banco temporário com G gestores e suas equipes e dispara processos
+independentes (um por "worker"): os escritores fazem POST /api/avaliacoes
+para cada subordinado, enquanto os leitores repetem GET /api/avaliacoes e
+/api/avaliacoes/estatisticas até os escritores terminarem. Ao final conta
+respostas 5xx e erros "database is locked"; havendo algum, sai com código 1
+(tests/test_escrita_concorrente.py roda uma versão curta).
+
+    python avaliacao_equipe/benchmarks/escrita_concorrente.py [--escritores 8] [--leitores 4]
+
+Com --sem-ajustes os pragmas voltam aos padrões do SQLite/pysqlite
+(journal_mode=DELETE, synchronous=FULL, busy_timeout de 5 s), para comparação.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NOTAS = {
+    'producao': 8, 'edicao': 7, 'coordenacao': 9, 'co_coordenacao': 6, 'pro_atividade': 8,
+    'criatividade': 7, 'resolucao_problemas': 9, 'flexibilidade_adaptabilidade': 8,
+    'relacionamento_equipe': 7, 'relacionamento_outras_areas': 6, 'inteligencia_emocional': 8,
+    'lideranca': 7, 'visao_institucional': 9,
+}
+
+SEM_AJUSTES = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_BUSY_TIMEOUT': '5000',
+}
+
+
+def _app(ambiente):
+    """Cria a aplicação no processo atual apontando para o banco temporário"""
+    os.environ.update(ambiente)
+    sys.path.insert(0, RAIZ)
+    from src.main import create_app
+    return create_app()
+
+
+def _gestor(indice):
+    return f'gestor{indice}@carga.com'
+
+
+def preparar(ambiente, gestores, equipe):
+    app = _app(ambiente)
+    from src.migrations import aplicar_migracoes
+    from src.services.importacao import importar_usuarios
+
+    registros = []
+    for g in range(gestores):
+        registros.append({'matricula': g * 1000, 'nome': f'Gestor {g}', 'email': _gestor(g), 'tipo': 'gestor'})
+        registros += [
+            {'matricula': g * 1000 + f, 'nome': f'Funcionario {g}-{f}', 'email': f'f{g}-{f}@carga.com',
+             'gestor_imediato': f'Gestor {g}'}
+            for f in range(1, equipe + 1)
+        ]
+    with app.app_context():
+        list(aplicar_migracoes())
+        importar_usuarios(registros)
+
+
+def _falha(resposta):
+    """(status, mensagem) de uma resposta inesperada"""
+    corpo = resposta.get_json(silent=True) or {}
+    return resposta.status_code, corpo.get('error', str(resposta.status_code))
+
+
+def escritor(ambiente, indice, fila):
+    app = _app(ambiente)
+    from src.models.usuario import Usuario
+
+    cliente = app.test_client()
+    cliente.post('/api/login', json={'email': _gestor(indice)})
+    with app.app_context():
+        gestor_id = Usuario.query.filter_by(email=_gestor(indice)).one().id
+        subordinados = [u.id for u in Usuario.query.filter_by(gestor_id=gestor_id)]
+
+    latencias, falhas = [], []
+    for avaliado_id in subordinados:
+        inicio = time.perf_counter()
+        resposta = cliente.post('/api/avaliacoes', json=dict(NOTAS, avaliado_id=avaliado_id,
+                                                             tipo_avaliacao='subordinado'))
+        latencias.append(time.perf_counter() - inicio)
+        if resposta.status_code != 201:
+            falhas.append(_falha(resposta))
+    fila.put(('escritor', latencias, falhas))
+
+
+def leitor(ambiente, indice, parar, fila):
+    app = _app(ambiente)
+    cliente = app.test_client()
+    cliente.post('/api/login', json={'email': _gestor(indice)})
+
+    latencias, falhas = [], []
+    while not parar.is_set():
+        for url in ('/api/avaliacoes', '/api/avaliacoes/estatisticas'):
+            inicio = time.perf_counter()
+            resposta = cliente.get(url)
+            latencias.append(time.perf_counter() - inicio)
+            if resposta.status_code != 200:
+                falhas.append(_falha(resposta))
+    fila.put(('leitor', latencias, falhas))
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000 if valores else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escritores', type=int, default=8)
+    parser.add_argument('--leitores', type=int, default=4)
+    parser.add_argument('--equipe', type=int, default=50, help='Subordinados por gestor')
+    parser.add_argument('--sem-ajustes', action='store_true')
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = {
+            'DATABASE_URL': f"sqlite:///{os.path.join(diretorio, 'carga.db')}",
+            'RESPOSTA_CACHE_DIR': os.path.join(diretorio, 'cache'),
+            'SESSAO_DIR': os.path.join(diretorio, 'sessoes'),
+            'TAREFAS_DIR': os.path.join(diretorio, 'tarefas'),
+        }
+        if args.sem_ajustes:
+            ambiente.update(SEM_AJUSTES)
+
+        preparar_processo = contexto.Process(target=preparar, args=(ambiente, args.escritores, args.equipe))
+        preparar_processo.start()
+        preparar_processo.join()
+
+        fila = contexto.Queue()
+        parar = contexto.Event()
+        leitores = [contexto.Process(target=leitor, args=(ambiente, i, parar, fila)) for i in range(args.leitores)]
+        escritores = [contexto.Process(target=escritor, args=(ambiente, i, fila)) for i in range(args.escritores)]
+
+        inicio = time.perf_counter()
+        for processo in leitores + escritores:
+            processo.start()
+        resultados = [fila.get() for _ in escritores]
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        resultados += [fila.get() for _ in leitores]
+        for processo in leitores + escritores:
+            processo.join()
+
+    print(f"{'sem ajustes' if args.sem_ajustes else 'WAL + busy_timeout'}: "
+          f"{args.escritores} escritores, {args.leitores} leitores, {duracao:.1f} s")
+    erros_lock = erros_5xx = 0
+    for papel in ('escritor', 'leitor'):
+        latencias = [l for p, ls, _ in resultados if p == papel for l in ls]
+        falhas = [f for p, _, fs in resultados if p == papel for f in fs]
+        erros_lock += sum('locked' in mensagem for _, mensagem in falhas)
+        erros_5xx += sum(status >= 500 for status, _ in falhas)
+        print(f'  {papel:9} {len(latencias):6} requisições  p50 {_percentil(latencias, 0.5):7.1f} ms  '
+              f'p99 {_percentil(latencias, 0.99):7.1f} ms  falhas {len(falhas)}')
+        for status, mensagem in sorted(set(falhas))[:5]:
+            print(f'            {status} {mensagem}')
+    print(f'  erros "database is locked": {erros_lock}  respostas 5xx: {erros_5xx}')
+    return 1 if erros_lock or erros_5xx else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Plano de consulta e tempo das consultas quentes com e sem os índices.
+
+Gera um banco SQLite temporário com N avaliações (padrão 100 mil), executa
+EXPLAIN QUERY PLAN e mede cada consulta primeiro sem os índices de
+avaliacao/usuario (varredura completa) e depois com eles.
+
+    python avaliacao_equipe/benchmarks/indices.py [--avaliacoes 100000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateIndex
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.usuario import Usuario
+
+CONSULTAS = {
+    'duplicidade (create_avaliacao)': (
+        "SELECT id FROM avaliacao WHERE ciclo_id = :ciclo AND avaliador_id = :gestor "
+        "AND avaliado_id = :avaliado AND tipo_avaliacao = 'subordinado' LIMIT 1"
+    ),
+    'avaliacoes do avaliador (GET /api/avaliacoes)': (
+        "SELECT * FROM avaliacao WHERE ciclo_id = :ciclo AND avaliador_id = :gestor ORDER BY data_avaliacao DESC"
+    ),
+    'autoavaliacoes da equipe (estatisticas)': (
+        "SELECT * FROM avaliacao WHERE ciclo_id = :ciclo AND avaliador_id IN (:avaliado, :gestor) "
+        "AND avaliado_id = avaliador_id AND tipo_avaliacao = 'autoavaliacao'"
+    ),
+    'resumo por avaliado (atualizar_resumos)': (
+        "SELECT avaliado_id, count(id), avg(media_geral) FROM avaliacao "
+        "WHERE ciclo_id = :ciclo AND avaliado_id = :avaliado GROUP BY avaliado_id"
+    ),
+    'subordinados ativos (get_subordinados)': (
+        "SELECT * FROM usuario WHERE gestor_imediato = :nome_gestor AND ativo = 1"
+    ),
+}
+
+
+def gerar_banco(caminho, total_avaliacoes, tamanho_equipe=10):
+    """Cria o esquema sem índices e popula usuários em equipes e avaliações (todas no ciclo 1)"""
+    engine = create_engine(f'sqlite:///{caminho}')
+    tabelas = [Ciclo.__table__, Usuario.__table__, Avaliacao.__table__]
+    indices = {tabela: set(tabela.indexes) for tabela in tabelas}
+    for tabela in tabelas:
+        tabela.indexes.clear()
+    try:
+        db.metadata.create_all(engine, tables=tabelas)
+    finally:
+        for tabela in tabelas:
+            tabela.indexes.update(indices[tabela])
+
+    # Cada funcionário faz a sua autoavaliação e recebe a avaliação do gestor
+    rnd = random.Random(42)
+    usuarios = []
+    avaliacoes = []
+    while len(avaliacoes) < total_avaliacoes:
+        uid = len(usuarios) + 1
+        gestor = ((uid - 1) // tamanho_equipe) * tamanho_equipe + 1
+        eh_gestor = gestor == uid
+        usuarios.append((uid, uid, f'Usuario {uid}', f'u{uid}@empresa.com',
+                         None if eh_gestor else f'Usuario {gestor}',
+                         'gestor' if eh_gestor else 'funcionario', 1))
+
+        pares = [(uid, uid, 'autoavaliacao')]
+        if not eh_gestor:
+            pares.append((gestor, uid, 'subordinado'))
+        for avaliador, avaliado, tipo in pares[:total_avaliacoes - len(avaliacoes)]:
+            notas = [rnd.randint(0, 10) for _ in CRITERIOS]
+            avaliacoes.append((1, avaliador, avaliado, tipo, '2025-01-01 00:00:00', *notas,
+                               round(sum(notas) / len(notas), 1)))
+
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("INSERT INTO ciclo (id, nome, status, inicio) VALUES (1, '2025', 'aberto', '2025-01-01 00:00:00')")
+    conexao.executemany(
+        'INSERT INTO usuario (id, matricula, nome, email, gestor_imediato, tipo, ativo) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        usuarios
+    )
+    colunas = ', '.join(('ciclo_id', 'avaliador_id', 'avaliado_id', 'tipo_avaliacao', 'data_avaliacao')
+                        + CRITERIOS + ('media_geral',))
+    conexao.executemany(
+        f'INSERT INTO avaliacao ({colunas}) VALUES ({", ".join("?" * (len(CRITERIOS) + 6))})',
+        avaliacoes
+    )
+    conexao.commit()
+    return conexao, engine, tabelas, gestor
+
+
+def medir(conexao, sql, parametros, repeticoes):
+    plano = ' | '.join(linha[-1] for linha in conexao.execute(f'EXPLAIN QUERY PLAN {sql}', parametros))
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        conexao.execute(sql, parametros).fetchall()
+    return plano, (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--avaliacoes', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'bench.db')
+        conexao, engine, tabelas, ultimo_gestor = gerar_banco(caminho, args.avaliacoes)
+        total = conexao.execute('SELECT count(*) FROM avaliacao').fetchone()[0]
+        print(f'{total} avaliações, {conexao.execute("SELECT count(*) FROM usuario").fetchone()[0]} usuários\n')
+
+        # Última equipe gerada: o pior caso para uma varredura sequencial
+        parametros = {'ciclo': 1, 'gestor': ultimo_gestor, 'avaliado': ultimo_gestor + 1,
+                      'nome_gestor': f'Usuario {ultimo_gestor}'}
+        resultados = {}
+        for fase in ('sem índices', 'com índices'):
+            if fase == 'com índices':
+                for tabela in tabelas:
+                    for indice in tabela.indexes:
+                        conexao.execute(str(CreateIndex(indice).compile(engine)))
+                conexao.execute('ANALYZE')
+                conexao.commit()
+            for nome, sql in CONSULTAS.items():
+                resultados.setdefault(nome, {})[fase] = medir(conexao, sql, parametros, args.repeticoes)
+
+        for nome, fases in resultados.items():
+            print(nome)
+            for fase, (plano, ms) in fases.items():
+                print(f'  {fase:12} {ms:9.3f} ms  {plano}')
+        conexao.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Tempo de inicialização da aplicação: worker a frio e montagem em testes.
+
+Compara create_app() como é hoje (sem tocar no banco) com o comportamento
+anterior, em que cada importação de src.main executava db.create_all() e
+imprimia uma mensagem. Usa um banco SQLite temporário já migrado.
+
+    python avaliacao_equipe/benchmarks/inicializacao.py [--processos 10] [--apps 50]
+
+- processos: interpretadores novos, cada um importa src.main e cria o app
+  (o que um worker do gunicorn faz ao subir sem --preload)
+- apps: create_app() repetido no mesmo processo (montagem de fixtures de teste)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT = """
+import sys, time
+inicio = time.perf_counter()
+sys.path.insert(0, {raiz!r})
+from src.main import create_app
+app = create_app()
+if {create_all}:
+    from src.models.avaliacao import db
+    import src.migrations
+    with app.app_context():
+        db.create_all()
+    print("Tabelas criadas com sucesso!", file=sys.stderr)
+print(time.perf_counter() - inicio)
+"""
+
+
+def boot_a_frio(ambiente, create_all, processos):
+    """Tempo (s) do import + create_app medido dentro de cada interpretador novo"""
+    codigo = BOOT.format(raiz=RAIZ, create_all=create_all)
+    tempos = []
+    for _ in range(processos):
+        saida = subprocess.run([sys.executable, '-c', codigo], env=ambiente, check=True,
+                               capture_output=True, text=True).stdout
+        tempos.append(float(saida.split()[-1]))
+    return tempos
+
+
+def apps_no_processo(create_all, apps):
+    from src.main import create_app
+    from src.models.avaliacao import db
+
+    tempos = []
+    for _ in range(apps):
+        inicio = time.perf_counter()
+        app = create_app()
+        if create_all:
+            with app.app_context():
+                db.create_all()
+        tempos.append(time.perf_counter() - inicio)
+        with app.app_context():
+            db.engine.dispose()
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, default=10)
+    parser.add_argument('--apps', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'inicio.db')}"
+        sys.path.insert(0, RAIZ)
+        from src.main import create_app
+        from src.migrations import aplicar_migracoes
+        with create_app().app_context():
+            aplicar_migracoes()
+
+        ambiente = dict(os.environ)
+        # Aquece imports e caches do processo antes de medir
+        apps_no_processo(True, 5)
+
+        # Alterna os dois modos para que ruído da máquina afete ambos igualmente
+        modos = (('create_all a cada import (antes)', True), ('create_app (agora)', False))
+        frio = {rotulo: [] for rotulo, _ in modos}
+        quente = {rotulo: [] for rotulo, _ in modos}
+        for _ in range(args.processos):
+            for rotulo, create_all in modos:
+                frio[rotulo] += boot_a_frio(ambiente, create_all, 1)
+                quente[rotulo] += apps_no_processo(create_all, max(1, args.apps // args.processos))
+
+        for rotulo, _ in modos:
+            print(rotulo)
+            print(f'  worker a frio   mediana {statistics.median(frio[rotulo]) * 1000:8.1f} ms  '
+                  f'({len(frio[rotulo])} processos)')
+            print(f'  app em teste    mediana {statistics.median(quente[rotulo]) * 1000:8.1f} ms  '
+                  f'({len(quente[rotulo])} apps)')
+
+if __name__ == '__main__':
+    main()
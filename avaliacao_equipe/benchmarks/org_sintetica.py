@@ -0,0 +1,147 @@
+"""Gerador de uma organização sintética para benchmarks.
+
+Usuários em uma árvore de gestores ligada por `gestor_imediato` (como vem
+da planilha), autoavaliações e avaliações de gestor com os 13 critérios.
+Parte das avaliações de gestor do ciclo aberto fica pendente para que os
+benchmarks possam criá-las pela API; o ciclo anterior, completo, já está
+arquivado em avaliacao_arquivo. Usar dentro de um app context:
+
+    org = popular_org(10_000)
+"""
+import random
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from src.migrations import aplicar_migracoes
+from src.models.avaliacao import Avaliacao, AvaliacaoArquivo, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.usuario import Usuario
+from src.services.resumo import reconstruir_resumos
+
+PRIMEIROS = ['João', 'José', 'Antônio', 'Maria', 'Ana', 'Luíza', 'Sérgio', 'Fábio', 'Márcia', 'Letícia',
+             'Conceição', 'Inês', 'Vinícius', 'Caio', 'Rafael', 'Gabriela', 'Tânia', 'Otávio', 'Lúcia', 'Mônica']
+SOBRENOMES = ['Araújo', 'Gonçalves', 'Conceição', 'Magalhães', 'Simões', 'Brandão', 'Calderaro', 'Assunção',
+              'Falcão', 'Guimarães', 'Silva', 'Souza', 'Teodoro', 'Sardinha', 'Pietrobon', 'Abranches']
+CARGOS = ['Editor', 'Produtor', 'Repórter', 'Analista', 'Cinegrafista', 'Produtor Executivo']
+REGIOES = ['SP', 'RJ', 'MG', 'DF', 'PE', 'RS']
+
+EQUIPE_MINIMA, EQUIPE_MAXIMA = 4, 10
+FRACAO_GESTORES = 0.2
+FRACAO_AUTOAVALIADOS = 0.9
+FRACAO_AVALIADOS_PELO_GESTOR = 0.7
+TAMANHO_LOTE = 5000
+
+
+def _nome_unico(rnd, usados, uid):
+    # gestor_imediato é resolvido pelo nome: homônimos ficariam sem gestor
+    nome = f'{rnd.choice(PRIMEIROS)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}'
+    if nome in usados:
+        nome = f'{nome} {uid}'
+    usados.add(nome)
+    return nome
+
+
+def gerar_usuarios(total, rnd):
+    """Árvore em largura: cada gestor recebe de 4 a 10 subordinados diretos"""
+    usados = set()
+    raiz = {'id': 1, 'nome': _nome_unico(rnd, usados, 1), 'gestor_imediato': None, 'gestor': None}
+    usuarios = [raiz]
+    fila = deque([raiz])
+    while len(usuarios) < total:
+        gestor = fila.popleft()
+        for _ in range(rnd.randint(EQUIPE_MINIMA, EQUIPE_MAXIMA)):
+            if len(usuarios) >= total:
+                break
+            uid = len(usuarios) + 1
+            usuario = {'id': uid, 'nome': _nome_unico(rnd, usados, uid),
+                       'gestor_imediato': gestor['nome'], 'gestor': gestor['id']}
+            usuarios.append(usuario)
+            # A fila não pode esvaziar antes de chegar ao total
+            if rnd.random() < FRACAO_GESTORES or not fila:
+                fila.append(usuario)
+
+    com_equipe = {usuario['gestor'] for usuario in usuarios}
+    for usuario in usuarios:
+        usuario.update({
+            'matricula': 100000 + usuario['id'],
+            'email': f"usuario{usuario['id']}@empresa.com",
+            'cargo': rnd.choice(CARGOS),
+            'regiao': rnd.choice(REGIOES),
+            'tipo': 'gestor' if usuario['id'] in com_equipe else 'funcionario',
+            'ativo': True,
+        })
+    return usuarios
+
+
+def _avaliacao(rnd, ciclo, avaliador, avaliado, tipo, inicio):
+    notas = {criterio: rnd.randint(3, 10) for criterio in CRITERIOS}
+    return dict(notas, ciclo_id=ciclo, avaliador_id=avaliador, avaliado_id=avaliado, tipo_avaliacao=tipo,
+                data_avaliacao=inicio + timedelta(minutes=rnd.randrange(365 * 24 * 60)),
+                media_geral=round(sum(notas.values()) / len(notas), 1),
+                pontos_fortes='Entrega no prazo', pontos_desenvolver='Delegar mais')
+
+
+def gerar_avaliacoes(usuarios, rnd, ciclo, inicio, completo=False):
+    """Retorna as avaliações do ciclo e os pares (gestor, subordinado) ainda não avaliados"""
+    avaliacoes, pendentes = [], []
+    for usuario in usuarios:
+        if completo or rnd.random() < FRACAO_AUTOAVALIADOS:
+            avaliacoes.append(_avaliacao(rnd, ciclo, usuario['id'], usuario['id'], 'autoavaliacao', inicio))
+        if usuario['gestor'] is None:
+            continue
+        if completo or rnd.random() < FRACAO_AVALIADOS_PELO_GESTOR:
+            avaliacoes.append(_avaliacao(rnd, ciclo, usuario['gestor'], usuario['id'], 'subordinado', inicio))
+        else:
+            pendentes.append((usuario['gestor'], usuario['id']))
+    return avaliacoes, pendentes
+
+
+def _inserir(modelo, linhas):
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        db.session.execute(insert(modelo), linhas[inicio:inicio + TAMANHO_LOTE])
+
+
+def popular_org(total, semente=42):
+    """Cria o esquema, popula a organização e aplica as migrações.
+
+    Retorna ids e emails usados pelos cenários dos benchmarks.
+    """
+    rnd = random.Random(semente)
+    db.create_all()
+    usuarios = gerar_usuarios(total, rnd)
+    arquivadas, _ = gerar_avaliacoes(usuarios, rnd, 1, datetime(2024, 1, 1), completo=True)
+    avaliacoes, pendentes = gerar_avaliacoes(usuarios, rnd, 2, datetime(2025, 1, 1))
+    _inserir(Ciclo, [
+        {'id': 1, 'nome': '2024', 'status': 'encerrado', 'inicio': datetime(2024, 1, 1),
+         'fim': datetime(2024, 12, 31), 'arquivado_em': datetime(2025, 1, 1)},
+        {'id': 2, 'nome': '2025', 'status': 'aberto', 'inicio': datetime(2025, 1, 1)},
+    ])
+
+    colunas = {coluna.key for coluna in Usuario.__table__.columns}
+    _inserir(Usuario, [{k: v for k, v in usuario.items() if k in colunas}
+                       for usuario in usuarios])
+    admin_id = total + 1
+    _inserir(Usuario, [{'id': admin_id, 'matricula': 1, 'nome': 'Administrador', 'email': 'admin@empresa.com',
+                        'tipo': 'admin', 'ativo': True}])
+    # As avaliações arquivadas mantêm os ids que tinham em avaliacao: as do
+    # ciclo aberto continuam a numeração
+    _inserir(AvaliacaoArquivo, [dict(avaliacao, id=i) for i, avaliacao in enumerate(arquivadas, start=1)])
+    _inserir(Avaliacao, [dict(avaliacao, id=len(arquivadas) + i) for i, avaliacao in enumerate(avaliacoes, start=1)])
+    db.session.commit()
+
+    # Resolve gestor_imediato em gestor_id, monta usuario_hierarquia e os índices de busca
+    aplicar_migracoes()
+    reconstruir_resumos()
+
+    rnd.shuffle(pendentes)
+    return {
+        'admin_id': admin_id,
+        'emails': [usuario['email'] for usuario in usuarios],
+        'gestores': [usuario['id'] for usuario in usuarios if usuario['tipo'] == 'gestor'],
+        'funcionarios': [usuario['id'] for usuario in usuarios if usuario['tipo'] == 'funcionario'],
+        'pendentes': pendentes,
+        'avaliacoes': len(avaliacoes),
+        'arquivadas': len(arquivadas),
+    }
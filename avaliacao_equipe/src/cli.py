@@ -0,0 +1,196 @@
+"""Comandos de manutenção registrados no `flask` CLI por create_app()"""
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from src.migrations import aplicar_migracoes
+from src.models.avaliacao import db
+from src.models.ciclo import Ciclo
+from src.models.usuario import Usuario
+from src.services.cache import AVALIACOES, CICLOS, USUARIOS, invalidar
+from src.services.ciclos import abrir_ciclo, arquivar_ciclo
+from src.services.estaticos import construir_estaticos
+from src.services.hierarquia import sincronizar_hierarquia
+from src.services.importacao import LEITORES, TAMANHO_LOTE, formato_do_arquivo, importar_usuarios
+from src.services.paineis import marcar_paineis
+from src.services.pontuacao import pesos_criterios, recalcular_medias
+from src.services.resumo import reconstruir_resumos
+from src.services.sessoes import revogar_sessoes
+from src.services.tarefas import executar_em_primeiro_plano, limpar_tarefas
+
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db():
+    """Aplica as migrações de esquema pendentes no banco configurado"""
+    aplicadas = aplicar_migracoes()
+    for etapa in aplicadas:
+        print(f"Migração aplicada: {etapa}")
+    if not aplicadas:
+        print("Nenhuma migração pendente")
+    invalidar(AVALIACOES, USUARIOS, CICLOS)
+
+
+@click.command('rebuild-resumos')
+@with_appcontext
+def rebuild_resumos():
+    """Reconstrói os resumos (resumo_avaliacao) do ciclo aberto a partir das avaliações"""
+    total = reconstruir_resumos()
+    invalidar(AVALIACOES)
+    print(f"{total} resumos reconstruídos")
+
+
+@click.command('recalcular-medias')
+@click.option('--ciclo', 'nome_ciclo', help='Ciclo não arquivado a recalcular (padrão: o ciclo aberto)')
+@click.option('--todos', is_flag=True, help='Todos os ciclos não arquivados, inclusive os encerrados')
+@with_appcontext
+def recalcular_medias_cmd(nome_ciclo, todos):
+    """Recalcula media_geral com os pesos de CRITERIOS_PESOS e refaz os resumos.
+
+    Só o ciclo aberto, a menos que --ciclo ou --todos seja informado: ciclos
+    encerrados mantêm as médias calculadas com os pesos da época. Ciclos
+    arquivados (avaliacao_arquivo) nunca são recalculados.
+    """
+    if nome_ciclo and todos:
+        raise click.UsageError('Use --ciclo ou --todos, não os dois')
+    ciclo_id = None
+    if nome_ciclo:
+        ciclo = Ciclo.query.filter_by(nome=nome_ciclo).first()
+        if ciclo is None:
+            raise click.ClickException(f"Ciclo não encontrado: {nome_ciclo}")
+        if ciclo.arquivado:
+            raise click.ClickException(f"Ciclo {nome_ciclo} está arquivado")
+        ciclo_id = ciclo.id
+    pesos = ', '.join(f'{criterio}={peso:g}' for criterio, peso in pesos_criterios().items())
+    print(f"Pesos: {pesos}")
+    alteradas = recalcular_medias(ciclo_id, todos)
+    total = reconstruir_resumos(ciclo_id, todos)
+    marcar_paineis()
+    db.session.commit()
+    invalidar(AVALIACOES)
+    print(f"{alteradas} médias alteradas, {total} resumos reconstruídos")
+
+
+@click.command('abrir-ciclo')
+@click.argument('nome')
+@with_appcontext
+def abrir_ciclo_cmd(nome):
+    """Encerra o ciclo de avaliação aberto e abre o ciclo NOME"""
+    try:
+        ciclo = abrir_ciclo(nome)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Ciclo aberto: {ciclo.nome} (id {ciclo.id})")
+
+
+@click.command('arquivar-ciclo')
+@click.argument('nome')
+@with_appcontext
+def arquivar_ciclo_cmd(nome):
+    """Move as avaliações do ciclo encerrado NOME para avaliacao_arquivo"""
+    ciclo = Ciclo.query.filter_by(nome=nome).first()
+    if ciclo is None:
+        raise click.ClickException(f"Ciclo não encontrado: {nome}")
+    try:
+        total = arquivar_ciclo(ciclo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"{total} avaliações de {ciclo.nome} arquivadas")
+
+
+@click.command('sync-hierarquia')
+@with_appcontext
+def sync_hierarquia():
+    """Resolve gestor_imediato (nome) em gestor_id e reconstrói usuario_hierarquia"""
+    relatorio = sincronizar_hierarquia()
+    marcar_paineis()
+    db.session.commit()
+    invalidar(USUARIOS)
+    print(f"{relatorio['resolvidos']} gestores resolvidos, {relatorio['alterados']} usuários alterados, "
+          f"{relatorio['niveis']} níveis na hierarquia")
+    for nome in relatorio['nao_encontrados']:
+        print(f"Gestor não encontrado: {nome}")
+    for nome in relatorio['ambiguos']:
+        print(f"Nome de gestor ambíguo: {nome}")
+
+
+@click.command('import-usuarios')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(list(LEITORES)), help='Padrão: pela extensão do arquivo')
+@click.option('--lote', default=TAMANHO_LOTE, show_default=True, help='Usuários por lote')
+@with_appcontext
+def import_usuarios(arquivo, formato, lote):
+    """Importa ou atualiza usuários a partir de um arquivo CSV, XLSX, JSON ou NDJSON"""
+    formato = formato or formato_do_arquivo(arquivo)
+    with open(arquivo, 'rb') as f:
+        relatorio = importar_usuarios(
+            LEITORES[formato](f), tamanho_lote=lote,
+            progresso=lambda r: print(f"{r['lidos']} lidos, {r['criados']} criados, "
+                                      f"{r['atualizados']} atualizados, {r['total_erros']} erros")
+        )
+    for erro in relatorio['erros']:
+        print(f"Registro {erro['registro']}: {erro['erro']}")
+    print(f"{relatorio['hierarquia']['resolvidos']} gestores resolvidos, "
+          f"{relatorio['hierarquia']['niveis']} níveis na hierarquia")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets():
+    """Gera os estáticos com hash no nome, versões gzip/brotli e o manifesto em ESTATICOS_BUILD"""
+    destino = current_app.config['ESTATICOS_BUILD']
+    manifesto = construir_estaticos(current_app.static_folder, destino)
+    for nome, entrada in sorted(manifesto.items()):
+        versoes = ', '.join(f'{codificacao} {tamanho} B' for codificacao, tamanho in entrada['codificacoes'].items())
+        print(f"{nome} -> {entrada['arquivo']}: {entrada['tamanho']} B" + (f" ({versoes})" if versoes else ''))
+    print(f"Manifesto gravado em {destino}")
+
+
+@click.command('revogar-sessoes')
+@click.argument('emails', nargs=-1)
+@click.option('--todas', is_flag=True, help='Encerra as sessões de todos os usuários')
+@with_appcontext
+def revogar_sessoes_cmd(emails, todas):
+    """Encerra as sessões abertas dos usuários informados (por email) ou de todos"""
+    if todas:
+        total = current_app.session_interface.armazenamento.remover_todas()
+        print(f"{total} sessões removidas")
+        return
+    usuarios = Usuario.query.filter(Usuario.email.in_([email.lower() for email in emails])).all()
+    revogar_sessoes(*[usuario.id for usuario in usuarios])
+    for usuario in usuarios:
+        print(f"Sessões revogadas: {usuario.email}")
+    for email in set(email.lower() for email in emails) - {usuario.email for usuario in usuarios}:
+        print(f"Usuário não encontrado: {email}")
+
+
+@click.command('limpar-sessoes')
+@with_appcontext
+def limpar_sessoes():
+    """Remove do armazenamento as sessões expiradas"""
+    total = current_app.session_interface.armazenamento.remover_expiradas(time.time())
+    print(f"{total} sessões expiradas removidas")
+
+
+@click.command('executar-tarefas')
+@click.option('--threads', type=int, help='Tarefas executadas ao mesmo tempo (padrão: TAREFAS_THREADS)')
+@with_appcontext
+def executar_tarefas(threads):
+    """Executa as tarefas em segundo plano da fila até receber SIGTERM/SIGINT"""
+    print("Executando tarefas; Ctrl+C para parar")
+    executar_em_primeiro_plano(current_app._get_current_object(), threads)
+
+
+@click.command('limpar-tarefas')
+@click.option('--dias', default=7, show_default=True, help='Idade mínima das tarefas finalizadas removidas')
+@with_appcontext
+def limpar_tarefas_cmd(dias):
+    """Remove as tarefas finalizadas antigas e os seus arquivos de resultado"""
+    total = limpar_tarefas(dias)
+    print(f"{total} tarefas removidas")
+
+
+COMANDOS = (upgrade_db, rebuild_resumos, recalcular_medias_cmd, abrir_ciclo_cmd, arquivar_ciclo_cmd, sync_hierarquia,
+            import_usuarios, build_assets, revogar_sessoes_cmd, limpar_sessoes, executar_tarefas, limpar_tarefas_cmd)
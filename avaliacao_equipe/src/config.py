@@ -0,0 +1,107 @@
+import os
+import weakref
+from functools import partial
+
+from sqlalchemy import event
+
+from src.models.avaliacao import db
+
+DIRETORIO_BANCO = os.path.join(os.path.dirname(__file__), 'database')
+
+# Engines dos apps criados neste processo; a referência fraca não os mantém vivos
+_ENGINES = weakref.WeakSet()
+
+
+def _inteiro(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def url_do_banco():
+    """DATABASE_URL do ambiente ou, na falta dela, o SQLite em src/database/app.db"""
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        os.makedirs(DIRETORIO_BANCO, exist_ok=True)
+        return f"sqlite:///{os.path.join(DIRETORIO_BANCO, 'app.db')}"
+    # Heroku e afins ainda entregam o esquema antigo postgres://
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def opcoes_do_engine(url):
+    """Parâmetros do pool de conexões, ajustáveis por variáveis de ambiente"""
+    if url.startswith('sqlite'):
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            return {}
+        # Cada worker do gunicorn tem o seu pool; conexões SQLite são baratas,
+        # o pool só evita reabrir o arquivo e reaplicar os pragmas a cada requisição
+        return {
+            'pool_size': _inteiro('DB_POOL_SIZE', 5),
+            'max_overflow': _inteiro('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _inteiro('DB_POOL_TIMEOUT', 30),
+        }
+
+    # PostgreSQL: o total de conexões é workers x (pool_size + max_overflow),
+    # que deve caber em max_connections do servidor
+    return {
+        'pool_size': _inteiro('DB_POOL_SIZE', 5),
+        'max_overflow': _inteiro('DB_MAX_OVERFLOW', 5),
+        'pool_timeout': _inteiro('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _inteiro('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+    }
+
+
+def pragmas_sqlite():
+    """Pragmas aplicados a cada nova conexão SQLite"""
+    return {
+        # Tempo (ms) que uma escrita espera pelo lock antes de "database is locked";
+        # vem primeiro para que a troca de journal_mode também espere
+        'busy_timeout': _inteiro('SQLITE_BUSY_TIMEOUT', 15000),
+        # WAL: leitores não bloqueiam o escritor nem são bloqueados por ele
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        # Em WAL, NORMAL só sincroniza no checkpoint; seguro contra corrupção
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        # Valor negativo = KiB de cache por conexão
+        'cache_size': -_inteiro('SQLITE_CACHE_KB', 32768),
+        'mmap_size': _inteiro('SQLITE_MMAP_BYTES', 256 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+
+def _aplicar_pragmas(pragmas, conexao_dbapi, registro_conexao):
+    cursor = conexao_dbapi.cursor()
+    try:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+    finally:
+        cursor.close()
+
+
+def _descartar_conexoes_herdadas():
+    # Com gunicorn --preload o app é criado no processo mestre: conexões
+    # abertas antes do fork não podem ser compartilhadas com os workers
+    for engine in list(_ENGINES):
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_descartar_conexoes_herdadas)
+
+
+def configurar_banco(app):
+    """Configura URL, pool e pragmas do banco e inicializa o Flask-SQLAlchemy no app.
+
+    Valores já presentes em app.config têm precedência sobre os do ambiente.
+    """
+    url = app.config.setdefault('SQLALCHEMY_DATABASE_URI', url_do_banco())
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_do_engine(url))
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    app.config.setdefault('SQLITE_PRAGMAS', pragmas_sqlite())
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', partial(_aplicar_pragmas, app.config['SQLITE_PRAGMAS']))
+    _ENGINES.add(engine)
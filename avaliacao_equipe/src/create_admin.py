@@ -1,7 +1,10 @@
 from datetime import datetime
-from main import app, db
+from main import create_app
+from src.models.avaliacao import db
 from src.models.usuario import Usuario
 
+app = create_app()
+
 with app.app_context():
     # Verifica se já existe admin
     admin_existente = Usuario.query.filter_by(tipo="admin", ativo=True).first()
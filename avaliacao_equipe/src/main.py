@@ -3,170 +3,96 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, session
-from src.models.avaliacao import db
-from src.models.usuario import Usuario
-from src.routes.avaliacao import avaliacao_bp
-from src.routes.colaborador import colaborador_bp
-from src.routes.auth import auth_bp
-from src.models.avaliacao import Avaliacao, db
-from flask import jsonify, redirect, url_for, Blueprint
-from sqlalchemy import func
-from src.routes.admin import admin_bp
-
-
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Configurar CORS
-@app.after_request
-def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-    return response
-app.register_blueprint(admin_bp)
-app.register_blueprint(avaliacao_bp, url_prefix='/api')
-app.register_blueprint(colaborador_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-
-# Configurar banco de dados
-database_dir = os.path.join(os.path.dirname(__file__), 'database')
-os.makedirs(database_dir, exist_ok=True)
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(database_dir, 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-with app.app_context():
-    # Importar todos os modelos para garantir que as tabelas sejam criadas
-    from src.models.usuario import Usuario
-    from src.models.avaliacao import Avaliacao
-    from src.models.colaborador import Colaborador
-    
-    db.create_all()
-    print("Tabelas criadas com sucesso!")
-
-@app.route('/api/current_user')
-def current_user():
-    # Verificar se usuário está logado
-    user_id = session.get('user_id')
-    
-    if not user_id:
-        return {'error': 'Usuário não autenticado'}, 401
-    
-    usuario = Usuario.query.get(user_id)
-    if not usuario or not usuario.ativo:
-        session.clear()
-        return {'error': 'Usuário inválido'}, 401
-    
-    return usuario.to_dict_safe()
-
-@app.route('/api/subordinados')
-def subordinados():
-    # Verificar se usuário está logado
-    user_id = session.get('user_id')
-    
-    if not user_id:
-        return {'error': 'Usuário não autenticado'}, 401
-    
-    usuario = Usuario.query.get(user_id)
-    if not usuario or not usuario.ativo:
-        return {'error': 'Usuário inválido'}, 401
-    
-    subordinados = []
-    
-    if usuario.tipo == 'gestor':
-        # Gestores podem avaliar subordinados
-        subordinados_query = Usuario.query.filter_by(
-            gestor_imediato=usuario.nome, 
-            ativo=True
-        ).order_by(Usuario.nome).all()
-        subordinados = [sub.to_dict_safe() for sub in subordinados_query]
-    
-    return subordinados
-
-@app.route('/')
-def index():
-    # Verificar se usuário está logado
-    if 'user_id' not in session:
-        return send_from_directory(app.static_folder, 'login.html')
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/login')
-def login_page():
-    return send_from_directory(app.static_folder, 'login.html')
-
-@app.route('/api/ranking-geral')
-def ranking_geral():
-    user_id = session.get('user_id')
-    if not user_id:
-        return {'error': 'Usuário não autenticado'}, 401
-    
-    usuario = Usuario.query.get(user_id)
-    if not usuario or usuario.tipo != 'admin':
-        return {'error': 'Acesso negado'}, 403
-
-    # Query que retorna todas avaliações com média e avaliador
-    ranking = (
-        db.session.query(
-            Usuario.id.label("avaliado_id"),
-            Usuario.nome.label("funcionario"),
-            Usuario.cargo,
-            Avaliacao.avaliador_id,
-            db.func.avg(Avaliacao.media_geral).label("media_geral"),
-            db.func.avg(Avaliacao.autoavaliacao).label("autoavaliacao")
-        )
-        .join(Avaliacao, Avaliacao.avaliado_id == Usuario.id)
-        .filter(Usuario.ativo == True)
-        .group_by(Usuario.id, Usuario.nome, Usuario.cargo, Avaliacao.avaliador_id)
-        .order_by(db.desc("media_geral"))
-        .all()
+from flask import Flask, request
+
+
+def create_app(config=None):
+    """Cria e configura a aplicação.
+
+    Não toca no banco: o esquema é criado e atualizado explicitamente com
+    `flask --app src.main upgrade-db` (executado no release do Procfile), de
+    modo que subir um worker, rodar um script ou montar um teste não paga a
+    inspeção do esquema. `config` (dict) sobrepõe os valores padrão e os do
+    ambiente, ex.: create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}).
+    """
+    # Importados aqui para que importar src.main não carregue rotas e serviços
+    from src.cli import COMANDOS
+    from src.config import configurar_banco
+    from src.services.cache import configurar_cache
+    from src.services.estaticos import configurar_estaticos
+    from src.services.metricas import configurar_metricas
+    from src.services.pontuacao import ler_pesos
+    from src.services.sessoes import configurar_sessoes
+    from src.services.tarefas import configurar_tarefas
+    from src.routes.admin import admin_bp
+    from src.routes.auth import auth_bp
+    from src.routes.avaliacao import avaliacao_bp
+    from src.routes.colaborador import colaborador_bp
+    from src.routes.principal import principal_bp
+
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Segundos que o usuário logado fica em cache por processo (0 desativa)
+    app.config['USUARIO_CACHE_TTL'] = int(os.environ.get('USUARIO_CACHE_TTL', 0))
+    app.config['RESPOSTA_CACHE_URL'] = os.environ.get('RESPOSTA_CACHE_URL')
+    app.config['RESPOSTA_CACHE_MAX'] = int(os.environ.get('RESPOSTA_CACHE_MAX', 1024))
+    # Contadores de versão do cache em memória, compartilhados pelos workers
+    app.config['RESPOSTA_CACHE_DIR'] = os.environ.get('RESPOSTA_CACHE_DIR')
+    # Sessões no servidor: 'arquivos' (compartilhadas pelos workers) ou 'memoria'
+    app.config['SESSAO_ARMAZENAMENTO'] = os.environ.get('SESSAO_ARMAZENAMENTO', 'arquivos')
+    app.config['SESSAO_DIR'] = os.environ.get('SESSAO_DIR')
+    # Pesos dos critérios na media_geral, ex.: "lideranca=2,producao=1.5" (os demais valem 1)
+    app.config['CRITERIOS_PESOS'] = ler_pesos(os.environ.get('CRITERIOS_PESOS'))
+    # Saída de `flask build-assets`: arquivos com hash no nome, .gz/.br e manifesto
+    app.config['ESTATICOS_BUILD'] = os.environ.get(
+        'ESTATICOS_BUILD', os.path.join(os.path.dirname(__file__), 'static_build')
     )
+    # Tarefas em segundo plano: 'processo' (`flask executar-tarefas`) ou 'threads' (em cada worker web)
+    app.config['TAREFAS_EXECUTOR'] = os.environ.get('TAREFAS_EXECUTOR', 'processo')
+    app.config['TAREFAS_THREADS'] = int(os.environ.get('TAREFAS_THREADS', 2))
+    app.config['TAREFAS_DIR'] = os.environ.get('TAREFAS_DIR')
+    # JSON de usuários importado por POST /api/populate_users (sem ele a rota responde 400)
+    app.config['USUARIOS_SEED_PATH'] = os.environ.get('USUARIOS_SEED_PATH')
+    # Segundos que um painel de gestor desatualizado é servido antes de ser recalculado na requisição
+    app.config['PAINEL_ATRASO_MAXIMO'] = int(os.environ.get('PAINEL_ATRASO_MAXIMO', 300))
+    app.config.update(config or {})
+
+    # Configurar CORS (só na API; páginas e arquivos estáticos não precisam)
+    @app.after_request
+    def after_request(response):
+        if not request.path.startswith(('/api/', '/admin/')):
+            return response
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        response.headers.add('Access-Control-Expose-Headers', 'X-Total-Count,X-Next-Cursor,Link,ETag')
+        return response
+
+    # A ordem importa: as rotas de principal_bp incluem o catch-all de estáticos
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(avaliacao_bp, url_prefix='/api')
+    app.register_blueprint(colaborador_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(principal_bp)
+
+    # Configurar banco de dados (URL, pool e pragmas do SQLite vêm do ambiente; ver src/config.py)
+    configurar_banco(app)
+    # Respostas de ranking/estatísticas; RESPOSTA_CACHE_URL=redis://... compartilha entre máquinas
+    configurar_cache(app)
+    # O cookie leva só o id da sessão; tipo e ativo do usuário ficam no servidor
+    configurar_sessoes(app)
+    # Consultas, tempo de SQL e latência por endpoint: Server-Timing e /metrics
+    configurar_metricas(app)
+    # Manifesto dos estáticos em memória; sem build, serve src/static direto
+    configurar_estaticos(app)
+    # Importações, exportações e rankings da empresa inteira fora da requisição
+    configurar_tarefas(app)
+
+    for comando in COMANDOS:
+        app.cli.add_command(comando)
+
+    return app
 
-    resultado = []
-    for r in ranking:
-        avaliador = Usuario.query.get(r.avaliador_id)
-        resultado.append({
-            "avaliado_id": r.avaliado_id,
-            "funcionario": r.funcionario,
-            "cargo": r.cargo,
-            "avaliador": avaliador.nome if avaliador else "-",
-            "media_geral": round(r.media_geral, 2) if r.media_geral else None,
-            "autoavaliacao": round(r.autoavaliacao, 2) if r.autoavaliacao else None
-        })
-
-    return jsonify(resultado)
-@app.route('/admin/ranking')
-def ranking_geral_html():
-    user_id = session.get('user_id')
-    usuario = Usuario.query.get(user_id) if user_id else None
-
-    if not usuario or usuario.tipo != 'admin':
-        return "Acesso negado", 403
-
-    return send_from_directory(app.static_folder, 'ranking_geral.html')
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        # Se não encontrar o arquivo, verificar autenticação
-        if 'user_id' not in session:
-            return send_from_directory(app.static_folder, 'login.html')
-        
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=True)
-
+    create_app().run(host='0.0.0.0', port=8000, debug=True)
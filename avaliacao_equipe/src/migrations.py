@@ -0,0 +1,201 @@
+"""Migrações de esquema para bancos já existentes (ex.: database/app.db).
+
+db.create_all() só cria tabelas novas; colunas e índices acrescentados a
+tabelas existentes são aplicados aqui. Cada migração é idempotente e pode
+ser executada quantas vezes for preciso:
+
+    flask --app src.main upgrade-db
+"""
+from datetime import datetime
+
+from sqlalchemy import func, inspect
+
+from src.models.avaliacao import Avaliacao, db
+from src.models.usuario import Usuario
+from src.services.busca import criar_indices_busca
+from src.services.hierarquia import reconstruir_hierarquia, resolver_gestores
+
+# Importar todos os modelos para garantir que as tabelas sejam criadas
+from src.models.avaliacao import AvaliacaoArquivo
+from src.models.ciclo import Ciclo
+from src.models.colaborador import Colaborador
+from src.models.hierarquia import UsuarioHierarquia
+from src.models.painel import PainelGestor
+from src.models.resumo import ResumoAvaliacao
+from src.models.tarefa import Tarefa
+
+MIGRACOES = []
+
+
+def migracao(funcao):
+    """Registra uma migração; são aplicadas na ordem de declaração.
+
+    A função recebe a conexão e retorna se alterou algo no banco (False quando
+    já estava aplicada), para que upgrade-db liste só o que mudou.
+    """
+    MIGRACOES.append(funcao)
+    return funcao
+
+
+def _colunas(conexao, tabela):
+    return {coluna['name'] for coluna in inspect(conexao).get_columns(tabela)}
+
+
+@migracao
+def verificar_avaliacoes_duplicadas(conexao):
+    """O índice único de avaliacao falha se já houver duplicatas gravadas"""
+    if not inspect(conexao).has_table(Avaliacao.__tablename__):
+        return False
+
+    chave = [Avaliacao.avaliador_id, Avaliacao.avaliado_id, Avaliacao.tipo_avaliacao]
+    if 'ciclo_id' in _colunas(conexao, Avaliacao.__tablename__):
+        # Antes de adicionar_ciclo todas as avaliações ficam no mesmo ciclo
+        chave.append(Avaliacao.ciclo_id)
+    duplicadas = conexao.execute(
+        db.select(*chave[:3], func.count(Avaliacao.id))
+        .group_by(*chave)
+        .having(func.count(Avaliacao.id) > 1)
+    ).all()
+
+    if duplicadas:
+        detalhes = ', '.join(
+            f'avaliador {avaliador} -> avaliado {avaliado} ({tipo}: {total}x)'
+            for avaliador, avaliado, tipo, total in duplicadas
+        )
+        raise RuntimeError(
+            f'Avaliações duplicadas impedem a criação do índice único; '
+            f'remova as excedentes antes de migrar: {detalhes}'
+        )
+    return False
+
+
+@migracao
+def adicionar_gestor_id(conexao):
+    """usuario.gestor_id: referência ao gestor imediato por id, não por nome"""
+    if 'gestor_id' in _colunas(conexao, Usuario.__tablename__):
+        return False
+    conexao.exec_driver_sql('ALTER TABLE usuario ADD COLUMN gestor_id INTEGER REFERENCES usuario (id)')
+    return True
+
+
+@migracao
+def adicionar_ciclo(conexao):
+    """avaliacao.ciclo_id: avaliações sem ciclo vão para o mais recente. Sem
+    nenhum ciclo (banco novo ou anterior aos ciclos), cria um 'Ciclo inicial' aberto"""
+    alterou = 'ciclo_id' not in _colunas(conexao, Avaliacao.__tablename__)
+    if alterou:
+        conexao.exec_driver_sql('ALTER TABLE avaliacao ADD COLUMN ciclo_id INTEGER REFERENCES ciclo (id)')
+
+    ciclo_id = conexao.scalar(db.select(func.max(Ciclo.id)))
+    if ciclo_id is None:
+        ciclo_id = conexao.execute(
+            db.insert(Ciclo).values(nome='Ciclo inicial', status='aberto', inicio=datetime.utcnow())
+        ).inserted_primary_key[0]
+        alterou = True
+    sem_ciclo = conexao.execute(db.update(Avaliacao).where(Avaliacao.ciclo_id.is_(None)).values(ciclo_id=ciclo_id))
+    return alterou or sem_ciclo.rowcount > 0
+
+
+@migracao
+def preencher_data_avaliacao(conexao):
+    """data_avaliacao é chave da paginação por cursor e não pode ser NULL:
+    avaliações sem data recebem o início do seu ciclo. No PostgreSQL a coluna
+    passa a NOT NULL; o SQLite não altera a restrição de uma coluna existente
+    (bancos novos já a criam assim)"""
+    alterou = False
+    for modelo in (Avaliacao, AvaliacaoArquivo):
+        inicio_do_ciclo = db.select(Ciclo.inicio).where(Ciclo.id == modelo.ciclo_id).scalar_subquery()
+        preenchidas = conexao.execute(
+            db.update(modelo).where(modelo.data_avaliacao.is_(None))
+            .values(data_avaliacao=func.coalesce(inicio_do_ciclo, datetime(1970, 1, 1)))
+        )
+        alterou = alterou or preenchidas.rowcount > 0
+        if conexao.dialect.name != 'postgresql':
+            continue
+        coluna = next(c for c in inspect(conexao).get_columns(modelo.__tablename__) if c['name'] == 'data_avaliacao')
+        if coluna['nullable']:
+            conexao.exec_driver_sql(f'ALTER TABLE {modelo.__tablename__} ALTER COLUMN data_avaliacao SET NOT NULL')
+            alterou = True
+    return alterou
+
+
+@migracao
+def avaliacao_sem_reuso_de_ids(conexao):
+    """Recria avaliacao com AUTOINCREMENT (apenas SQLite). Sem ele o SQLite
+    reaproveita os ids das avaliações movidas para avaliacao_arquivo, que
+    ficariam repetidos entre as duas tabelas"""
+    if conexao.dialect.name != 'sqlite':
+        return False
+    sql = conexao.scalar(db.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'avaliacao'"))
+    if 'AUTOINCREMENT' in sql.upper():
+        return False
+
+    colunas = ', '.join(sorted(_colunas(conexao, 'avaliacao') & set(Avaliacao.__table__.columns.keys())))
+    for indice in inspect(conexao).get_indexes('avaliacao'):
+        conexao.exec_driver_sql(f'DROP INDEX {indice["name"]}')
+    conexao.exec_driver_sql('ALTER TABLE avaliacao RENAME TO avaliacao_antiga')
+    Avaliacao.__table__.create(conexao)
+    conexao.exec_driver_sql(f'INSERT INTO avaliacao ({colunas}) SELECT {colunas} FROM avaliacao_antiga')
+    conexao.exec_driver_sql('DROP TABLE avaliacao_antiga')
+
+    # Os próximos ids começam depois do maior já usado, arquivados incluídos
+    maior = max(conexao.scalar(db.select(func.max(modelo.id))) or 0 for modelo in (Avaliacao, AvaliacaoArquivo))
+    conexao.execute(db.text("DELETE FROM sqlite_sequence WHERE name = 'avaliacao'"))
+    conexao.execute(db.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('avaliacao', :maior)"), {'maior': maior})
+    return True
+
+
+@migracao
+def criar_indices(conexao):
+    """Cria os índices declarados nos modelos que ainda não existem.
+
+    Os modelos declaram o conjunto final de índices. Os bancos em produção
+    ainda não têm nenhum índice além das chaves, então nada precisa ser removido.
+    """
+    inspetor = inspect(conexao)
+    criados = 0
+    for tabela in db.metadata.sorted_tables:
+        existentes = {indice['name'] for indice in inspetor.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                indice.create(conexao)
+                criados += 1
+    return criados > 0
+
+
+@migracao
+def criar_busca_textual(conexao):
+    """Índices FTS5 de usuario e colaborador, mantidos por gatilhos (apenas SQLite)"""
+    return bool(criar_indices_busca(conexao))
+
+
+@migracao
+def preencher_gestores(conexao):
+    """Preenche gestor_id a partir de gestor_imediato só onde ele ainda é nulo
+    (bancos anteriores a gestor_id) e recalcula usuario_hierarquia se algo
+    mudou ou se ela ainda está vazia. gestor_id já gravado não é tocado:
+    a ressincronização completa é o comando sync-hierarquia"""
+    preenchidos = resolver_gestores(conexao, so_sem_gestor=True)['alterados']
+    hierarquia_vazia = conexao.scalar(db.select(UsuarioHierarquia.ancestral_id).limit(1)) is None
+    com_gestor = conexao.scalar(db.select(Usuario.id).where(Usuario.gestor_id.isnot(None)).limit(1))
+    if not preenchidos and not (hierarquia_vazia and com_gestor):
+        return False
+    reconstruir_hierarquia(conexao)
+    return True
+
+
+def aplicar_migracoes():
+    """Cria tabelas novas e aplica todas as migrações em uma transação.
+
+    Retorna o que mudou: as tabelas criadas e as migrações que alteraram o
+    banco; vazio se já estava atualizado.
+    """
+    antes = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    novas = sorted(set(inspect(db.engine).get_table_names()) - antes)
+    aplicadas = [f"tabela {nome}" for nome in novas]
+    with db.engine.begin() as conexao:
+        for etapa in MIGRACOES:
+            if etapa(conexao):
+                aplicadas.append(etapa.__name__)
+    return aplicadas
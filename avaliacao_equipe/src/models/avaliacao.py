@@ -1,14 +1,41 @@
+from collections import namedtuple
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
 db = SQLAlchemy()
 
-class Avaliacao(db.Model):
-    __tablename__ = 'avaliacao'
-    __table_args__ = {'extend_existing': True}
-    
+Criterio = namedtuple('Criterio', 'nome rotulo peso')
+
+# Registro dos critérios numéricos avaliados em cada avaliação: coluna, rótulo
+# e peso padrão na media_geral (CRITERIOS_PESOS no ambiente altera os pesos).
+# Validação, serialização e cálculo das médias partem daqui; um critério novo
+# precisa também da coluna abaixo e da média correspondente em ResumoAvaliacao
+REGISTRO_CRITERIOS = (
+    Criterio('producao', 'Produção', 1.0),
+    Criterio('edicao', 'Edição', 1.0),
+    Criterio('coordenacao', 'Coordenação', 1.0),
+    Criterio('co_coordenacao', 'Co-coordenação', 1.0),
+    Criterio('pro_atividade', 'Pró-atividade', 1.0),
+    Criterio('criatividade', 'Criatividade', 1.0),
+    Criterio('resolucao_problemas', 'Resolução de Problemas', 1.0),
+    Criterio('flexibilidade_adaptabilidade', 'Flexibilidade', 1.0),
+    Criterio('relacionamento_equipe', 'Relacionamento Equipe', 1.0),
+    Criterio('relacionamento_outras_areas', 'Relacionamento Outras Áreas', 1.0),
+    Criterio('inteligencia_emocional', 'Inteligência Emocional', 1.0),
+    Criterio('lideranca', 'Liderança', 1.0),
+    Criterio('visao_institucional', 'Visão Institucional', 1.0),
+)
+CRITERIOS = tuple(criterio.nome for criterio in REGISTRO_CRITERIOS)
+NOTA_MINIMA, NOTA_MAXIMA = 0, 10
+
+class CamposAvaliacao:
+    """Colunas e métodos comuns a avaliacao e avaliacao_arquivo"""
+
     id = db.Column(db.Integer, primary_key=True)
-    
+
+    # Ciclo de avaliação (ver Ciclo)
+    ciclo_id = db.Column(db.Integer, db.ForeignKey('ciclo.id'), nullable=False)
+
     # Relacionamentos com usuários
     avaliador_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
     avaliado_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
@@ -16,8 +43,8 @@ class Avaliacao(db.Model):
     # Tipo de avaliação
     tipo_avaliacao = db.Column(db.String(20), nullable=False)  # 'avaliacao' ou 'autoavaliacao'
     
-    # Data da avaliação
-    data_avaliacao = db.Column(db.DateTime, default=datetime.utcnow)
+    # Data da avaliação; NOT NULL porque é chave da paginação (data_avaliacao, id)
+    data_avaliacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Critérios de avaliação (0-10)
     producao = db.Column(db.Integer, nullable=False)
@@ -42,29 +69,44 @@ class Avaliacao(db.Model):
     media_geral = db.Column(db.Float, nullable=True)
 
     def __repr__(self):
-        return f'<Avaliacao {self.id}>'
+        return f'<{type(self).__name__} {self.id}>'
+
+    def notas(self):
+        """Nota de cada critério, na ordem do registro"""
+        return {criterio: getattr(self, criterio) for criterio in CRITERIOS}
 
     def calcular_media(self):
-        """Calcula a média geral dos critérios"""
-        criterios = [
-            self.producao, self.edicao, self.coordenacao, self.co_coordenacao, self.pro_atividade,
-            self.criatividade, self.resolucao_problemas, self.flexibilidade_adaptabilidade,
-            self.relacionamento_equipe, self.relacionamento_outras_areas,
-            self.inteligencia_emocional, self.lideranca, self.visao_institucional
-        ]
-        self.media_geral = round(sum(criterios) / len(criterios), 1)
+        """Calcula a média geral dos critérios, ponderada pelos pesos configurados"""
+        # Importar aqui para evitar importação circular
+        from src.services.pontuacao import media_ponderada
+
+        self.media_geral = media_ponderada(self.notas())
         return self.media_geral
 
-    def to_dict(self):
+    def notas_detalhadas(self):
+        """Notas por critério e campos de texto, usadas no comparativo"""
+        return dict(
+            self.notas(),
+            pontos_fortes=self.pontos_fortes,
+            pontos_desenvolver=self.pontos_desenvolver
+        )
+
+    def to_dict(self, usuarios=None):
+        """Serializa a avaliação.
+
+        `usuarios` é um mapa id -> Usuario já carregado; quando omitido, avaliador
+        e avaliado são buscados em uma única consulta.
+        """
         try:
-            # Importar aqui para evitar importação circular
-            from src.models.usuario import Usuario
-            
-            avaliador = Usuario.query.get(self.avaliador_id)
-            avaliado = Usuario.query.get(self.avaliado_id)
+            if usuarios is None:
+                usuarios = carregar_usuarios([self])
+
+            avaliador = usuarios.get(self.avaliador_id)
+            avaliado = usuarios.get(self.avaliado_id)
             
             return {
                 'id': self.id,
+                'ciclo_id': self.ciclo_id,
                 'avaliador_id': self.avaliador_id,
                 'avaliado_id': self.avaliado_id,
                 'avaliador_nome': avaliador.nome if avaliador else 'Usuário não encontrado',
@@ -73,19 +115,7 @@ class Avaliacao(db.Model):
                 'avaliado_departamento': avaliado.regiao if avaliado else None,
                 'tipo_avaliacao': self.tipo_avaliacao,
                 'data_avaliacao': self.data_avaliacao.isoformat() if self.data_avaliacao else None,
-                'producao': self.producao,
-                'edicao': self.edicao,
-                'coordenacao': self.coordenacao,
-                'co_coordenacao': self.co_coordenacao,
-                'pro_atividade': self.pro_atividade,
-                'criatividade': self.criatividade,
-                'resolucao_problemas': self.resolucao_problemas,
-                'flexibilidade_adaptabilidade': self.flexibilidade_adaptabilidade,
-                'relacionamento_equipe': self.relacionamento_equipe,
-                'relacionamento_outras_areas': self.relacionamento_outras_areas,
-                'inteligencia_emocional': self.inteligencia_emocional,
-                'lideranca': self.lideranca,
-                'visao_institucional': self.visao_institucional,
+                **self.notas(),
                 'pontos_fortes': self.pontos_fortes or '',
                 'pontos_desenvolver': self.pontos_desenvolver or '',
                 'media_geral': self.media_geral
@@ -94,6 +124,7 @@ class Avaliacao(db.Model):
             # Em caso de erro, retornar dados básicos
             return {
                 'id': self.id,
+                'ciclo_id': self.ciclo_id,
                 'avaliador_id': self.avaliador_id,
                 'avaliado_id': self.avaliado_id,
                 'avaliador_nome': 'Erro ao carregar',
@@ -102,22 +133,67 @@ class Avaliacao(db.Model):
                 'avaliado_departamento': None,
                 'tipo_avaliacao': self.tipo_avaliacao,
                 'data_avaliacao': self.data_avaliacao.strftime('%d/%m/%Y') if self.data_avaliacao else None,
-                'producao': self.producao,
-                'edicao': self.edicao,
-                'coordenacao': self.coordenacao,
-                'co_coordenacao': self.co_coordenacao,
-                'pro_atividade': self.pro_atividade,
-                'criatividade': self.criatividade,
-                'resolucao_problemas': self.resolucao_problemas,
-                'flexibilidade_adaptabilidade': self.flexibilidade_adaptabilidade,
-                'relacionamento_equipe': self.relacionamento_equipe,
-                'relacionamento_outras_areas': self.relacionamento_outras_areas,
-                'inteligencia_emocional': self.inteligencia_emocional,
-                'lideranca': self.lideranca,
-                'visao_institucional': self.visao_institucional,
+                **self.notas(),
                 'pontos_fortes': self.pontos_fortes or '',
                 'pontos_desenvolver': self.pontos_desenvolver or '',
                 'media_geral': self.media_geral,
                 'error': str(e)
             }
 
+
+class Avaliacao(CamposAvaliacao, db.Model):
+    """Avaliações dos ciclos ainda não arquivados.
+
+    ciclo_id abre todos os índices compostos: as consultas do dia a dia,
+    restritas ao ciclo aberto, leem só a faixa do índice desse ciclo.
+    """
+    __tablename__ = 'avaliacao'
+    __table_args__ = (
+        # Uma avaliação de cada tipo por par avaliador/avaliado em cada ciclo;
+        # também atende às buscas por avaliador (listagem, estatísticas)
+        db.Index('ix_avaliacao_ciclo_avaliador_avaliado_tipo',
+                 'ciclo_id', 'avaliador_id', 'avaliado_id', 'tipo_avaliacao', unique=True),
+        # Buscas e agregações por avaliado (ranking, resumo)
+        db.Index('ix_avaliacao_ciclo_avaliado_tipo', 'ciclo_id', 'avaliado_id', 'tipo_avaliacao'),
+        # Listagem paginada por avaliador, mais recentes primeiro (GET /api/avaliacoes)
+        db.Index('ix_avaliacao_ciclo_avaliador_data', 'ciclo_id', 'avaliador_id', 'data_avaliacao', 'id'),
+        # ids nunca reaproveitados: os arquivados continuam únicos entre as duas tabelas
+        {'extend_existing': True, 'sqlite_autoincrement': True}
+    )
+
+
+class AvaliacaoArquivo(CamposAvaliacao, db.Model):
+    """Avaliações dos ciclos arquivados, com os mesmos ids que tinham em avaliacao"""
+    __tablename__ = 'avaliacao_arquivo'
+    __table_args__ = (
+        # Tendências por avaliado e agregações por ciclo
+        db.Index('ix_avaliacao_arquivo_ciclo_avaliado_tipo', 'ciclo_id', 'avaliado_id', 'tipo_avaliacao'),
+        # Histórico de um avaliador (GET /api/avaliacoes?ciclo=)
+        db.Index('ix_avaliacao_arquivo_ciclo_avaliador_data', 'ciclo_id', 'avaliador_id', 'data_avaliacao', 'id'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+
+
+def carregar_usuarios(avaliacoes):
+    """Carrega, em uma única consulta, os avaliadores e avaliados das avaliações"""
+    # Importar aqui para evitar importação circular
+    from src.models.usuario import Usuario
+
+    ids = set()
+    for avaliacao in avaliacoes:
+        ids.add(avaliacao.avaliador_id)
+        ids.add(avaliacao.avaliado_id)
+    if not ids:
+        return {}
+
+    usuarios = Usuario.query.filter(Usuario.id.in_(ids)).all()
+    return {usuario.id: usuario for usuario in usuarios}
+
+
+def serializar_avaliacoes(avaliacoes):
+    """Serializa uma lista de avaliações com número fixo de consultas"""
+    usuarios = carregar_usuarios(avaliacoes)
+    return [avaliacao.to_dict(usuarios) for avaliacao in avaliacoes]
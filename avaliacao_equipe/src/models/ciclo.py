@@ -0,0 +1,41 @@
+from src.models.avaliacao import db
+from datetime import datetime
+
+class Ciclo(db.Model):
+    """Período de avaliação. Só um ciclo fica aberto por vez: as avaliações
+    novas entram nele e as consultas do dia a dia olham só para ele.
+
+    Um ciclo encerrado pode ser arquivado: as suas avaliações saem de
+    avaliacao e passam para avaliacao_arquivo (relatórios de tendência).
+    """
+    __tablename__ = 'ciclo'
+    __table_args__ = (
+        # Índice parcial: no máximo um ciclo com status 'aberto'
+        db.Index('ix_ciclo_aberto', 'status', unique=True,
+                 sqlite_where=db.text("status = 'aberto'"), postgresql_where=db.text("status = 'aberto'")),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), unique=True, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='aberto')  # 'aberto' ou 'encerrado'
+    inicio = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    fim = db.Column(db.DateTime, nullable=True)
+    arquivado_em = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Ciclo {self.nome}>'
+
+    @property
+    def arquivado(self):
+        return self.arquivado_em is not None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'status': self.status,
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'arquivado_em': self.arquivado_em.isoformat() if self.arquivado_em else None
+        }
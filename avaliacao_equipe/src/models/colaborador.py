@@ -3,7 +3,11 @@ from datetime import datetime
 
 class Colaborador(db.Model):
     __tablename__ = 'colaborador'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Listagem paginada por nome (GET /api/colaboradores)
+        db.Index('ix_colaborador_nome_completo', 'nome_completo', 'id'),
+        {'extend_existing': True}
+    )
     id = db.Column(db.Integer, primary_key=True)
     nome_completo = db.Column(db.String(100), nullable=False)
     cargo = db.Column(db.String(100), nullable=True)
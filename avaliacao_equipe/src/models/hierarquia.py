@@ -0,0 +1,22 @@
+from src.models.avaliacao import db
+
+class UsuarioHierarquia(db.Model):
+    """Tabela de fechamento (closure table) da hierarquia gestor -> subordinado.
+
+    Uma linha para cada par (ancestral, descendente), com a distância entre
+    eles: profundidade 1 são os subordinados diretos, 2 os subordinados dos
+    subordinados e assim por diante.
+    """
+    __tablename__ = 'usuario_hierarquia'
+    __table_args__ = (
+        # Cadeia de gestores de um usuário
+        db.Index('ix_usuario_hierarquia_descendente', 'descendente_id', 'profundidade'),
+        {'extend_existing': True}
+    )
+
+    ancestral_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    descendente_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    profundidade = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<UsuarioHierarquia {self.ancestral_id}->{self.descendente_id}>'
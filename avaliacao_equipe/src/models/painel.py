@@ -0,0 +1,27 @@
+from src.models.avaliacao import db
+
+class PainelGestor(db.Model):
+    """Estatísticas do painel de um gestor em um ciclo, já serializadas.
+
+    Reconstruídas em segundo plano (src/services/paineis.py) quando muda uma
+    avaliação que entra no painel; o GET de estatísticas lê só esta linha.
+    `versao` sobe a cada mudança e desatualizado_em marca desde quando o
+    painel gravado não reflete mais as avaliações (NULL: atualizado).
+    """
+    __tablename__ = 'painel_gestor'
+    __table_args__ = (
+        # Painéis a reconstruir no ciclo
+        db.Index('ix_painel_gestor_ciclo_desatualizado', 'ciclo_id', 'desatualizado_em'),
+        {'extend_existing': True}
+    )
+
+    gestor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    ciclo_id = db.Column(db.Integer, db.ForeignKey('ciclo.id'), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    # JSON de calcular_estatisticas, servido sem nova serialização
+    dados = db.Column(db.Text, nullable=True)
+    atualizado_em = db.Column(db.DateTime, nullable=True)
+    desatualizado_em = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<PainelGestor {self.gestor_id}/{self.ciclo_id}>'
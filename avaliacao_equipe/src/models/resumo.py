@@ -0,0 +1,61 @@
+from src.models.avaliacao import db, CRITERIOS
+from datetime import datetime
+
+class ResumoAvaliacao(db.Model):
+    """Notas consolidadas por ciclo e usuário avaliado, mantidas a cada escrita
+    em avaliacao. Só o ciclo aberto recebe escritas; os encerrados guardam o
+    resumo do fechamento."""
+    __tablename__ = 'resumo_avaliacao'
+    __table_args__ = {'extend_existing': True}
+
+    ciclo_id = db.Column(db.Integer, db.ForeignKey('ciclo.id'), primary_key=True)
+    avaliado_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+
+    # Todas as avaliações recebidas no ciclo
+    total_avaliacoes = db.Column(db.Integer, nullable=False, default=0)
+    media_geral = db.Column(db.Float, nullable=True)
+
+    # Avaliações feitas pelo gestor ('subordinado')
+    total_gestor = db.Column(db.Integer, nullable=False, default=0)
+    media_gestor = db.Column(db.Float, nullable=True)
+
+    # Autoavaliações
+    total_auto = db.Column(db.Integer, nullable=False, default=0)
+    media_auto = db.Column(db.Float, nullable=True)
+
+    # Média de cada critério em todas as avaliações recebidas no ciclo
+    media_producao = db.Column(db.Float, nullable=True)
+    media_edicao = db.Column(db.Float, nullable=True)
+    media_coordenacao = db.Column(db.Float, nullable=True)
+    media_co_coordenacao = db.Column(db.Float, nullable=True)
+    media_pro_atividade = db.Column(db.Float, nullable=True)
+    media_criatividade = db.Column(db.Float, nullable=True)
+    media_resolucao_problemas = db.Column(db.Float, nullable=True)
+    media_flexibilidade_adaptabilidade = db.Column(db.Float, nullable=True)
+    media_relacionamento_equipe = db.Column(db.Float, nullable=True)
+    media_relacionamento_outras_areas = db.Column(db.Float, nullable=True)
+    media_inteligencia_emocional = db.Column(db.Float, nullable=True)
+    media_lideranca = db.Column(db.Float, nullable=True)
+    media_visao_institucional = db.Column(db.Float, nullable=True)
+
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumoAvaliacao {self.ciclo_id}/{self.avaliado_id}>'
+
+    def medias_criterios(self):
+        return {criterio: getattr(self, f'media_{criterio}') for criterio in CRITERIOS}
+
+    def to_dict(self):
+        return {
+            'ciclo_id': self.ciclo_id,
+            'avaliado_id': self.avaliado_id,
+            'total_avaliacoes': self.total_avaliacoes,
+            'media_geral': self.media_geral,
+            'total_gestor': self.total_gestor,
+            'media_gestor': self.media_gestor,
+            'total_auto': self.total_auto,
+            'media_auto': self.media_auto,
+            'medias_criterios': self.medias_criterios(),
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
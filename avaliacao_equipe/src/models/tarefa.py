@@ -0,0 +1,61 @@
+from src.models.avaliacao import db
+from datetime import datetime
+
+class Tarefa(db.Model):
+    """Operação demorada (importação, exportação, ranking, recálculo) executada
+    fora da requisição por um executor de src/services/tarefas.py.
+
+    A própria tabela é a fila: 'pendente' -> 'executando' -> 'concluida' ou
+    'falhou' ('cancelada' se removida da fila antes de começar).
+    """
+    __tablename__ = 'tarefa'
+    __table_args__ = (
+        # Próxima tarefa pendente e tarefas em execução sem sinal de vida
+        db.Index('ix_tarefa_status_id', 'status', 'id'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')
+    parametros = db.Column(db.JSON, nullable=True)
+    # Último progresso relatado pela tarefa, ex.: {'lidos': 5000, 'criados': 4800}
+    progresso = db.Column(db.JSON, nullable=True)
+    resultado = db.Column(db.JSON, nullable=True)
+    erro = db.Column(db.Text, nullable=True)
+    # Nome do arquivo de resultado, no diretório da tarefa em TAREFAS_DIR
+    arquivo = db.Column(db.String(255), nullable=True)
+    criado_por = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)
+    # Processo que executa a tarefa (host:pid) e quantas vezes ela foi iniciada
+    executor = db.Column(db.String(100), nullable=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    criada_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    iniciada_em = db.Column(db.DateTime, nullable=True)
+    # Renovado pelo executor enquanto a tarefa roda
+    atualizada_em = db.Column(db.DateTime, nullable=True)
+    concluida_em = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Tarefa {self.id} {self.tipo}>'
+
+    @property
+    def finalizada(self):
+        return self.status in ('concluida', 'falhou', 'cancelada')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'parametros': self.parametros or {},
+            'progresso': self.progresso,
+            'resultado': self.resultado,
+            'erro': self.erro,
+            'arquivo': self.arquivo,
+            'criado_por': self.criado_por,
+            'tentativas': self.tentativas,
+            'criada_em': self.criada_em.isoformat() if self.criada_em else None,
+            'iniciada_em': self.iniciada_em.isoformat() if self.iniciada_em else None,
+            'atualizada_em': self.atualizada_em.isoformat() if self.atualizada_em else None,
+            'concluida_em': self.concluida_em.isoformat() if self.concluida_em else None
+        }
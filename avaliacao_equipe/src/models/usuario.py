@@ -1,10 +1,19 @@
 from src.models.avaliacao import db
+from src.models.hierarquia import UsuarioHierarquia
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class Usuario(db.Model):
     __tablename__ = 'usuario'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Subordinados ativos de um gestor, já em ordem de nome (get_subordinados,
+        # /api/subordinados); sem o nome o SQLite preferia ix_usuario_ativo_nome
+        # para evitar a ordenação e percorria todos os usuários ativos
+        db.Index('ix_usuario_gestor_ativo_nome', 'gestor_id', 'ativo', 'nome'),
+        # Listagem paginada de ativos por nome (GET /api/usuarios)
+        db.Index('ix_usuario_ativo_nome', 'ativo', 'nome', 'id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     matricula = db.Column(db.Integer, unique=True, nullable=False)
@@ -13,7 +22,8 @@ class Usuario(db.Model):
     senha_hash = db.Column(db.String(255), nullable=True)  # Opcional para primeira implementação
     cargo = db.Column(db.String(100), nullable=True)
     regiao = db.Column(db.String(50), nullable=True)
-    gestor_imediato = db.Column(db.String(100), nullable=True)
+    gestor_imediato = db.Column(db.String(100), nullable=True)  # Nome, como vem da planilha
+    gestor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)  # Resolvido a partir do nome
     nivel_hierarquico = db.Column(db.String(50), nullable=True)
     vinculo = db.Column(db.String(50), nullable=True)
     data_admissao = db.Column(db.Date, nullable=True)
@@ -36,24 +46,57 @@ class Usuario(db.Model):
 
     def get_subordinados(self):
         """Retorna lista de subordinados diretos"""
-        return Usuario.query.filter_by(gestor_imediato=self.nome, ativo=True).all()
+        return Usuario.query.filter_by(gestor_id=self.id, ativo=True).all()
+
+    def get_equipe(self):
+        """Retorna todos os subordinados ativos, diretos e indiretos (uma consulta)"""
+        return Usuario.query.join(
+            UsuarioHierarquia, UsuarioHierarquia.descendente_id == Usuario.id
+        ).filter(
+            UsuarioHierarquia.ancestral_id == self.id,
+            Usuario.ativo == True
+        ).order_by(UsuarioHierarquia.profundidade, Usuario.nome).all()
 
     def pode_avaliar(self, usuario_avaliado):
-        """Verifica se este usuário pode avaliar outro usuário"""
+        """Verifica se este usuário pode avaliar outro usuário (já carregado)"""
         # Sempre pode se autoavaliar
         if self.id == usuario_avaliado.id:
             return True
             
-        # Se for gestor, pode avaliar subordinados diretos
+        # Se for gestor, pode avaliar subordinados diretos ativos; o objeto já
+        # traz gestor_id, então não é preciso consultar o banco
         if self.tipo == 'gestor':
-            # Verificar se o usuário avaliado é subordinado direto
-            subordinados = self.get_subordinados()
-            subordinados_ids = [sub.id for sub in subordinados]
-            return usuario_avaliado.id in subordinados_ids
+            return usuario_avaliado.gestor_id == self.id and bool(usuario_avaliado.ativo)
             
         # Funcionários só podem se autoavaliar
         return False
 
+    def pode_avaliar_id(self, usuario_id):
+        """Mesma regra de pode_avaliar a partir do id, com um único EXISTS"""
+        if self.id == usuario_id:
+            return True
+        if self.tipo != 'gestor':
+            return False
+        return db.session.query(
+            Usuario.query.filter_by(id=usuario_id, gestor_id=self.id, ativo=True).exists()
+        ).scalar()
+
+    def filtrar_avaliaveis(self, usuarios_ids):
+        """Retorna o subconjunto de ids que este usuário pode avaliar (uma consulta)"""
+        candidatos = set(usuarios_ids)
+        permitidos = candidatos & {self.id}
+
+        restantes = candidatos - permitidos
+        if self.tipo == 'gestor' and restantes:
+            subordinados = db.session.query(Usuario.id).filter(
+                Usuario.id.in_(restantes),
+                Usuario.gestor_id == self.id,
+                Usuario.ativo == True
+            )
+            permitidos.update(usuario_id for (usuario_id,) in subordinados)
+
+        return permitidos
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -63,6 +106,7 @@ class Usuario(db.Model):
             'cargo': self.cargo,
             'regiao': self.regiao,
             'gestor_imediato': self.gestor_imediato,
+            'gestor_id': self.gestor_id,
             'nivel_hierarquico': self.nivel_hierarquico,
             'vinculo': self.vinculo,
             'data_admissao': self.data_admissao.isoformat() if self.data_admissao else None,
@@ -1,6 +1,17 @@
-from flask import Blueprint, jsonify, session
-from src.models.usuario import Usuario
-from src.models.avaliacao import Avaliacao, db
+from flask import Blueprint, Response, jsonify, request, send_file, session, stream_with_context, url_for
+from sqlalchemy.exc import IntegrityError
+from src.models.avaliacao import db
+from src.models.ciclo import Ciclo
+from src.models.tarefa import Tarefa
+from src.services.identidade import papel_na_sessao
+from src.services.exportacao import FORMATOS
+from src.services.importacao import LEITORES, formato_do_arquivo
+from src.services.ranking import ranking_por_funcionario
+from src.services.cache import AVALIACOES, CICLOS, cache_respostas
+from src.services.analise import AGRUPAMENTOS, TIPOS, analisar_criterios
+from src.services.ciclos import (abrir_ciclo, arquivar_ciclo, ciclo_aberto_id, encerrar_ciclo, listar_ciclos,
+                                 modelo_do_ciclo, tendencias)
+from src.services.tarefas import caminho_resultado, cancelar, enfileirar, guardar_entrada
 
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/admin')
 
@@ -9,36 +20,200 @@ def admin_required(func):
         user_id = session.get('user_id')
         if not user_id:
             return {"error": "Não autenticado"}, 401
-        usuario = Usuario.query.get(user_id)
-        if not usuario or usuario.tipo != 'admin' or not usuario.ativo:
+        # Tipo e ativo vêm da sessão: a verificação não consulta o banco
+        tipo, ativo = papel_na_sessao()
+        if tipo != 'admin' or not ativo:
             return {"error": "Acesso negado"}, 403
         return func(*args, **kwargs)
     wrapper.__name__ = func.__name__
     return wrapper
 
+def ciclo_da_requisicao():
+    """Ciclo do parâmetro `ciclo` (padrão: o aberto) e a tabela onde estão as suas avaliações"""
+    ciclo_id = request.args.get('ciclo', type=int) or ciclo_aberto_id()
+    return ciclo_id, modelo_do_ciclo(ciclo_id) if ciclo_id else None
+
 @admin_bp.route('/ranking_geral')
 @admin_required
 def ranking_geral():
-    usuarios = Usuario.query.filter_by(ativo=True).all()
-    resultado = []
-
-    for u in usuarios:
-        avaliacoes = Avaliacao.query.filter_by(avaliado_id=u.id).all()
-        media_geral = round(sum(a.media_geral for a in avaliacoes) / len(avaliacoes), 2) if avaliacoes else None
-
-        autoavaliacao = Avaliacao.query.filter_by(
-            avaliador_id=u.id, avaliado_id=u.id, tipo_avaliacao='autoavaliacao'
-        ).first()
-        auto_media = autoavaliacao.media_geral if autoavaliacao else None
-
-        resultado.append({
-            "id": u.id,
-            "nome": u.nome,
-            "cargo": u.cargo,
-            "media_geral": media_geral,
-            "autoavaliacao": auto_media
-        })
-
-    # Ordenar por média geral
-    resultado = sorted(resultado, key=lambda x: x['media_geral'] or 0, reverse=True)
-    return jsonify(resultado)
+    return cache_respostas().responder('ranking_por_funcionario', 'admin', ranking_por_funcionario)
+
+@admin_bp.route('/analytics/criterios')
+@admin_required
+def analytics_criterios():
+    """Média, desvio, percentis e histograma de cada critério por grupo"""
+    agrupamento = request.args.get('agrupar', 'regiao')
+    if agrupamento not in AGRUPAMENTOS:
+        return {"error": f"agrupar inválido; use {', '.join(AGRUPAMENTOS)}"}, 400
+    tipo = request.args.get('tipo', 'subordinado')
+    if tipo not in TIPOS + ('todas',):
+        return {"error": f"tipo inválido; use {', '.join(TIPOS)} ou todas"}, 400
+    tipo = None if tipo == 'todas' else tipo
+    gestor_id = request.args.get('gestor', type=int)
+    ciclo_id, modelo = ciclo_da_requisicao()
+    if modelo is None:
+        return {"error": "Ciclo não encontrado"}, 404
+
+    return cache_respostas().responder(
+        'analise_criterios', f'{ciclo_id}:{agrupamento}:{tipo}:{gestor_id}',
+        lambda: analisar_criterios(ciclo_id, agrupamento, tipo, gestor_id, modelo)
+    )
+
+@admin_bp.route('/ciclos')
+@admin_required
+def get_ciclos():
+    return jsonify(listar_ciclos())
+
+@admin_bp.route('/ciclos', methods=['POST'])
+@admin_required
+def create_ciclo():
+    """Abrir um ciclo de avaliação; o ciclo aberto até então é encerrado"""
+    data = request.get_json(silent=True) or {}
+    nome = (data.get('nome') or '').strip()
+    if not nome:
+        return {"error": "Campo nome é obrigatório"}, 400
+    try:
+        ciclo = abrir_ciclo(nome)
+    except ValueError as e:
+        return {"error": str(e)}, 409
+    except IntegrityError:
+        # Outra requisição abriu um ciclo ao mesmo tempo
+        db.session.rollback()
+        return {"error": "Outro ciclo foi aberto ao mesmo tempo"}, 409
+    return jsonify(ciclo.to_dict()), 201
+
+@admin_bp.route('/ciclos/<int:ciclo_id>/encerrar', methods=['POST'])
+@admin_required
+def encerrar(ciclo_id):
+    """Encerrar o ciclo aberto sem abrir outro"""
+    ciclo = Ciclo.query.get_or_404(ciclo_id)
+    try:
+        encerrar_ciclo(ciclo)
+    except ValueError as e:
+        return {"error": str(e)}, 409
+    return jsonify(ciclo.to_dict())
+
+@admin_bp.route('/ciclos/<int:ciclo_id>/arquivar', methods=['POST'])
+@admin_required
+def arquivar(ciclo_id):
+    """Mover as avaliações de um ciclo encerrado para avaliacao_arquivo"""
+    ciclo = Ciclo.query.get_or_404(ciclo_id)
+    try:
+        total = arquivar_ciclo(ciclo)
+    except ValueError as e:
+        return {"error": str(e)}, 409
+    return jsonify(dict(ciclo.to_dict(), avaliacoes_arquivadas=total))
+
+@admin_bp.route('/ciclos/tendencias')
+@admin_required
+def get_tendencias():
+    """Médias de cada ciclo (todas as avaliações ou as de um avaliado), incluindo os arquivados"""
+    avaliado_id = request.args.get('avaliado', type=int)
+    return cache_respostas().responder(
+        'tendencias', avaliado_id, lambda: tendencias(avaliado_id), depende_de=(AVALIACOES, CICLOS)
+    )
+
+@admin_bp.route('/export/avaliacoes')
+@admin_required
+def export_avaliacoes():
+    """Exportar as avaliações de um ciclo (padrão: o aberto) em CSV ou NDJSON, em streaming"""
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return {"error": f"Formato inválido; use {', '.join(FORMATOS)}"}, 400
+    ciclo_id, modelo = ciclo_da_requisicao()
+    if modelo is None:
+        return {"error": "Ciclo não encontrado"}, 404
+
+    gerar, content_type = FORMATOS[formato]
+    return Response(
+        stream_with_context(gerar(ciclo_id, modelo)),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename=avaliacoes.{formato}'}
+    )
+
+def tarefa_json(tarefa):
+    """Tarefa com os links de status e, se houver arquivo, de download"""
+    dados = dict(tarefa.to_dict(), status_url=url_for('admin_bp.get_job', tarefa_id=tarefa.id))
+    if tarefa.status == 'concluida' and tarefa.arquivo:
+        dados['resultado_url'] = url_for('admin_bp.download_job', tarefa_id=tarefa.id)
+    return dados
+
+def tarefa_enfileirada(tarefa):
+    """202 com a tarefa; o cliente acompanha pelo Location"""
+    resposta = jsonify(tarefa_json(tarefa))
+    resposta.status_code = 202
+    resposta.headers['Location'] = url_for('admin_bp.get_job', tarefa_id=tarefa.id)
+    return resposta
+
+@admin_bp.route('/importar_usuarios', methods=['POST'])
+@admin_required
+def importar_usuarios_arquivo():
+    """Importar ou atualizar usuários a partir de um arquivo (campo multipart `arquivo`).
+
+    O arquivo é gravado e a importação roda em segundo plano: a resposta é
+    202 com a tarefa, e o relatório fica no resultado dela.
+    """
+    arquivo = request.files.get('arquivo')
+    if not arquivo or not arquivo.filename:
+        return {"error": "Envie o arquivo no campo 'arquivo'"}, 400
+    try:
+        formato = request.form.get('formato') or formato_do_arquivo(arquivo.filename)
+        if formato not in LEITORES:
+            raise ValueError(f"Formato não suportado: use {', '.join(LEITORES)}")
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    entrada = guardar_entrada(arquivo, formato)
+    tarefa = enfileirar('importar_usuarios', {'entrada': entrada, 'formato': formato}, session['user_id'])
+    return tarefa_enfileirada(tarefa)
+
+@admin_bp.route('/jobs')
+@admin_required
+def get_jobs():
+    """Tarefas mais recentes primeiro; `status` e `tipo` filtram"""
+    consulta = Tarefa.query
+    for campo in ('status', 'tipo'):
+        if request.args.get(campo):
+            consulta = consulta.filter(getattr(Tarefa, campo) == request.args[campo])
+    limite = min(request.args.get('limit', 50, type=int), 200)
+    return jsonify([tarefa_json(tarefa) for tarefa in consulta.order_by(Tarefa.id.desc()).limit(limite)])
+
+@admin_bp.route('/jobs', methods=['POST'])
+@admin_required
+def create_job():
+    """Enfileirar uma tarefa: {"tipo": "exportar_avaliacoes", "parametros": {"formato": "csv"}}"""
+    data = request.get_json(silent=True) or {}
+    parametros = data.get('parametros') or {}
+    if not isinstance(parametros, dict):
+        return {"error": "parametros deve ser um objeto"}, 400
+    try:
+        tarefa = enfileirar(data.get('tipo'), parametros, session['user_id'])
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return tarefa_enfileirada(tarefa)
+
+@admin_bp.route('/jobs/<int:tarefa_id>')
+@admin_required
+def get_job(tarefa_id):
+    """Status, progresso e resultado de uma tarefa"""
+    return jsonify(tarefa_json(Tarefa.query.get_or_404(tarefa_id)))
+
+@admin_bp.route('/jobs/<int:tarefa_id>', methods=['DELETE'])
+@admin_required
+def delete_job(tarefa_id):
+    """Cancelar uma tarefa que ainda não começou"""
+    tarefa = Tarefa.query.get_or_404(tarefa_id)
+    if not cancelar(tarefa):
+        return {"error": "A tarefa já começou"}, 409
+    return jsonify(tarefa_json(tarefa))
+
+@admin_bp.route('/jobs/<int:tarefa_id>/resultado')
+@admin_required
+def download_job(tarefa_id):
+    """Baixar o arquivo gerado pela tarefa"""
+    tarefa = Tarefa.query.get_or_404(tarefa_id)
+    if tarefa.status != 'concluida':
+        return {"error": "A tarefa não foi concluída"}, 409
+    caminho = caminho_resultado(tarefa)
+    if caminho is None:
+        return {"error": "A tarefa não gerou arquivo; veja o resultado"}, 404
+    return send_file(caminho, as_attachment=True, download_name=tarefa.arquivo)
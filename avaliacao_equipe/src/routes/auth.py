@@ -1,5 +1,10 @@
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session, url_for
 from src.models.usuario import Usuario, db
+from src.routes.admin import admin_required
+from src.services.identidade import guardar_acesso_na_sessao, usuario_atual
+from src.services.tarefas import enfileirar
+from src.services.busca import buscar, limite_da_requisicao
+from src.services.paginacao import Pagina
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -26,7 +31,7 @@ def login():
         # Salvar na sessão
         session['user_id'] = usuario.id
         session['user_email'] = usuario.email
-        session['user_tipo'] = usuario.tipo
+        guardar_acesso_na_sessao(usuario)
         
         return jsonify({
             'message': 'Login realizado com sucesso',
@@ -50,7 +55,7 @@ def get_current_user():
     if not user_id:
         return jsonify({'error': 'Usuário não autenticado'}), 401
     
-    usuario = Usuario.query.get(user_id)
+    usuario = usuario_atual()
     if not usuario or not usuario.ativo:
         session.clear()
         return jsonify({'error': 'Usuário inválido'}), 401
@@ -65,16 +70,19 @@ def get_subordinados():
     if not user_id:
         return jsonify({'error': 'Usuário não autenticado'}), 401
     
-    usuario = Usuario.query.get(user_id)
+    usuario = usuario_atual()
     if not usuario or not usuario.ativo:
         return jsonify({'error': 'Usuário inválido'}), 401
     
     subordinados = []
     
-    if usuario.tipo == 'gestor':
+    if request.args.get('indiretos'):
+        # Toda a equipe, diretos e indiretos, em uma consulta via usuario_hierarquia
+        subordinados = [sub.to_dict_safe() for sub in usuario.get_equipe()]
+    elif usuario.tipo == 'gestor':
         # Gestores podem avaliar subordinados
         subordinados_query = Usuario.query.filter_by(
-            gestor_imediato=usuario.nome, 
+            gestor_id=usuario.id, 
             ativo=True
         ).order_by(Usuario.nome).all()
         subordinados = [sub.to_dict_safe() for sub in subordinados_query]
@@ -87,52 +95,40 @@ def get_subordinados():
 @auth_bp.route('/usuarios', methods=['GET'])
 def get_usuarios():
     """Listar todos os usuários (apenas para administração)"""
-    usuarios = Usuario.query.filter_by(ativo=True).order_by(Usuario.nome).all()
+    try:
+        pagina = Pagina.da_requisicao()
+        usuarios, proximo, total = pagina.buscar(
+            Usuario.query.filter_by(ativo=True), [Usuario.nome, Usuario.id]
+        )
+        return pagina.responder([usuario.to_dict_safe() for usuario in usuarios], proximo, total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@auth_bp.route('/usuarios/search', methods=['GET'])
+def search_usuarios():
+    """Buscar usuários ativos por nome, cargo, região ou email (mais relevantes primeiro)"""
+    try:
+        limite = limite_da_requisicao(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    usuarios = buscar(Usuario, request.args.get('q', ''), limite, filtros=[Usuario.ativo == True])
     return jsonify([usuario.to_dict_safe() for usuario in usuarios])
 
 @auth_bp.route('/populate_users', methods=['POST'])
+@admin_required
 def populate_users():
-    """Popular banco com usuários da planilha (apenas para setup inicial)"""
-    try:
-        import json
-        
-        # Ler dados processados
-        with open('/home/ubuntu/usuarios_sistema.json', 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-        
-        usuarios_criados = 0
-        
-        for user_data in dados['usuarios']:
-            # Verificar se usuário já existe
-            usuario_existente = Usuario.query.filter_by(email=user_data['email']).first()
-            
-            if not usuario_existente:
-                from datetime import datetime
-                
-                usuario = Usuario(
-                    matricula=user_data['matricula'],
-                    nome=user_data['nome'],
-                    email=user_data['email'],
-                    cargo=user_data['cargo'],
-                    regiao=user_data['regiao'],
-                    gestor_imediato=user_data['gestor_imediato'],
-                    nivel_hierarquico=user_data['nivel_hierarquico'],
-                    vinculo=user_data['vinculo'],
-                    data_admissao=datetime.strptime(user_data['data_admissao'], '%Y-%m-%d').date(),
-                    tipo=user_data['tipo']
-                )
-                
-                db.session.add(usuario)
-                usuarios_criados += 1
-        
-        db.session.commit()
-        
-        return jsonify({
-            'message': f'{usuarios_criados} usuários criados com sucesso',
-            'total_usuarios': Usuario.query.count()
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    """Popular banco com usuários da planilha (apenas para setup inicial; só administradores).
+
+    A importação de USUARIOS_SEED_PATH roda em segundo plano; o relatório
+    fica no resultado da tarefa (GET /admin/jobs/<id>).
+    """
+    if not current_app.config.get('USUARIOS_SEED_PATH'):
+        return jsonify({'error': 'USUARIOS_SEED_PATH não configurado'}), 400
+    tarefa = enfileirar('importar_usuarios', usuario_id=session.get('user_id'))
+    return jsonify({
+        'message': 'Importação de usuários enfileirada',
+        'tarefa_id': tarefa.id,
+        'status_url': url_for('admin_bp.get_job', tarefa_id=tarefa.id)
+    }), 202
 
@@ -1,6 +1,16 @@
-from flask import Blueprint, jsonify, request, session
-from src.models.avaliacao import Avaliacao, db
+from flask import Blueprint, current_app, jsonify, request, session
+from sqlalchemy.exc import IntegrityError
+from src.models.avaliacao import Avaliacao, AvaliacaoArquivo, NOTA_MAXIMA, NOTA_MINIMA, REGISTRO_CRITERIOS, db, serializar_avaliacoes
 from src.models.usuario import Usuario
+from src.services.identidade import usuario_atual
+from src.services.estatisticas import calcular_estatisticas
+from src.services.resumo import atualizar_resumos
+from src.services.lote import CAMPOS_OBRIGATORIOS, criar_avaliacoes_em_lote
+from src.services.paineis import marcar_paineis, responder_painel
+from src.services.pontuacao import converter_notas, pesos_criterios
+from src.services.cache import AVALIACOES, cache_respostas, invalidar
+from src.services.ciclos import ciclo_aberto_id, modelo_do_ciclo
+from src.services.paginacao import Pagina
 
 avaliacao_bp = Blueprint('avaliacao', __name__)
 
@@ -10,24 +20,41 @@ def require_auth():
     if not user_id:
         return None
     
-    usuario = Usuario.query.get(user_id)
+    usuario = usuario_atual()
     if not usuario or not usuario.ativo:
         session.clear()
         return None
     
     return usuario
 
+def ciclo_fechado(avaliacao):
+    """Resposta 409 se a avaliação for de um ciclo que não está mais aberto"""
+    if avaliacao.ciclo_id != ciclo_aberto_id():
+        return jsonify({'error': 'Avaliações de um ciclo encerrado não podem ser alteradas'}), 409
+    return None
+
 @avaliacao_bp.route('/avaliacoes', methods=['GET'])
 def get_avaliacoes():
-    """Listar avaliações do usuário logado"""
+    """Listar avaliações do usuário logado no ciclo aberto (ou no ciclo do parâmetro `ciclo`)"""
     usuario = require_auth()
     if not usuario:
         return jsonify({'error': 'Usuário não autenticado'}), 401
     
-    # Buscar apenas avaliações feitas pelo usuário logado
-    avaliacoes = Avaliacao.query.filter_by(avaliador_id=usuario.id).order_by(Avaliacao.data_avaliacao.desc()).all()
+    ciclo_id = request.args.get('ciclo', type=int) or ciclo_aberto_id()
+    modelo = modelo_do_ciclo(ciclo_id) if ciclo_id else Avaliacao
+    if modelo is None:
+        return jsonify({'error': 'Ciclo não encontrado'}), 404
     
-    return jsonify([avaliacao.to_dict() for avaliacao in avaliacoes])
+    # Buscar apenas avaliações feitas pelo usuário logado, mais recentes primeiro
+    try:
+        pagina = Pagina.da_requisicao()
+        avaliacoes, proximo, total = pagina.buscar(
+            modelo.query.filter_by(ciclo_id=ciclo_id, avaliador_id=usuario.id),
+            [modelo.data_avaliacao, modelo.id], descendente=True
+        )
+        return pagina.responder(serializar_avaliacoes(avaliacoes), proximo, total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @avaliacao_bp.route('/avaliacoes', methods=['POST'])
 def create_avaliacao():
@@ -40,16 +67,13 @@ def create_avaliacao():
         data = request.json
         
         # Validar campos obrigatórios
-        required_fields = [
-            'avaliado_id', 'tipo_avaliacao', 'producao', 'edicao', 'coordenacao', 'co_coordenacao',
-            'pro_atividade', 'criatividade', 'resolucao_problemas',
-            'flexibilidade_adaptabilidade', 'relacionamento_equipe',
-            'relacionamento_outras_areas', 'inteligencia_emocional', 'lideranca', 'visao_institucional'
-        ]
-        
-        for field in required_fields:
+        for field in CAMPOS_OBRIGATORIOS:
             if field not in data:
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        try:
+            notas = converter_notas(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Verificar se o usuário avaliado existe
         avaliado = Usuario.query.get(data['avaliado_id'])
@@ -60,34 +84,17 @@ def create_avaliacao():
         if not usuario.pode_avaliar(avaliado):
             return jsonify({'error': 'Você não tem permissão para avaliar este usuário'}), 403
         
-        # Verificar se já existe avaliação do mesmo tipo
-        avaliacao_existente = Avaliacao.query.filter_by(
-            avaliador_id=usuario.id,
-            avaliado_id=data['avaliado_id'],
-            tipo_avaliacao=data['tipo_avaliacao']
-        ).first()
-        
-        if avaliacao_existente:
-            return jsonify({'error': f'Já existe uma {data["tipo_avaliacao"]} para este usuário'}), 400
+        ciclo_id = ciclo_aberto_id()
+        if ciclo_id is None:
+            return jsonify({'error': 'Nenhum ciclo de avaliação aberto'}), 409
         
         # Criar avaliação
         avaliacao = Avaliacao(
+            ciclo_id=ciclo_id,
             avaliador_id=usuario.id,
             avaliado_id=data['avaliado_id'],
             tipo_avaliacao=data['tipo_avaliacao'],
-            producao=data['producao'],
-            edicao=data['edicao'],
-            coordenacao=data['coordenacao'],
-            co_coordenacao=int(data['co_coordenacao']),
-            pro_atividade=data['pro_atividade'],
-            criatividade=data['criatividade'],
-            resolucao_problemas=data['resolucao_problemas'],
-            flexibilidade_adaptabilidade=data['flexibilidade_adaptabilidade'],
-            relacionamento_equipe=data['relacionamento_equipe'],
-            relacionamento_outras_areas=data['relacionamento_outras_areas'],
-            inteligencia_emocional=data['inteligencia_emocional'],
-            lideranca=int(data['lideranca']),
-            visao_institucional=data['visao_institucional'],
+            **notas,
             pontos_fortes=data.get('pontos_fortes'),
             pontos_desenvolver=data.get('pontos_desenvolver')
         )
@@ -96,22 +103,65 @@ def create_avaliacao():
         avaliacao.calcular_media()
         
         db.session.add(avaliacao)
+        atualizar_resumos([avaliacao.avaliado_id])
+        marcar_paineis([(avaliacao.avaliador_id, avaliacao.avaliado_id, avaliacao.tipo_avaliacao)])
         db.session.commit()
+        invalidar(AVALIACOES)
         
         return jsonify(avaliacao.to_dict()), 201
         
+    except IntegrityError:
+        # Índice único (ciclo, avaliador, avaliado, tipo): já existe avaliação do mesmo tipo no ciclo
+        db.session.rollback()
+        return jsonify({'error': f'Já existe uma {data["tipo_avaliacao"]} para este usuário neste ciclo'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@avaliacao_bp.route('/avaliacoes/batch', methods=['POST'])
+def create_avaliacoes_batch():
+    """Criar várias avaliações de uma vez (resultado por item)"""
+    usuario = require_auth()
+    if not usuario:
+        return jsonify({'error': 'Usuário não autenticado'}), 401
+    
+    data = request.json
+    itens = data.get('avaliacoes') if isinstance(data, dict) else data
+    if not isinstance(itens, list) or not itens:
+        return jsonify({'error': 'Envie uma lista de avaliações'}), 400
+    
+    ciclo_id = ciclo_aberto_id()
+    if ciclo_id is None:
+        return jsonify({'error': 'Nenhum ciclo de avaliação aberto'}), 409
+    
+    try:
+        resultados = criar_avaliacoes_em_lote(usuario, itens, ciclo_id)
+    except IntegrityError:
+        # Outra requisição gravou uma das avaliações entre a validação e o commit
+        db.session.rollback()
+        return jsonify({'error': 'Conflito ao gravar o lote; nenhuma avaliação foi criada'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    criadas = sum(1 for resultado in resultados if resultado['status'] == 201)
+    if criadas:
+        invalidar(AVALIACOES)
+    return jsonify({
+        'criadas': criadas,
+        'erros': len(resultados) - criadas,
+        'resultados': resultados
+    }), 201 if criadas else 400
+
 @avaliacao_bp.route('/avaliacoes/<int:avaliacao_id>', methods=['GET'])
 def get_avaliacao(avaliacao_id):
-    """Obter avaliação específica"""
+    """Obter avaliação específica, inclusive de um ciclo arquivado"""
     usuario = require_auth()
     if not usuario:
         return jsonify({'error': 'Usuário não autenticado'}), 401
     
-    avaliacao = Avaliacao.query.get_or_404(avaliacao_id)
+    # Arquivadas mantêm o id que tinham em avaliacao (listadas com ?ciclo=)
+    avaliacao = db.session.get(Avaliacao, avaliacao_id) or db.get_or_404(AvaliacaoArquivo, avaliacao_id)
     
     # Verificar se o usuário pode ver esta avaliação
     if avaliacao.avaliador_id != usuario.id:
@@ -132,19 +182,19 @@ def update_avaliacao(avaliacao_id):
         # Verificar permissões
         if avaliacao.avaliador_id != usuario.id:
             return jsonify({'error': 'Acesso negado'}), 403
+        fechado = ciclo_fechado(avaliacao)
+        if fechado:
+            return fechado
         
         data = request.json
         
-        # Atualizar campos numéricos
-        numeric_fields = [
-            'producao', 'edicao', 'coordenacao','co_coordenacao', 'pro_atividade', 'criatividade',
-            'resolucao_problemas', 'flexibilidade_adaptabilidade', 'relacionamento_equipe',
-            'relacionamento_outras_areas', 'inteligencia_emocional', 'lideranca', 'visao_institucional'
-        ]
-        
-        for field in numeric_fields:
-            if field in data:
-                setattr(avaliacao, field, data[field])
+        # Atualizar as notas enviadas
+        try:
+            notas = converter_notas(data, parcial=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        for criterio, nota in notas.items():
+            setattr(avaliacao, criterio, nota)
         
         # Atualizar campos de texto
         if 'pontos_fortes' in data:
@@ -154,8 +204,11 @@ def update_avaliacao(avaliacao_id):
         
         # Recalcular média
         avaliacao.calcular_media()
+        atualizar_resumos([avaliacao.avaliado_id])
+        marcar_paineis([(avaliacao.avaliador_id, avaliacao.avaliado_id, avaliacao.tipo_avaliacao)])
         
         db.session.commit()
+        invalidar(AVALIACOES)
         return jsonify(avaliacao.to_dict())
         
     except Exception as e:
@@ -174,11 +227,29 @@ def delete_avaliacao(avaliacao_id):
     # Verificar permissões
     if avaliacao.avaliador_id != usuario.id:
         return jsonify({'error': 'Acesso negado'}), 403
+    fechado = ciclo_fechado(avaliacao)
+    if fechado:
+        return fechado
     
     db.session.delete(avaliacao)
+    atualizar_resumos([avaliacao.avaliado_id])
+    marcar_paineis([(avaliacao.avaliador_id, avaliacao.avaliado_id, avaliacao.tipo_avaliacao)])
     db.session.commit()
+    invalidar(AVALIACOES)
     return '', 204
 
+@avaliacao_bp.route('/criterios', methods=['GET'])
+def get_criterios():
+    """Critérios avaliados, com rótulo, faixa de notas e peso na média geral"""
+    pesos = pesos_criterios()
+    return jsonify([{
+        'nome': criterio.nome,
+        'rotulo': criterio.rotulo,
+        'minimo': NOTA_MINIMA,
+        'maximo': NOTA_MAXIMA,
+        'peso': pesos[criterio.nome]
+    } for criterio in REGISTRO_CRITERIOS])
+
 @avaliacao_bp.route('/avaliacoes/estatisticas', methods=['GET'])
 def get_estatisticas():
     """Obter estatísticas das avaliações"""
@@ -187,167 +258,14 @@ def get_estatisticas():
         return jsonify({'error': 'Usuário não autenticado'}), 401
     
     try:
-        # Estatísticas básicas das avaliações feitas pelo usuário
-        avaliacoes_feitas = Avaliacao.query.filter_by(avaliador_id=usuario.id).all()
-        
-        if not avaliacoes_feitas:
-            return jsonify({
-                'total_avaliacoes': 0,
-                'funcionarios_avaliados': 0,
-                'media_geral': 0,
-                'comparativo_auto_avaliacao': [],
-                'ranking_subordinados': []
-            })
-        
-        # Calcular estatísticas básicas
-        total_avaliacoes = len(avaliacoes_feitas)
-        funcionarios_avaliados = len(set(av.avaliado_id for av in avaliacoes_feitas))
-        media_geral = round(sum(av.media_geral for av in avaliacoes_feitas if av.media_geral) / total_avaliacoes, 1)
-        
-        # Comparativo entre avaliação e autoavaliação
-        comparativo = []
-        ranking = []
-        
+        # Gestores: painel pré-calculado, lido em uma linha
         if usuario.tipo == 'gestor':
-            # Para gestores, mostrar comparativo dos subordinados com notas detalhadas
-            subordinados = usuario.get_subordinados()
-            subordinados_com_avaliacao = []
-            
-            for subordinado in subordinados:
-                # Buscar avaliação feita pelo gestor para este subordinado
-                avaliacao_gestor = Avaliacao.query.filter_by(
-                    avaliador_id=usuario.id,
-                    avaliado_id=subordinado.id,
-                    tipo_avaliacao='subordinado'
-                ).first()
-                
-                # Buscar autoavaliação do subordinado
-                autoavaliacao = Avaliacao.query.filter_by(
-                    avaliador_id=subordinado.id,
-                    avaliado_id=subordinado.id,
-                    tipo_avaliacao='autoavaliacao'
-                ).first()
-                
-                # Incluir no comparativo se houver pelo menos uma das avaliações
-                if avaliacao_gestor or autoavaliacao:
-                    avaliacao_media = avaliacao_gestor.media_geral if avaliacao_gestor else None
-                    auto_media = autoavaliacao.media_geral if autoavaliacao else None
-                    
-                    diferenca = None
-                    if avaliacao_media is not None and auto_media is not None:
-                        diferenca = round(avaliacao_media - auto_media, 1)
-                    
-                    # Notas detalhadas por critério (apenas para gestores)
-                    notas_detalhadas_gestor = None
-                    notas_detalhadas_auto = None
-                    
-                    if avaliacao_gestor:
-                        notas_detalhadas_gestor = {
-                            'producao': avaliacao_gestor.producao,
-                            'edicao': avaliacao_gestor.edicao,
-                            'coordenacao': avaliacao_gestor.coordenacao,
-                            'co_coordenacao': avaliacao_gestor.co_coordenacao,
-                            'pro_atividade': avaliacao_gestor.pro_atividade,
-                            'criatividade': avaliacao_gestor.criatividade,
-                            'resolucao_problemas': avaliacao_gestor.resolucao_problemas,
-                            'flexibilidade_adaptabilidade': avaliacao_gestor.flexibilidade_adaptabilidade,
-                            'relacionamento_equipe': avaliacao_gestor.relacionamento_equipe,
-                            'relacionamento_outras_areas': avaliacao_gestor.relacionamento_outras_areas,
-                            'inteligencia_emocional': avaliacao_gestor.inteligencia_emocional,
-                            'lideranca': avaliacao_gestor.lideranca,
-                            'visao_institucional': avaliacao_gestor.visao_institucional,
-                            'pontos_fortes': avaliacao_gestor.pontos_fortes,
-                            'pontos_desenvolver': avaliacao_gestor.pontos_desenvolver
-                        }
-                    
-                    if autoavaliacao:
-                        notas_detalhadas_auto = {
-                            'producao': autoavaliacao.producao,
-                            'edicao': autoavaliacao.edicao,
-                            'coordenacao': autoavaliacao.coordenacao,
-                            'co_coordenacao': autoavaliacao.co_coordenacao,
-                            'pro_atividade': autoavaliacao.pro_atividade,
-                            'criatividade': autoavaliacao.criatividade,
-                            'resolucao_problemas': autoavaliacao.resolucao_problemas,
-                            'flexibilidade_adaptabilidade': autoavaliacao.flexibilidade_adaptabilidade,
-                            'relacionamento_equipe': autoavaliacao.relacionamento_equipe,
-                            'relacionamento_outras_areas': autoavaliacao.relacionamento_outras_areas,
-                            'inteligencia_emocional': autoavaliacao.inteligencia_emocional,
-                            'lideranca': autoavaliacao.lideranca,
-                            'visao_institucional': autoavaliacao.visao_institucional,
-                            'pontos_fortes': autoavaliacao.pontos_fortes,
-                            'pontos_desenvolver': autoavaliacao.pontos_desenvolver
-                        }
-                    
-                    comparativo.append({
-                        'funcionario': subordinado.nome,
-                        'cargo': subordinado.cargo,
-                        'avaliacao_gestor': avaliacao_media,
-                        'autoavaliacao': auto_media,
-                        'diferenca': diferenca,
-                        'notas_detalhadas_gestor': notas_detalhadas_gestor,
-                        'notas_detalhadas_auto': notas_detalhadas_auto
-                    })
-                    
-                    # Para ranking, incluir apenas subordinados com avaliação do gestor
-                    if avaliacao_gestor:
-                        subordinados_com_avaliacao.append({
-                            'funcionario': subordinado.nome,
-                            'cargo': subordinado.cargo,
-                            'media_geral': avaliacao_gestor.media_geral,
-                            'avaliacao_id': avaliacao_gestor.id,
-                            'autoavaliacao': auto_media
-                        })
-            
-            # Criar ranking ordenado por média geral (maior para menor)
-            ranking = sorted(subordinados_com_avaliacao, key=lambda x: x['media_geral'], reverse=True)
-            
-        else:
-            # Para funcionários, mostrar apenas autoavaliação (SEM avaliação do gestor)
-            # Buscar autoavaliação do funcionário
-            autoavaliacao = Avaliacao.query.filter_by(
-                avaliador_id=usuario.id,
-                avaliado_id=usuario.id,
-                tipo_avaliacao='autoavaliacao'
-            ).first()
-            
-            # Incluir apenas autoavaliação no comparativo
-            if autoavaliacao:
-                comparativo.append({
-                    'funcionario': usuario.nome,
-                    'cargo': usuario.cargo,
-                    'avaliacao_gestor': None,  # Ocultar para funcionários
-                    'autoavaliacao': autoavaliacao.media_geral,
-                    'diferenca': None,  # Sem comparação para funcionários
-                    'notas_detalhadas_gestor': None,  # Ocultar para funcionários
-                    'notas_detalhadas_auto': {
-                        'producao': autoavaliacao.producao,
-                        'edicao': autoavaliacao.edicao,
-                        'coordenacao': autoavaliacao.coordenacao,
-                        'co_coordenacao': autoavaliacao.co_coordenacao,
-                        'pro_atividade': autoavaliacao.pro_atividade,
-                        'criatividade': autoavaliacao.criatividade,
-                        'resolucao_problemas': autoavaliacao.resolucao_problemas,
-                        'flexibilidade_adaptabilidade': autoavaliacao.flexibilidade_adaptabilidade,
-                        'relacionamento_equipe': autoavaliacao.relacionamento_equipe,
-                        'relacionamento_outras_areas': autoavaliacao.relacionamento_outras_areas,
-                        'inteligencia_emocional': autoavaliacao.inteligencia_emocional,
-                        'lideranca': autoavaliacao.lideranca,
-                        'visao_institucional': autoavaliacao.visao_institucional,
-                        'pontos_fortes': autoavaliacao.pontos_fortes,
-                        'pontos_desenvolver': autoavaliacao.pontos_desenvolver
-                    }
-                })
-        
-        return jsonify({
-            'total_avaliacoes': total_avaliacoes,
-            'funcionarios_avaliados': funcionarios_avaliados,
-            'media_geral': media_geral,
-            'comparativo_auto_avaliacao': comparativo,
-            'ranking_subordinados': ranking
-        })
+            resposta = responder_painel(usuario)
+            if resposta is not None:
+                return resposta
+        return cache_respostas().responder('estatisticas', usuario.id, lambda: calcular_estatisticas(usuario))
         
     except Exception as e:
-        print(f"Erro nas estatísticas: {str(e)}")  # Para debug
+        current_app.logger.exception('Erro nas estatísticas do usuário %s', usuario.id)
         return jsonify({'error': str(e)}), 500
 
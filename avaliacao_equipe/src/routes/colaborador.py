@@ -1,13 +1,21 @@
 from flask import Blueprint, jsonify, request
 from src.models.colaborador import Colaborador, db
+from src.services.busca import buscar, limite_da_requisicao
+from src.services.paginacao import Pagina
 
 colaborador_bp = Blueprint('colaborador', __name__)
 
 @colaborador_bp.route('/colaboradores', methods=['GET'])
 def get_colaboradores():
     """Listar todos os colaboradores"""
-    colaboradores = Colaborador.query.order_by(Colaborador.nome_completo).all()
-    return jsonify([colaborador.to_dict() for colaborador in colaboradores])
+    try:
+        pagina = Pagina.da_requisicao()
+        colaboradores, proximo, total = pagina.buscar(
+            Colaborador.query, [Colaborador.nome_completo, Colaborador.id]
+        )
+        return pagina.responder([colaborador.to_dict() for colaborador in colaboradores], proximo, total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @colaborador_bp.route('/colaboradores', methods=['POST'])
 def create_colaborador():
@@ -70,15 +78,14 @@ def delete_colaborador(colaborador_id):
 
 @colaborador_bp.route('/colaboradores/search', methods=['GET'])
 def search_colaboradores():
-    """Buscar colaboradores por nome"""
-    nome = request.args.get('nome', '')
-    if nome:
-        colaboradores = Colaborador.query.filter(
-            Colaborador.nome_completo.ilike(f'%{nome}%')
-        ).order_by(Colaborador.nome_completo).all()
-    else:
-        colaboradores = Colaborador.query.order_by(Colaborador.nome_completo).all()
+    """Buscar colaboradores por nome, cargo ou departamento (mais relevantes primeiro)"""
+    try:
+        limite = limite_da_requisicao(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
+    texto = request.args.get('q') or request.args.get('nome', '')
+    colaboradores = buscar(Colaborador, texto, limite)
     return jsonify([colaborador.to_dict() for colaborador in colaboradores])
 
 @colaborador_bp.route('/colaboradores/departamento/<departamento>', methods=['GET'])
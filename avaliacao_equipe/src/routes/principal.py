@@ -0,0 +1,92 @@
+from flask import Blueprint, session
+from src.models.usuario import Usuario
+from src.services.identidade import papel_na_sessao, usuario_atual
+from src.services.ranking import ranking_por_avaliador
+from src.services.cache import cache_respostas
+from src.services.estaticos import servir_estatico
+
+# Rotas da aplicação fora dos blueprints de API: páginas HTML, arquivos
+# estáticos (catch-all, por isso registrado por último) e rotas legadas
+principal_bp = Blueprint('principal', __name__)
+
+@principal_bp.route('/api/current_user')
+def current_user():
+    # Verificar se usuário está logado
+    user_id = session.get('user_id')
+    
+    if not user_id:
+        return {'error': 'Usuário não autenticado'}, 401
+    
+    usuario = usuario_atual()
+    if not usuario or not usuario.ativo:
+        session.clear()
+        return {'error': 'Usuário inválido'}, 401
+    
+    return usuario.to_dict_safe()
+
+@principal_bp.route('/api/subordinados')
+def subordinados():
+    # Verificar se usuário está logado
+    user_id = session.get('user_id')
+    
+    if not user_id:
+        return {'error': 'Usuário não autenticado'}, 401
+    
+    usuario = usuario_atual()
+    if not usuario or not usuario.ativo:
+        return {'error': 'Usuário inválido'}, 401
+    
+    subordinados = []
+    
+    if usuario.tipo == 'gestor':
+        # Gestores podem avaliar subordinados
+        subordinados_query = Usuario.query.filter_by(
+            gestor_id=usuario.id, 
+            ativo=True
+        ).order_by(Usuario.nome).all()
+        subordinados = [sub.to_dict_safe() for sub in subordinados_query]
+    
+    return subordinados
+
+@principal_bp.route('/')
+def index():
+    # Verificar se usuário está logado
+    if 'user_id' not in session:
+        return servir_estatico('login.html')
+    return servir_estatico('index.html')
+
+@principal_bp.route('/login')
+def login_page():
+    return servir_estatico('login.html')
+
+@principal_bp.route('/api/ranking-geral')
+def ranking_geral():
+    user_id = session.get('user_id')
+    if not user_id:
+        return {'error': 'Usuário não autenticado'}, 401
+    
+    tipo, ativo = papel_na_sessao()
+    if tipo != 'admin' or not ativo:
+        return {'error': 'Acesso negado'}, 403
+
+    return cache_respostas().responder('ranking_por_avaliador', 'admin', ranking_por_avaliador)
+@principal_bp.route('/admin/ranking')
+def ranking_geral_html():
+    tipo, ativo = papel_na_sessao() if session.get('user_id') else (None, False)
+    if tipo != 'admin' or not ativo:
+        return "Acesso negado", 403
+
+    return servir_estatico('ranking_geral.html')
+
+@principal_bp.route('/', defaults={'path': ''})
+@principal_bp.route('/<path:path>')
+def serve(path):
+    # Arquivos conhecidos vêm do manifesto em memória, sem acessar o disco
+    resposta = servir_estatico(path) if path else None
+    if resposta is not None:
+        return resposta
+
+    # Se não encontrar o arquivo, verificar autenticação
+    if 'user_id' not in session:
+        return servir_estatico('login.html')
+    return servir_estatico('index.html') or ("index.html not found", 404)
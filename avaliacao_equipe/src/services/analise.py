@@ -0,0 +1,129 @@
+from functools import cache
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import aliased
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, NOTA_MAXIMA, NOTA_MINIMA, REGISTRO_CRITERIOS, db
+from src.models.hierarquia import UsuarioHierarquia
+from src.models.usuario import Usuario
+
+AGRUPAMENTOS = ('regiao', 'cargo', 'equipe')
+TIPOS = ('subordinado', 'autoavaliacao')
+PERCENTIS = (25, 50, 75, 90)
+NOTAS = range(NOTA_MINIMA, NOTA_MAXIMA + 1)
+
+
+@cache
+def _contagens(modelo):
+    """Contagem de cada nota de cada critério; montar as 143 expressões custa
+    mais que a consulta em equipes pequenas, então são criadas uma vez por tabela"""
+    return [
+        func.sum(case((getattr(modelo, criterio) == nota, 1), else_=0))
+        for criterio in CRITERIOS for nota in NOTAS
+    ]
+
+
+def _consultar_histogramas(modelo, ciclo_id, agrupamento, tipo, gestor_id):
+    """Uma consulta agrupada: total e contagem de cada nota de cada critério por grupo.
+
+    As 13 x 11 contagens são somas condicionais sobre a mesma leitura da
+    tabela; nenhuma avaliação chega ao Python, só uma linha por grupo.
+    """
+    gestor = aliased(Usuario)
+    if agrupamento == 'equipe':
+        # Equipe é a do gestor imediato do avaliado
+        grupo = [Usuario.gestor_id.label('grupo'), gestor.nome.label('nome')]
+    else:
+        coluna = getattr(Usuario, agrupamento)
+        grupo = [coluna.label('grupo'), coluna.label('nome')]
+
+    ativo = Usuario.ativo == True
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # likely(): sem isso o planejador parte do índice de `ativo` e busca as
+        # avaliações de cada usuário, em vez de ler avaliacao em sequência
+        ativo = func.likely(ativo)
+    consulta = (
+        select(*grupo, func.count(modelo.id), *_contagens(modelo))
+        .select_from(modelo)
+        .join(Usuario, Usuario.id == modelo.avaliado_id)
+        .where(modelo.ciclo_id == ciclo_id, ativo)
+        .group_by(*grupo)
+        .order_by(grupo[0])
+    )
+    if agrupamento == 'equipe':
+        consulta = consulta.outerjoin(gestor, gestor.id == Usuario.gestor_id)
+    if tipo:
+        consulta = consulta.where(modelo.tipo_avaliacao == tipo)
+    if gestor_id:
+        equipe = select(UsuarioHierarquia.descendente_id).where(UsuarioHierarquia.ancestral_id == gestor_id)
+        consulta = consulta.where(modelo.avaliado_id.in_(equipe))
+    return db.session.execute(consulta).all()
+
+
+def _estatisticas(histogramas):
+    """Média, desvio padrão e percentis a partir dos histogramas (grupos x critérios x notas).
+
+    Como as notas são inteiras, os valores são exatos: o percentil p é a
+    menor nota cuja contagem acumulada alcança p% das avaliações.
+    """
+    notas = np.arange(NOTA_MINIMA, NOTA_MAXIMA + 1, dtype=np.float64)
+    totais = histogramas.sum(axis=-1)
+    medias = histogramas @ notas / totais
+    desvios = np.sqrt(np.maximum(histogramas @ notas ** 2 / totais - medias ** 2, 0))
+
+    acumulado = histogramas.cumsum(axis=-1)
+    percentis = {
+        p: notas[np.argmax(acumulado >= np.ceil(totais * p / 100)[..., None], axis=-1)]
+        for p in PERCENTIS
+    }
+    return medias, desvios, percentis
+
+
+def analisar_criterios(ciclo_id, agrupamento='regiao', tipo='subordinado', gestor_id=None, modelo=Avaliacao):
+    """Distribuição de cada critério por região, cargo ou equipe (gestor imediato) em um ciclo.
+
+    Com `gestor_id`, só as avaliações de quem está abaixo desse gestor na
+    hierarquia (diretos e indiretos). `modelo` é AvaliacaoArquivo para um
+    ciclo arquivado (ver modelo_do_ciclo).
+    """
+    linhas = _consultar_histogramas(modelo, ciclo_id, agrupamento, tipo, gestor_id)
+    resultado = {
+        'ciclo_id': ciclo_id,
+        'agrupamento': agrupamento,
+        'tipo': tipo,
+        'gestor_id': gestor_id,
+        'criterios': {criterio.nome: criterio.rotulo for criterio in REGISTRO_CRITERIOS},
+        'percentis': list(PERCENTIS),
+        'grupos': [],
+    }
+    if not linhas:
+        return resultado
+
+    histogramas = np.array([linha[3:] for linha in linhas], dtype=np.float64).reshape(
+        len(linhas), len(CRITERIOS), len(NOTAS)
+    )
+    medias, desvios, percentis = _estatisticas(histogramas)
+    # Convertidos de uma vez: indexar arrays elemento a elemento custa caro
+    # com milhares de equipes
+    medias, desvios = medias.round(2).tolist(), desvios.round(2).tolist()
+    percentis = np.stack([percentis[p] for p in PERCENTIS], axis=-1).astype(int).tolist()
+    histogramas = histogramas.astype(int).tolist()
+    chaves = [f'p{p}' for p in PERCENTIS]
+
+    for i, linha in enumerate(linhas):
+        resultado['grupos'].append({
+            'grupo': linha.grupo,
+            'nome': linha.nome,
+            'total': linha[2],
+            'criterios': {
+                criterio: {
+                    'media': medias[i][j],
+                    'desvio': desvios[i][j],
+                    'percentis': dict(zip(chaves, percentis[i][j])),
+                    'histograma': histogramas[i][j],
+                }
+                for j, criterio in enumerate(CRITERIOS)
+            },
+        })
+    return resultado
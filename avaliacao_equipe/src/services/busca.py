@@ -0,0 +1,116 @@
+import re
+
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+from src.models.avaliacao import db
+from src.models.colaborador import Colaborador
+from src.models.usuario import Usuario
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+# Acima deste número de resultados (termos curtos como "jo") o bm25 de todos
+# eles custaria dezenas de ms; a busca devolve os primeiros encontrados e o
+# ranqueamento volta a valer assim que o usuário digita mais letras
+LIMITE_RANQUEAMENTO = 1000
+
+# Índices FTS5 por modelo: tabela virtual e colunas indexadas com o peso de
+# cada uma no bm25 (o nome pesa mais que cargo, região/departamento e email)
+INDICES_BUSCA = {
+    Usuario: ('usuario_busca', (('nome', 10.0), ('cargo', 2.0), ('regiao', 1.0), ('email', 1.0))),
+    Colaborador: ('colaborador_busca', (('nome_completo', 10.0), ('cargo', 2.0), ('departamento', 1.0))),
+}
+
+
+def _ddl_indice(tabela, nome_fts, colunas):
+    """Tabela FTS5 de conteúdo externo e os gatilhos que a mantêm sincronizada"""
+    lista = ', '.join(colunas)
+    novos = ', '.join(f'new.{coluna}' for coluna in colunas)
+    antigos = ', '.join(f'old.{coluna}' for coluna in colunas)
+    remover = f"INSERT INTO {nome_fts} ({nome_fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos});"
+    inserir = f"INSERT INTO {nome_fts} (rowid, {lista}) VALUES (new.id, {novos});"
+    return [
+        # remove_diacritics 2: "joao" encontra "João"; prefix: índices para 2 e 3 letras do type-ahead
+        f"CREATE VIRTUAL TABLE {nome_fts} USING fts5({lista}, content='{tabela}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER {nome_fts}_ai AFTER INSERT ON {tabela} BEGIN {inserir} END",
+        f"CREATE TRIGGER {nome_fts}_ad AFTER DELETE ON {tabela} BEGIN {remover} END",
+        f"CREATE TRIGGER {nome_fts}_au AFTER UPDATE OF {lista} ON {tabela} BEGIN {remover} {inserir} END",
+        # Indexa as linhas que já existiam na tabela
+        f"INSERT INTO {nome_fts} ({nome_fts}) VALUES ('rebuild')",
+    ]
+
+
+def criar_indices_busca(conexao):
+    """Cria os índices FTS5 que ainda não existem (apenas SQLite) e retorna os criados"""
+    if conexao.dialect.name != 'sqlite':
+        return []
+
+    criados = []
+    for modelo, (nome_fts, colunas) in INDICES_BUSCA.items():
+        existe = conexao.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome_fts,)
+        ).first()
+        if existe:
+            continue
+        for comando in _ddl_indice(modelo.__tablename__, nome_fts, [nome for nome, _ in colunas]):
+            conexao.exec_driver_sql(comando)
+        criados.append(nome_fts)
+    return criados
+
+
+def _termos(texto):
+    return re.findall(r'\w+', texto or '')
+
+
+def _expressao_fts(termos):
+    # Cada palavra vira um prefixo entre aspas: "jo" "silv" -> todas presentes
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+
+def buscar(modelo, texto, limite=LIMITE_PADRAO, filtros=()):
+    """Busca por prefixo das palavras em nome, cargo, região/departamento (e email).
+
+    No SQLite usa o índice FTS5, sem diferenciar acentos e maiúsculas, com os
+    resultados ordenados por relevância (bm25) quando a busca é seletiva o
+    bastante (ver LIMITE_RANQUEAMENTO). Em outros bancos cai para ILIKE nas
+    mesmas colunas, ordenado pelo nome.
+    """
+    nome_fts, colunas = INDICES_BUSCA[modelo]
+    termos = _termos(texto)
+    coluna_nome = getattr(modelo, colunas[0][0])
+    if not termos:
+        return modelo.query.filter(*filtros).order_by(coluna_nome, modelo.id).limit(limite).all()
+
+    if db.session.get_bind().dialect.name == 'sqlite':
+        indice = literal_column(nome_fts)
+        tabela_fts = table(nome_fts, column('rowid'))
+        encontra = indice.op('MATCH')(_expressao_fts(termos))
+        # likely(): sem isso o planejador prefere o índice de `ativo` e testa
+        # o MATCH linha a linha, em vez de partir do índice FTS
+        consulta = (
+            modelo.query.join(tabela_fts, tabela_fts.c.rowid == modelo.id)
+            .filter(encontra, *[func.likely(filtro) for filtro in filtros])
+        )
+
+        # Contar no índice é barato (só percorre as listas de documentos)
+        total = db.session.execute(select(func.count()).select_from(tabela_fts).where(encontra)).scalar()
+        if total <= LIMITE_RANQUEAMENTO:
+            consulta = consulta.order_by(func.bm25(indice, *[peso for _, peso in colunas]), coluna_nome)
+    else:
+        consulta = modelo.query.filter(*filtros)
+        for termo in termos:
+            consulta = consulta.filter(or_(*[getattr(modelo, nome).ilike(f'%{termo}%') for nome, _ in colunas]))
+        consulta = consulta.order_by(coluna_nome, modelo.id)
+    return consulta.limit(limite).all()
+
+
+def limite_da_requisicao(valor):
+    """Converte o parâmetro `limit`; ValueError com mensagem para o cliente"""
+    try:
+        limite = int(valor or LIMITE_PADRAO)
+    except ValueError:
+        raise ValueError('limit deve ser um número inteiro')
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ValueError(f'limit deve estar entre 1 e {LIMITE_MAXIMO}')
+    return limite
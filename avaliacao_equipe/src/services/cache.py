@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, jsonify, request
+
+from src.config import DIRETORIO_BANCO
+
+# Grupos de dados que as respostas em cache podem depender
+AVALIACOES = 'avaliacoes'
+USUARIOS = 'usuarios'
+# Abertura, encerramento e arquivamento de ciclos (ver services/ciclos.py)
+CICLOS = 'ciclos'
+
+
+class VersoesArquivo:
+    """Contadores de versão compartilhados pelos processos da mesma máquina.
+
+    Cada incremento acrescenta um byte ao arquivo do grupo (escrita em modo
+    append é atômica entre processos) e a versão é o tamanho do arquivo:
+    ler a versão custa um stat(), sem consulta ao banco.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, grupo):
+        return os.path.join(self.diretorio, f'versao_{grupo}')
+
+    def _tamanho(self, grupo):
+        try:
+            return os.stat(self._caminho(grupo)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def versoes(self, grupos):
+        return [self._tamanho(grupo) for grupo in grupos]
+
+    def incrementar(self, grupo):
+        with open(self._caminho(grupo), 'ab') as arquivo:
+            arquivo.write(b'.')
+
+
+class CacheLRU:
+    """Respostas guardadas na memória do processo, descartando as menos usadas"""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            valor = self._dados.get(chave)
+            if valor is not None:
+                self._dados.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maximo:
+                self._dados.popitem(last=False)
+
+
+class CacheRedis:
+    """Respostas e versões compartilhadas entre processos e máquinas via Redis"""
+
+    def __init__(self, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPOSTA_CACHE_URL requer o pacote redis')
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def obter(self, chave):
+        valor = self._redis.get(f'resposta:{chave}')
+        return pickle.loads(valor) if valor is not None else None
+
+    def guardar(self, chave, valor):
+        # Entradas de versões antigas nunca mais são lidas; o TTL as remove
+        self._redis.set(f'resposta:{chave}', pickle.dumps(valor), ex=self.ttl)
+
+    def incrementar(self, grupo):
+        self._redis.incr(f'versao:{grupo}')
+
+    def versoes(self, grupos):
+        return [int(valor or 0) for valor in self._redis.mget([f'versao:{grupo}' for grupo in grupos])]
+
+
+class CacheRespostas:
+    """Cache de respostas JSON invalidado por contadores de versão.
+
+    A chave inclui a versão atual de cada grupo de dados do qual a resposta
+    depende; uma escrita incrementa o contador do grupo e todas as entradas
+    antigas deixam de ser encontradas, em todos os workers.
+    """
+
+    def __init__(self, armazenamento, versoes):
+        self.armazenamento = armazenamento
+        self.versoes = versoes
+
+    def invalidar(self, *grupos):
+        for grupo in grupos:
+            self.versoes.incrementar(grupo)
+
+    def responder(self, nome, escopo, gerar, depende_de=(AVALIACOES, USUARIOS)):
+        """Resposta JSON de `gerar()` em cache, com ETag e 304 para If-None-Match.
+
+        A versão é lida antes de gerar: se uma escrita acontecer durante a
+        geração, a entrada fica sob a versão antiga e não é servida de novo.
+        """
+        versao = '.'.join(str(v) for v in self.versoes.versoes(depende_de))
+        chave = f'{nome}:{escopo}:{versao}'
+
+        entrada = self.armazenamento.obter(chave)
+        if entrada is None:
+            corpo = jsonify(gerar()).get_data()
+            etag = f'{versao}-{hashlib.sha1(corpo).hexdigest()[:16]}'
+            entrada = (etag, corpo)
+            self.armazenamento.guardar(chave, entrada)
+
+        etag, corpo = entrada
+        resposta = Response(corpo, mimetype='application/json')
+        resposta.set_etag(etag)
+        # O navegador guarda a resposta mas revalida a cada uso (304 se não mudou)
+        resposta.cache_control.private = True
+        resposta.cache_control.no_cache = True
+        return resposta.make_conditional(request)
+
+
+def configurar_cache(app):
+    """Cria o cache de respostas do app a partir de RESPOSTA_CACHE_URL (Redis) ou em memória"""
+    url = app.config.get('RESPOSTA_CACHE_URL')
+    if url:
+        # O Redis guarda também os contadores de versão
+        redis = CacheRedis(url, app.config.get('RESPOSTA_CACHE_TTL', 86400))
+        cache = CacheRespostas(redis, redis)
+    else:
+        diretorio = app.config.get('RESPOSTA_CACHE_DIR') or os.path.join(DIRETORIO_BANCO, 'cache')
+        cache = CacheRespostas(CacheLRU(app.config.get('RESPOSTA_CACHE_MAX', 1024)), VersoesArquivo(diretorio))
+    app.extensions['cache_respostas'] = cache
+    return cache
+
+
+def cache_respostas():
+    return current_app.extensions['cache_respostas']
+
+
+def invalidar(*grupos):
+    """Chamar após o commit de uma escrita que altera os grupos informados"""
+    cache_respostas().invalidar(*grupos)
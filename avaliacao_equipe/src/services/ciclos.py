@@ -0,0 +1,172 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, case, delete, func, insert, select, union_all
+
+from src.models.avaliacao import Avaliacao, AvaliacaoArquivo, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.services.cache import AVALIACOES, CICLOS, cache_respostas, invalidar
+
+
+def ciclo_aberto_id():
+    """Id do ciclo aberto, ou None se não houver.
+
+    Fica guardado no processo até a versão de CICLOS mudar: ler a versão
+    custa um stat() (ou um GET no Redis), e as consultas do dia a dia
+    filtram pelo ciclo sem consultar a tabela ciclo.
+    """
+    # A versão é lida antes da consulta, como em CacheRespostas.responder
+    versao = cache_respostas().versoes.versoes([CICLOS])[0]
+    guardado = current_app.extensions.get('ciclo_aberto')
+    if guardado is None or guardado[0] != versao:
+        ciclo_id = db.session.scalar(select(Ciclo.id).where(Ciclo.status == 'aberto'))
+        guardado = current_app.extensions['ciclo_aberto'] = (versao, ciclo_id)
+    return guardado[1]
+
+
+def modelo_do_ciclo(ciclo_id):
+    """Avaliacao ou AvaliacaoArquivo, conforme o ciclo; None se ele não existir"""
+    if ciclo_id == ciclo_aberto_id():
+        return Avaliacao
+    ciclo = db.session.get(Ciclo, ciclo_id)
+    if ciclo is None:
+        return None
+    return AvaliacaoArquivo if ciclo.arquivado else Avaliacao
+
+
+def _ciclos_alterados():
+    """Rankings e estatísticas passam a olhar para o ciclo aberto atual. Os
+    resumos são guardados por ciclo: os do ciclo encerrado continuam valendo"""
+    invalidar(CICLOS, AVALIACOES)
+
+
+def abrir_ciclo(nome):
+    """Encerra o ciclo aberto, se houver, e abre um novo.
+
+    ValueError se o nome já existir; IntegrityError se outra requisição
+    abrir um ciclo ao mesmo tempo (índice único parcial de ciclo aberto).
+    """
+    if Ciclo.query.filter_by(nome=nome).first():
+        raise ValueError(f'Já existe um ciclo chamado {nome}')
+    agora = datetime.utcnow()
+    Ciclo.query.filter_by(status='aberto').update({'status': 'encerrado', 'fim': agora})
+    ciclo = Ciclo(nome=nome, status='aberto', inicio=agora)
+    db.session.add(ciclo)
+    db.session.commit()
+    _ciclos_alterados()
+    return ciclo
+
+
+def encerrar_ciclo(ciclo):
+    """Encerra o ciclo aberto sem abrir outro: novas avaliações ficam bloqueadas"""
+    if ciclo.status != 'aberto':
+        raise ValueError('O ciclo já está encerrado')
+    ciclo.status = 'encerrado'
+    ciclo.fim = datetime.utcnow()
+    db.session.commit()
+    _ciclos_alterados()
+    return ciclo
+
+
+def arquivar_ciclo(ciclo):
+    """Move as avaliações de um ciclo encerrado para avaliacao_arquivo, em uma transação.
+
+    avaliacao e os seus índices ficam só com os ciclos recentes; o histórico
+    continua nos relatórios de tendência. Retorna o número de avaliações movidas.
+    """
+    if ciclo.status == 'aberto':
+        raise ValueError('Encerre o ciclo antes de arquivá-lo')
+    if ciclo.arquivado:
+        raise ValueError('O ciclo já está arquivado')
+
+    colunas = [coluna.name for coluna in Avaliacao.__table__.columns]
+    db.session.execute(insert(AvaliacaoArquivo).from_select(
+        colunas,
+        select(*[Avaliacao.__table__.c[coluna] for coluna in colunas]).where(Avaliacao.ciclo_id == ciclo.id)
+    ))
+    total = db.session.execute(
+        delete(Avaliacao).where(Avaliacao.ciclo_id == ciclo.id).execution_options(synchronize_session=False)
+    ).rowcount
+    ciclo.arquivado_em = datetime.utcnow()
+    db.session.commit()
+    invalidar(CICLOS, AVALIACOES)
+    return total
+
+
+def listar_ciclos():
+    """Ciclos do mais recente ao mais antigo, com o total de avaliações de cada um"""
+    totais = {}
+    for modelo in (Avaliacao, AvaliacaoArquivo):
+        # Contagem pelo índice iniciado por ciclo_id, sem ler as linhas
+        totais.update(db.session.execute(
+            select(modelo.ciclo_id, func.count()).group_by(modelo.ciclo_id)
+        ).all())
+    ciclos = Ciclo.query.order_by(Ciclo.inicio.desc(), Ciclo.id.desc()).all()
+    return [dict(ciclo.to_dict(), total_avaliacoes=totais.get(ciclo.id, 0)) for ciclo in ciclos]
+
+
+def _arredondar(valor):
+    return round(valor, 2) if valor is not None else None
+
+
+def tendencias(avaliado_id=None):
+    """Médias de cada ciclo, do mais antigo ao mais recente, em avaliacao e avaliacao_arquivo.
+
+    Cada ciclo está em uma só das tabelas. O filtro ciclo_id IN (...) em
+    cada uma permite ao SQLite usar os índices iniciados por ciclo_id mesmo
+    quando só o avaliado é informado.
+    """
+    ciclos = Ciclo.query.order_by(Ciclo.inicio, Ciclo.id).all()
+    partes = []
+    for modelo, arquivados in ((Avaliacao, False), (AvaliacaoArquivo, True)):
+        ids = [ciclo.id for ciclo in ciclos if ciclo.arquivado == arquivados]
+        if not ids:
+            continue
+        consulta = select(
+            modelo.ciclo_id, modelo.avaliador_id, modelo.avaliado_id, modelo.tipo_avaliacao, modelo.media_geral,
+            *[getattr(modelo, criterio) for criterio in CRITERIOS]
+        ).where(modelo.ciclo_id.in_(ids))
+        if avaliado_id is not None:
+            consulta = consulta.where(modelo.avaliado_id == avaliado_id)
+        partes.append(consulta)
+    if not partes:
+        return []
+
+    avaliacoes = (union_all(*partes) if len(partes) > 1 else partes[0]).subquery()
+    eh_gestor = avaliacoes.c.tipo_avaliacao == 'subordinado'
+    eh_autoavaliacao = and_(
+        avaliacoes.c.tipo_avaliacao == 'autoavaliacao',
+        avaliacoes.c.avaliador_id == avaliacoes.c.avaliado_id
+    )
+    linhas = db.session.execute(
+        select(
+            avaliacoes.c.ciclo_id,
+            func.count().label('total_avaliacoes'),
+            func.avg(avaliacoes.c.media_geral).label('media_geral'),
+            func.avg(case((eh_gestor, avaliacoes.c.media_geral))).label('media_gestor'),
+            func.avg(case((eh_autoavaliacao, avaliacoes.c.media_geral))).label('media_auto'),
+            *[func.avg(avaliacoes.c[criterio]).label(criterio) for criterio in CRITERIOS]
+        ).group_by(avaliacoes.c.ciclo_id)
+    ).all()
+    por_ciclo = {linha.ciclo_id: linha for linha in linhas}
+
+    resultado = []
+    anterior = None
+    for ciclo in ciclos:
+        linha = por_ciclo.get(ciclo.id)
+        media_geral = _arredondar(linha.media_geral) if linha else None
+        resultado.append({
+            'ciclo': ciclo.to_dict(),
+            'total_avaliacoes': linha.total_avaliacoes if linha else 0,
+            'media_geral': media_geral,
+            'media_gestor': _arredondar(linha.media_gestor) if linha else None,
+            'media_auto': _arredondar(linha.media_auto) if linha else None,
+            'medias_criterios': {
+                criterio: _arredondar(getattr(linha, criterio)) if linha else None for criterio in CRITERIOS
+            },
+            # Diferença para o ciclo anterior com avaliações
+            'variacao': round(media_geral - anterior, 2) if media_geral is not None and anterior is not None else None
+        })
+        if media_geral is not None:
+            anterior = media_geral
+    return resultado
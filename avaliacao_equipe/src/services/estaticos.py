@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Response, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # sem o pacote Brotli, só gzip
+    brotli = None
+
+# Páginas de entrada: mantêm o nome (as URLs são fixas) e são revalidadas a
+# cada uso; os demais arquivos recebem o hash do conteúdo no nome e nunca mudam
+PAGINAS = ('index.html', 'login.html', 'ranking_geral.html')
+COMPRIMIVEIS = ('.html', '.js', '.css', '.ico', '.svg', '.json', '.txt')
+MANIFESTO = 'manifest.json'
+# Sufixo do arquivo de cada Content-Encoding
+SUFIXOS = {'gzip': 'gz', 'br': 'br'}
+UM_ANO = 365 * 24 * 3600
+# href="script.js" / src="logo-globo.jpg" nas páginas
+REFERENCIA = re.compile(r'\b(href|src)="([^"/:?#]+)"')
+
+
+def _impressao(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:12]
+
+
+def _comprimir(conteudo):
+    """Versões comprimidas que valem a pena, por codificação (Content-Encoding)"""
+    versoes = {'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versoes['br'] = brotli.compress(conteudo, quality=11)
+    return {codificacao: corpo for codificacao, corpo in versoes.items() if len(corpo) < len(conteudo)}
+
+
+def _gravar(destino, arquivo, conteudo, comprimiveis):
+    with open(os.path.join(destino, arquivo), 'wb') as f:
+        f.write(conteudo)
+    versoes = _comprimir(conteudo) if arquivo.endswith(comprimiveis) else {}
+    for codificacao, corpo in versoes.items():
+        with open(os.path.join(destino, f'{arquivo}.{SUFIXOS[codificacao]}'), 'wb') as f:
+            f.write(corpo)
+    return {codificacao: len(corpo) for codificacao, corpo in versoes.items()}
+
+
+def construir_estaticos(origem, destino):
+    """Gera em `destino` os arquivos de `origem` com hash no nome, as versões
+    gzip/brotli e o manifesto nome -> arquivo gerado.
+
+    As páginas são reescritas para apontar para os nomes com hash. Arquivos
+    de builds anteriores ficam: navegadores com uma página antiga ainda os
+    encontram durante a troca de versão. Retorna o manifesto.
+    """
+    os.makedirs(destino, exist_ok=True)
+    manifesto = {}
+    nomes = sorted(nome for nome in os.listdir(origem) if os.path.isfile(os.path.join(origem, nome)))
+
+    for nome in nomes:
+        if nome in PAGINAS:
+            continue
+        with open(os.path.join(origem, nome), 'rb') as f:
+            conteudo = f.read()
+        impressao = _impressao(conteudo)
+        base, extensao = os.path.splitext(nome)
+        arquivo = f'{base}.{impressao}{extensao}'
+        manifesto[nome] = {
+            'arquivo': arquivo, 'etag': impressao, 'imutavel': True, 'tamanho': len(conteudo),
+            'codificacoes': _gravar(destino, arquivo, conteudo, COMPRIMIVEIS),
+        }
+
+    def trocar(encontrado):
+        entrada = manifesto.get(encontrado.group(2))
+        return f'{encontrado.group(1)}="{entrada["arquivo"]}"' if entrada else encontrado.group(0)
+
+    for nome in nomes:
+        if nome not in PAGINAS:
+            continue
+        with open(os.path.join(origem, nome), encoding='utf-8') as f:
+            conteudo = REFERENCIA.sub(trocar, f.read()).encode('utf-8')
+        manifesto[nome] = {
+            'arquivo': nome, 'etag': _impressao(conteudo), 'imutavel': False, 'tamanho': len(conteudo),
+            'codificacoes': _gravar(destino, nome, conteudo, COMPRIMIVEIS),
+        }
+
+    with open(os.path.join(destino, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    return manifesto
+
+
+class Estaticos:
+    """Serve os arquivos do build a partir do manifesto carregado na inicialização.
+
+    Cada arquivo (e cada versão comprimida) é lido do disco no primeiro uso e
+    fica em memória: uma requisição não faz stat nem open.
+    """
+
+    def __init__(self, diretorio, manifesto):
+        self.diretorio = diretorio
+        self._entradas = {}
+        for nome, entrada in manifesto.items():
+            self._entradas[entrada['arquivo']] = entrada
+            # O nome sem hash continua válido, mas é revalidado a cada uso
+            self._entradas.setdefault(nome, dict(entrada, imutavel=False))
+        self._conteudos = {}
+
+    def __contains__(self, nome):
+        return nome in self._entradas
+
+    def _ler(self, arquivo):
+        conteudo = self._conteudos.get(arquivo)
+        if conteudo is None:
+            with open(os.path.join(self.diretorio, arquivo), 'rb') as f:
+                conteudo = self._conteudos[arquivo] = f.read()
+        return conteudo
+
+    def responder(self, nome):
+        entrada = self._entradas[nome]
+        codificacao = request.accept_encodings.best_match(list(entrada['codificacoes']))
+        arquivo = f"{entrada['arquivo']}.{SUFIXOS[codificacao]}" if codificacao else entrada['arquivo']
+
+        resposta = Response(self._ler(arquivo), mimetype=mimetypes.guess_type(entrada['arquivo'])[0])
+        if codificacao:
+            resposta.content_encoding = codificacao
+        resposta.vary.add('Accept-Encoding')
+        # Cada codificação é uma representação diferente: ETag própria
+        resposta.set_etag(f"{entrada['etag']}-{codificacao or 'identity'}")
+        if entrada['imutavel']:
+            resposta.cache_control.public = True
+            resposta.cache_control.max_age = UM_ANO
+            resposta.cache_control.immutable = True
+        else:
+            resposta.cache_control.no_cache = True
+        return resposta.make_conditional(request)
+
+
+class EstaticosOrigem:
+    """Sem build: serve direto da pasta de origem, sem hash nem compressão
+    (desenvolvimento). A lista de arquivos é lida uma vez na inicialização."""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self._nomes = {nome for nome in os.listdir(diretorio) if os.path.isfile(os.path.join(diretorio, nome))}
+
+    def __contains__(self, nome):
+        return nome in self._nomes
+
+    def responder(self, nome):
+        return send_from_directory(self.diretorio, nome, max_age=0)
+
+
+def configurar_estaticos(app):
+    """Carrega o manifesto de ESTATICOS_BUILD (gerado por `flask build-assets`);
+    sem ele, serve a pasta static como está"""
+    destino = app.config['ESTATICOS_BUILD']
+    try:
+        with open(os.path.join(destino, MANIFESTO), encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except FileNotFoundError:
+        estaticos = EstaticosOrigem(app.static_folder)
+    else:
+        estaticos = Estaticos(destino, manifesto)
+        gerado = os.path.getmtime(os.path.join(destino, MANIFESTO))
+        alterados = [nome for nome in os.listdir(app.static_folder)
+                     if os.path.getmtime(os.path.join(app.static_folder, nome)) > gerado]
+        if alterados:
+            app.logger.warning('Estáticos alterados depois do build (%s): rode `flask build-assets`',
+                               ', '.join(sorted(alterados)))
+    app.extensions['estaticos'] = estaticos
+    return estaticos
+
+
+def servir_estatico(nome):
+    """Resposta para o arquivo estático `nome`, ou None se não existir"""
+    estaticos = current_app.extensions['estaticos']
+    if nome not in estaticos:
+        return None
+    return estaticos.responder(nome)
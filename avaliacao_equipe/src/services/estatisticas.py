@@ -0,0 +1,157 @@
+from src.models.avaliacao import Avaliacao, db
+from src.models.hierarquia import UsuarioHierarquia
+from src.services.ciclos import ciclo_aberto_id
+from src.services.pontuacao import carregar_notas, resumir_notas
+
+
+def _primeira_por_avaliado(avaliacoes):
+    """Indexa avaliações por avaliado_id mantendo a primeira encontrada"""
+    resultado = {}
+    for avaliacao in avaliacoes:
+        resultado.setdefault(avaliacao.avaliado_id, avaliacao)
+    return resultado
+
+
+def buscar_autoavaliacoes(usuarios_ids):
+    """Autoavaliações de vários usuários no ciclo aberto, em uma única consulta (IN)"""
+    if not usuarios_ids:
+        return {}
+
+    autoavaliacoes = Avaliacao.query.filter(
+        Avaliacao.ciclo_id == ciclo_aberto_id(),
+        Avaliacao.avaliador_id.in_(usuarios_ids),
+        Avaliacao.avaliado_id == Avaliacao.avaliador_id,
+        Avaliacao.tipo_avaliacao == 'autoavaliacao'
+    ).order_by(Avaliacao.id).all()
+    return _primeira_por_avaliado(autoavaliacoes)
+
+
+def _comparativo_gestor(usuario, avaliacoes_feitas):
+    """Comparativo e ranking dos subordinados montados em memória"""
+    subordinados = usuario.get_subordinados()
+
+    avaliacoes_gestor = _primeira_por_avaliado(
+        av for av in avaliacoes_feitas if av.tipo_avaliacao == 'subordinado'
+    )
+    autoavaliacoes = buscar_autoavaliacoes([sub.id for sub in subordinados])
+
+    comparativo = []
+    subordinados_com_avaliacao = []
+
+    for subordinado in subordinados:
+        avaliacao_gestor = avaliacoes_gestor.get(subordinado.id)
+        autoavaliacao = autoavaliacoes.get(subordinado.id)
+
+        # Incluir no comparativo se houver pelo menos uma das avaliações
+        if not avaliacao_gestor and not autoavaliacao:
+            continue
+
+        avaliacao_media = avaliacao_gestor.media_geral if avaliacao_gestor else None
+        auto_media = autoavaliacao.media_geral if autoavaliacao else None
+
+        diferenca = None
+        if avaliacao_media is not None and auto_media is not None:
+            diferenca = round(avaliacao_media - auto_media, 1)
+
+        comparativo.append({
+            'funcionario': subordinado.nome,
+            'cargo': subordinado.cargo,
+            'avaliacao_gestor': avaliacao_media,
+            'autoavaliacao': auto_media,
+            'diferenca': diferenca,
+            'notas_detalhadas_gestor': avaliacao_gestor.notas_detalhadas() if avaliacao_gestor else None,
+            'notas_detalhadas_auto': autoavaliacao.notas_detalhadas() if autoavaliacao else None
+        })
+
+        # Para ranking, incluir apenas subordinados com avaliação do gestor
+        if avaliacao_gestor:
+            subordinados_com_avaliacao.append({
+                'funcionario': subordinado.nome,
+                'cargo': subordinado.cargo,
+                'media_geral': avaliacao_gestor.media_geral,
+                'avaliacao_id': avaliacao_gestor.id,
+                'autoavaliacao': auto_media
+            })
+
+    # Ranking ordenado por média geral (maior para menor)
+    ranking = sorted(subordinados_com_avaliacao, key=lambda x: x['media_geral'], reverse=True)
+    return comparativo, ranking
+
+
+def _comparativo_funcionario(usuario, avaliacoes_feitas):
+    """Para funcionários, apenas a autoavaliação (sem avaliação do gestor)"""
+    autoavaliacao = next(
+        (av for av in avaliacoes_feitas
+         if av.avaliado_id == usuario.id and av.tipo_avaliacao == 'autoavaliacao'),
+        None
+    )
+    if not autoavaliacao:
+        return []
+
+    return [{
+        'funcionario': usuario.nome,
+        'cargo': usuario.cargo,
+        'avaliacao_gestor': None,  # Ocultar para funcionários
+        'autoavaliacao': autoavaliacao.media_geral,
+        'diferenca': None,  # Sem comparação para funcionários
+        'notas_detalhadas_gestor': None,  # Ocultar para funcionários
+        'notas_detalhadas_auto': autoavaliacao.notas_detalhadas()
+    }]
+
+
+def _resumo_equipe(usuario):
+    """Médias e distribuição por critério das avaliações de gestor recebidas por
+    toda a equipe (subordinados diretos e indiretos), calculadas com NumPy"""
+    if usuario.tipo != 'gestor':
+        return None
+    equipe = db.session.query(UsuarioHierarquia.descendente_id).filter(
+        UsuarioHierarquia.ancestral_id == usuario.id
+    )
+    _, matriz = carregar_notas(
+        Avaliacao.ciclo_id == ciclo_aberto_id(),
+        Avaliacao.avaliado_id.in_(equipe.scalar_subquery()),
+        Avaliacao.tipo_avaliacao == 'subordinado'
+    )
+    return resumir_notas(matriz)
+
+
+def calcular_estatisticas(usuario):
+    """Estatísticas do painel no ciclo aberto, com número constante de consultas.
+
+    Busca as avaliações feitas pelo usuário, os subordinados e as
+    autoavaliações deles (uma consulta cada) e monta comparativo e ranking
+    em memória, independentemente do tamanho da equipe. Para gestores, mais
+    uma consulta traz as notas da equipe inteira para o resumo por critério.
+    """
+    avaliacoes_feitas = Avaliacao.query.filter_by(
+        ciclo_id=ciclo_aberto_id(), avaliador_id=usuario.id
+    ).order_by(Avaliacao.id).all()
+
+    if not avaliacoes_feitas:
+        return {
+            'total_avaliacoes': 0,
+            'funcionarios_avaliados': 0,
+            'media_geral': 0,
+            'comparativo_auto_avaliacao': [],
+            'ranking_subordinados': [],
+            'resumo_equipe': _resumo_equipe(usuario)
+        }
+
+    total_avaliacoes = len(avaliacoes_feitas)
+    funcionarios_avaliados = len(set(av.avaliado_id for av in avaliacoes_feitas))
+    media_geral = round(sum(av.media_geral for av in avaliacoes_feitas if av.media_geral) / total_avaliacoes, 1)
+
+    ranking = []
+    if usuario.tipo == 'gestor':
+        comparativo, ranking = _comparativo_gestor(usuario, avaliacoes_feitas)
+    else:
+        comparativo = _comparativo_funcionario(usuario, avaliacoes_feitas)
+
+    return {
+        'total_avaliacoes': total_avaliacoes,
+        'funcionarios_avaliados': funcionarios_avaliados,
+        'media_geral': media_geral,
+        'comparativo_auto_avaliacao': comparativo,
+        'ranking_subordinados': ranking,
+        'resumo_equipe': _resumo_equipe(usuario)
+    }
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.usuario import Usuario
+
+# Linhas lidas do cursor por vez e linhas acumuladas antes de cada envio
+LOTE_CURSOR = 1000
+LINHAS_POR_ENVIO = 500
+
+COLUNAS = (
+    'id', 'ciclo_id', 'data_avaliacao', 'tipo_avaliacao',
+    'avaliador_id', 'avaliador_nome',
+    'avaliado_id', 'avaliado_nome', 'avaliado_cargo', 'avaliado_regiao',
+) + CRITERIOS + ('media_geral', 'pontos_fortes', 'pontos_desenvolver')
+
+
+def _consulta(ciclo_id, modelo):
+    """Avaliações do ciclo com nomes de avaliador e avaliado, lidas do cursor em lotes"""
+    avaliador = aliased(Usuario)
+    avaliado = aliased(Usuario)
+    colunas = [
+        modelo.id, modelo.ciclo_id, modelo.data_avaliacao, modelo.tipo_avaliacao,
+        modelo.avaliador_id, avaliador.nome.label('avaliador_nome'),
+        modelo.avaliado_id, avaliado.nome.label('avaliado_nome'),
+        avaliado.cargo.label('avaliado_cargo'), avaliado.regiao.label('avaliado_regiao'),
+    ]
+    colunas += [getattr(modelo, criterio) for criterio in CRITERIOS]
+    colunas += [modelo.media_geral, modelo.pontos_fortes, modelo.pontos_desenvolver]
+
+    stmt = (
+        select(*colunas)
+        .outerjoin(avaliador, avaliador.id == modelo.avaliador_id)
+        .outerjoin(avaliado, avaliado.id == modelo.avaliado_id)
+        .where(modelo.ciclo_id == ciclo_id)
+        .order_by(modelo.id)
+        .execution_options(yield_per=LOTE_CURSOR)
+    )
+    return db.session.execute(stmt)
+
+
+def _valores(linha):
+    valores = linha._asdict()
+    if valores['data_avaliacao'] is not None:
+        valores['data_avaliacao'] = valores['data_avaliacao'].isoformat()
+    return valores
+
+
+def exportar_csv(ciclo_id, modelo=Avaliacao):
+    """Gera o CSV em pedaços; o cabeçalho sai antes da primeira consulta"""
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=COLUNAS)
+    escritor.writeheader()
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    for numero, linha in enumerate(_consulta(ciclo_id, modelo), start=1):
+        escritor.writerow(_valores(linha))
+        if numero % LINHAS_POR_ENVIO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def exportar_ndjson(ciclo_id, modelo=Avaliacao):
+    """Gera um objeto JSON por linha (NDJSON), em pedaços"""
+    pedaco = []
+    for linha in _consulta(ciclo_id, modelo):
+        pedaco.append(json.dumps(_valores(linha), ensure_ascii=False))
+        if len(pedaco) == LINHAS_POR_ENVIO:
+            yield '\n'.join(pedaco) + '\n'
+            pedaco = []
+
+    if pedaco:
+        yield '\n'.join(pedaco) + '\n'
+
+
+FORMATOS = {
+    'csv': (exportar_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (exportar_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,116 @@
+from collections import defaultdict
+
+from sqlalchemy import bindparam, delete, exists, insert, literal, select, update
+
+from src.models.avaliacao import db
+from src.models.hierarquia import UsuarioHierarquia
+from src.models.usuario import Usuario
+from src.services.identidade import cache_usuarios
+
+# Tabelas usadas em SQL Core: funcionam tanto com db.session quanto com
+# uma conexão crua (como a usada em src/migrations.py)
+usuario = Usuario.__table__
+hierarquia = UsuarioHierarquia.__table__
+
+
+def _normalizar(nome):
+    return ' '.join((nome or '').split()).casefold()
+
+
+def resolver_gestores(executor=None, so_sem_gestor=False):
+    """Converte gestor_imediato (nome) em gestor_id para todos os usuários,
+    ou, com `so_sem_gestor`, só para os que ainda têm gestor_id nulo.
+
+    Nomes sem correspondência ou repetidos entre usuários não são resolvidos
+    e ficam com gestor_id nulo; ambos aparecem no relatório retornado.
+    """
+    executor = executor or db.session
+    usuarios = executor.execute(
+        select(usuario.c.id, usuario.c.nome, usuario.c.gestor_imediato, usuario.c.gestor_id)
+    ).all()
+
+    ids_por_nome = defaultdict(list)
+    for u in usuarios:
+        ids_por_nome[_normalizar(u.nome)].append(u.id)
+
+    relatorio = {'resolvidos': 0, 'sem_gestor': 0, 'nao_encontrados': set(), 'ambiguos': set()}
+    alteracoes = []
+    for u in usuarios:
+        if so_sem_gestor and u.gestor_id is not None:
+            continue
+        nome_gestor = _normalizar(u.gestor_imediato)
+        candidatos = [id_ for id_ in ids_por_nome.get(nome_gestor, []) if id_ != u.id]
+        gestor_id = None
+
+        if not nome_gestor:
+            relatorio['sem_gestor'] += 1
+        elif len(candidatos) == 1:
+            gestor_id = candidatos[0]
+            relatorio['resolvidos'] += 1
+        elif candidatos:
+            relatorio['ambiguos'].add(u.gestor_imediato)
+        else:
+            relatorio['nao_encontrados'].add(u.gestor_imediato)
+
+        if gestor_id != u.gestor_id:
+            alteracoes.append({'usuario_id': u.id, 'novo_gestor_id': gestor_id})
+
+    if alteracoes:
+        executor.execute(
+            update(usuario)
+            .where(usuario.c.id == bindparam('usuario_id'))
+            .values(gestor_id=bindparam('novo_gestor_id')),
+            alteracoes
+        )
+
+    relatorio['alterados'] = len(alteracoes)
+    relatorio['nao_encontrados'] = sorted(relatorio['nao_encontrados'])
+    relatorio['ambiguos'] = sorted(relatorio['ambiguos'])
+    return relatorio
+
+
+def reconstruir_hierarquia(executor=None):
+    """Recalcula a tabela de fechamento a partir de gestor_id e retorna o número de níveis.
+
+    Um INSERT ... SELECT por nível da árvore: o custo em consultas é a
+    profundidade do organograma, não o número de usuários. Ciclos nos dados
+    não travam o processo, pois cada par é inserido uma única vez.
+    """
+    executor = executor or db.session
+    colunas = ['ancestral_id', 'descendente_id', 'profundidade']
+
+    executor.execute(delete(hierarquia))
+    diretos = executor.execute(insert(hierarquia).from_select(colunas, select(
+        usuario.c.gestor_id, usuario.c.id, literal(1)
+    ).where(usuario.c.gestor_id.isnot(None), usuario.c.gestor_id != usuario.c.id))).rowcount
+    if not diretos:
+        return 0
+
+    profundidade = 1
+    while True:
+        existente = hierarquia.alias('existente')
+        proximo_nivel = select(
+            hierarquia.c.ancestral_id, usuario.c.id, literal(profundidade + 1)
+        ).select_from(
+            hierarquia.join(usuario, usuario.c.gestor_id == hierarquia.c.descendente_id)
+        ).where(
+            hierarquia.c.profundidade == profundidade,
+            usuario.c.id != hierarquia.c.ancestral_id,
+            ~exists().where(
+                existente.c.ancestral_id == hierarquia.c.ancestral_id,
+                existente.c.descendente_id == usuario.c.id
+            )
+        )
+        inseridos = executor.execute(insert(hierarquia).from_select(colunas, proximo_nivel)).rowcount
+        if not inseridos:
+            return profundidade
+        profundidade += 1
+
+
+def sincronizar_hierarquia(executor=None):
+    """Resolve os nomes de gestor e reconstrói a tabela de fechamento"""
+    relatorio = resolver_gestores(executor)
+    relatorio['niveis'] = reconstruir_hierarquia(executor)
+    # gestor_id foi alterado em lote, sem passar pelos eventos do ORM
+    cache_usuarios.limpar()
+    return relatorio
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from flask import current_app, g, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached, object_session
+
+from src.models.avaliacao import db
+from src.models.usuario import Usuario
+from src.services.sessoes import revogar_sessoes_no_commit
+
+
+class CacheUsuarios:
+    """Cache por processo dos dados do Usuario, com expiração curta (TTL).
+
+    Guarda apenas os valores das colunas; a cada acerto o objeto é reanexado
+    à sessão do SQLAlchemy sem ir ao banco (merge com load=False). Cada worker
+    do gunicorn tem o seu cache, por isso o TTL deve ser curto: é o tempo
+    máximo que uma desativação feita em outro processo leva para valer aqui.
+    """
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def obter(self, user_id):
+        with self._lock:
+            item = self._dados.get(user_id)
+        if item is None:
+            return None
+        expira_em, colunas = item
+        if expira_em < time.monotonic():
+            self.invalidar(user_id)
+            return None
+        usuario = Usuario(**colunas)
+        make_transient_to_detached(usuario)
+        return db.session.merge(usuario, load=False)
+
+    def guardar(self, usuario, ttl):
+        colunas = {coluna.key: getattr(usuario, coluna.key) for coluna in Usuario.__table__.columns}
+        with self._lock:
+            self._dados[usuario.id] = (time.monotonic() + ttl, colunas)
+
+    def invalidar(self, user_id):
+        with self._lock:
+            self._dados.pop(user_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+cache_usuarios = CacheUsuarios()
+
+
+@event.listens_for(Usuario, 'after_update')
+@event.listens_for(Usuario, 'after_delete')
+def _invalidar_usuario(mapper, connection, usuario):
+    """Alteração (ex.: desativação) de um usuário pelo ORM invalida o cache"""
+    cache_usuarios.invalidar(usuario.id)
+
+
+@event.listens_for(Usuario, 'after_update')
+def _revogar_se_mudou_acesso(mapper, connection, usuario):
+    """Sessões guardam tipo e ativo: mudar qualquer um dos dois encerra as
+    sessões do usuário, depois do commit que grava a mudança"""
+    estado = inspect(usuario)
+    if estado.attrs.ativo.history.has_changes() or estado.attrs.tipo.history.has_changes():
+        revogar_sessoes_no_commit(object_session(usuario), usuario.id)
+
+
+@event.listens_for(Usuario, 'after_delete')
+def _revogar_removido(mapper, connection, usuario):
+    revogar_sessoes_no_commit(object_session(usuario), usuario.id)
+
+
+def usuario_atual():
+    """Usuário logado, carregado no máximo uma vez por requisição e guardado em g.
+
+    A resolução acontece no primeiro uso, e não em um before_request, para que
+    os arquivos estáticos servidos pela rota catch-all não paguem a consulta.
+    Usa o cache por processo quando USUARIO_CACHE_TTL (segundos) é maior que
+    zero. Retorna None se não houver sessão ou se o usuário não existir; a
+    verificação de `ativo` fica a cargo de quem chama.
+    """
+    if 'usuario' in g:
+        return g.usuario
+
+    user_id = session.get('user_id')
+    usuario = None
+    if user_id:
+        ttl = current_app.config.get('USUARIO_CACHE_TTL', 0)
+        if ttl > 0:
+            usuario = cache_usuarios.obter(user_id)
+        if usuario is None:
+            usuario = db.session.get(Usuario, user_id)
+            if usuario is not None and ttl > 0:
+                cache_usuarios.guardar(usuario, ttl)
+
+    g.usuario = usuario
+    return usuario
+
+
+def guardar_acesso_na_sessao(usuario):
+    """Grava na sessão o que as rotas restritas por papel verificam"""
+    session['user_tipo'] = usuario.tipo
+    session['user_ativo'] = bool(usuario.ativo)
+
+
+def papel_na_sessao():
+    """(tipo, ativo) do usuário logado, lidos da sessão, sem consulta ao banco.
+
+    Ficam na sessão (no servidor) desde o login e as mudanças em tipo ou
+    ativo revogam as sessões do usuário. Sessões sem esses dados (criadas
+    antes deles) buscam o usuário uma vez e passam a tê-los.
+    """
+    if 'user_tipo' not in session or 'user_ativo' not in session:
+        usuario = usuario_atual()
+        if usuario is None:
+            return None, False
+        guardar_acesso_na_sessao(usuario)
+    return session['user_tipo'], session['user_ativo']
@@ -0,0 +1,247 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import islice
+
+from sqlalchemy import insert, or_, update
+
+from src.models.avaliacao import db
+from src.models.usuario import Usuario
+from src.services.cache import USUARIOS, invalidar
+from src.services.sessoes import revogar_sessoes_no_commit
+from src.services.hierarquia import sincronizar_hierarquia
+
+TAMANHO_LOTE = 1000
+
+# Colunas aceitas na planilha de usuários
+CAMPOS = (
+    'matricula', 'nome', 'email', 'cargo', 'regiao', 'gestor_imediato',
+    'nivel_hierarquico', 'vinculo', 'data_admissao', 'tipo', 'ativo'
+)
+
+MAX_ERROS_RELATORIO = 100
+
+
+# Leitores: recebem o arquivo em modo binário e produzem um dict por usuário
+# sem carregar o arquivo inteiro (exceto JSON comum, que não permite leitura
+# incremental; para arquivos grandes use NDJSON)
+
+def ler_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    primeira_linha = texto.readline()
+    delimitador = ';' if primeira_linha.count(';') > primeira_linha.count(',') else ','
+    yield from csv.DictReader(_encadear(primeira_linha, texto), delimiter=delimitador)
+
+
+def _encadear(primeira_linha, restante):
+    yield primeira_linha
+    yield from restante
+
+
+def ler_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Importação de XLSX requer o pacote openpyxl')
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [str(coluna).strip() if coluna is not None else '' for coluna in next(linhas, [])]
+    for linha in linhas:
+        if any(valor is not None for valor in linha):
+            yield dict(zip(cabecalho, linha))
+
+
+def ler_json(arquivo):
+    dados = json.load(arquivo)
+    yield from dados['usuarios'] if isinstance(dados, dict) else dados
+
+
+def ler_ndjson(arquivo):
+    for linha in arquivo:
+        linha = linha.strip()
+        if linha:
+            yield json.loads(linha)
+
+
+LEITORES = {
+    'csv': ler_csv,
+    'xlsx': ler_xlsx,
+    'json': ler_json,
+    'ndjson': ler_ndjson,
+}
+
+
+def formato_do_arquivo(nome):
+    extensao = nome.rsplit('.', 1)[-1].lower() if '.' in nome else ''
+    if extensao == 'jsonl':
+        extensao = 'ndjson'
+    if extensao not in LEITORES:
+        raise ValueError(f"Formato não suportado: use {', '.join(LEITORES)}")
+    return extensao
+
+
+def _data(valor):
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(valor).strip(), formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Data inválida: {valor}')
+
+
+def _booleano(valor):
+    if isinstance(valor, str):
+        return valor.strip().lower() not in ('0', 'false', 'nao', 'não', 'n', '')
+    return bool(valor)
+
+
+def normalizar(registro):
+    """Converte um registro lido do arquivo nas colunas de Usuario"""
+    dados = {}
+    for campo in CAMPOS:
+        if campo not in registro:
+            continue
+        valor = registro[campo]
+        if isinstance(valor, str):
+            valor = valor.strip()
+        dados[campo] = valor if valor != '' else None
+
+    if not dados.get('email') or not dados.get('nome') or dados.get('matricula') is None:
+        raise ValueError('matricula, nome e email são obrigatórios')
+
+    dados['email'] = dados['email'].lower()
+    try:
+        dados['matricula'] = int(dados['matricula'])
+    except (TypeError, ValueError):
+        raise ValueError(f"Matrícula inválida: {dados['matricula']}")
+    if 'data_admissao' in dados:
+        dados['data_admissao'] = _data(dados['data_admissao'])
+    if 'ativo' in dados:
+        dados['ativo'] = _booleano(dados['ativo'])
+    return dados
+
+
+def _lotes(registros, tamanho):
+    iterador = iter(registros)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _importar_lote(lote, numero_inicial, relatorio):
+    """Upsert de um lote: uma consulta para os existentes, um INSERT e um UPDATE em lote"""
+    por_email = {}
+    for numero, registro in enumerate(lote, start=numero_inicial):
+        try:
+            dados = normalizar(registro)
+        except (TypeError, ValueError) as e:
+            _registrar_erro(relatorio, numero, str(e))
+            continue
+        # Emails repetidos no mesmo lote: vale a última ocorrência
+        por_email[dados['email']] = (numero, dados)
+
+    if not por_email:
+        return
+
+    matriculas = {dados['matricula'] for _, dados in por_email.values()}
+    existentes = db.session.query(Usuario.id, Usuario.email, Usuario.matricula, Usuario.tipo, Usuario.ativo).filter(
+        or_(Usuario.email.in_(por_email.keys()), Usuario.matricula.in_(matriculas))
+    ).all()
+    id_por_email = {u.email.lower(): u.id for u in existentes}
+    id_por_matricula = {u.matricula: u.id for u in existentes}
+    acesso_por_id = {u.id: {'tipo': u.tipo, 'ativo': u.ativo} for u in existentes}
+
+    novos, alterados, matriculas_novas = [], [], set()
+    for numero, dados in por_email.values():
+        usuario_id = id_por_email.get(dados['email'])
+        dono_matricula = id_por_matricula.get(dados['matricula'])
+
+        if usuario_id is None:
+            # Email novo com matrícula conhecida: o email do usuário mudou
+            usuario_id = dono_matricula
+        elif dono_matricula not in (None, usuario_id):
+            _registrar_erro(relatorio, numero, f"Matrícula {dados['matricula']} pertence a outro usuário")
+            continue
+
+        if usuario_id is not None:
+            alterados.append(dict(dados, id=usuario_id))
+        elif dados['matricula'] in matriculas_novas:
+            _registrar_erro(relatorio, numero, f"Matrícula {dados['matricula']} repetida no arquivo")
+        else:
+            matriculas_novas.add(dados['matricula'])
+            dados.setdefault('tipo', 'funcionario')
+            novos.append(dados)
+
+    # Linhas com chaves diferentes não podem ir no mesmo executemany
+    for linhas in _agrupar_por_colunas(novos):
+        db.session.execute(insert(Usuario), linhas)
+    for linhas in _agrupar_por_colunas(alterados):
+        db.session.execute(update(Usuario), linhas)
+
+    # Desativados ou com o tipo alterado perdem as sessões abertas, após o commit do lote
+    revogar_sessoes_no_commit(db.session, *(
+        dados['id'] for dados in alterados
+        if any(campo in dados and dados[campo] != acesso_por_id[dados['id']][campo] for campo in ('tipo', 'ativo'))
+    ))
+
+    relatorio['criados'] += len(novos)
+    relatorio['atualizados'] += len(alterados)
+
+
+def _agrupar_por_colunas(linhas):
+    grupos = {}
+    for linha in linhas:
+        grupos.setdefault(tuple(sorted(linha)), []).append(linha)
+    return grupos.values()
+
+
+def _registrar_erro(relatorio, numero, mensagem):
+    relatorio['total_erros'] += 1
+    if len(relatorio['erros']) < MAX_ERROS_RELATORIO:
+        relatorio['erros'].append({'registro': numero, 'erro': mensagem})
+
+
+def importar_usuarios(registros, tamanho_lote=TAMANHO_LOTE, progresso=None):
+    """Importa (insere ou atualiza) usuários a partir de um iterável de dicts.
+
+    O email é a chave do upsert; a matrícula identifica o usuário quando o
+    email muda. Cada lote custa uma consulta de existentes e um INSERT/UPDATE
+    em lote, e é gravado com seu próprio commit, de modo que a memória não
+    cresce com o tamanho do arquivo. Ao final, gestor_imediato é resolvido em
+    gestor_id e a hierarquia é recalculada.
+
+    `progresso`, se informado, é chamado com o relatório parcial após cada lote.
+    """
+    # Importar aqui para evitar importação circular (paineis -> tarefas -> importacao)
+    from src.services.paineis import marcar_paineis
+
+    relatorio = {'lidos': 0, 'criados': 0, 'atualizados': 0, 'total_erros': 0, 'erros': []}
+    try:
+        for lote in _lotes(registros, tamanho_lote):
+            _importar_lote(lote, relatorio['lidos'] + 1, relatorio)
+            relatorio['lidos'] += len(lote)
+            db.session.commit()
+            if progresso:
+                progresso(relatorio)
+
+        relatorio['hierarquia'] = sincronizar_hierarquia()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Lotes já gravados também alteram rankings, estatísticas e painéis
+        invalidar(USUARIOS)
+        marcar_paineis()
+        db.session.commit()
+    return relatorio
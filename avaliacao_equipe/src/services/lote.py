@@ -0,0 +1,117 @@
+import numpy as np
+from sqlalchemy import insert
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.usuario import Usuario
+from src.services.pontuacao import converter_notas, medias_ponderadas
+from src.services.paineis import marcar_paineis
+from src.services.resumo import atualizar_resumos
+
+# Mesma lista exigida por POST /api/avaliacoes
+CAMPOS_OBRIGATORIOS = ['avaliado_id', 'tipo_avaliacao'] + list(CRITERIOS)
+
+
+def _erro(indice, status, mensagem):
+    return {'indice': indice, 'status': status, 'error': mensagem}
+
+
+def _validar_campos(data):
+    """Retorna os valores já convertidos ou a mensagem de erro do item"""
+    if not isinstance(data, dict):
+        return None, 'Item inválido'
+    for field in CAMPOS_OBRIGATORIOS:
+        if field not in data:
+            return None, f'Campo {field} é obrigatório'
+    try:
+        valores = {
+            'avaliado_id': int(data['avaliado_id']),
+            'tipo_avaliacao': data['tipo_avaliacao'],
+            'pontos_fortes': data.get('pontos_fortes'),
+            'pontos_desenvolver': data.get('pontos_desenvolver')
+        }
+    except (TypeError, ValueError):
+        return None, 'avaliado_id deve ser um número inteiro'
+    try:
+        valores.update(converter_notas(data))
+    except ValueError as e:
+        return None, str(e)
+    return valores, None
+
+
+def criar_avaliacoes_em_lote(usuario, itens, ciclo_id):
+    """Valida e grava várias avaliações do mesmo avaliador no ciclo `ciclo_id`, em uma transação.
+
+    Existência dos avaliados, permissão e duplicidade são verificadas com uma
+    consulta cada para o lote inteiro; os itens válidos são inseridos com um
+    único INSERT em lote e o resumo é atualizado antes do único commit.
+    Itens inválidos não impedem os demais: o resultado traz o status de cada
+    item, na ordem recebida.
+    """
+    resultados = [None] * len(itens)
+    validos = []
+    for indice, data in enumerate(itens):
+        valores, erro = _validar_campos(data)
+        if erro:
+            resultados[indice] = _erro(indice, 400, erro)
+        else:
+            validos.append((indice, valores))
+
+    ids = {valores['avaliado_id'] for _, valores in validos}
+    avaliados = {}
+    permitidos = set()
+    existentes = set()
+    if ids:
+        avaliados = {
+            avaliado.id: avaliado
+            for avaliado in Usuario.query.filter(Usuario.id.in_(ids), Usuario.ativo == True)
+        }
+        permitidos = usuario.filtrar_avaliaveis(avaliados.keys())
+        existentes = set(db.session.query(Avaliacao.avaliado_id, Avaliacao.tipo_avaliacao).filter(
+            Avaliacao.ciclo_id == ciclo_id,
+            Avaliacao.avaliador_id == usuario.id,
+            Avaliacao.avaliado_id.in_(ids)
+        ).all())
+
+    novas = []
+    for indice, valores in validos:
+        chave = (valores['avaliado_id'], valores['tipo_avaliacao'])
+        if valores['avaliado_id'] not in avaliados:
+            resultados[indice] = _erro(indice, 404, 'Usuário avaliado não encontrado')
+        elif valores['avaliado_id'] not in permitidos:
+            resultados[indice] = _erro(indice, 403, 'Você não tem permissão para avaliar este usuário')
+        elif chave in existentes:
+            resultados[indice] = _erro(indice, 400, f'Já existe uma {valores["tipo_avaliacao"]} para este usuário neste ciclo')
+        else:
+            # Duplicatas dentro do próprio lote também são recusadas
+            existentes.add(chave)
+            novas.append((indice, dict(valores, avaliador_id=usuario.id, ciclo_id=ciclo_id)))
+
+    if novas:
+        # Médias do lote inteiro de uma vez
+        matriz = np.array([[linha[criterio] for criterio in CRITERIOS] for _, linha in novas], dtype=np.float64)
+        for (_, linha), media in zip(novas, medias_ponderadas(matriz).tolist()):
+            linha['media_geral'] = media
+
+        # Um único INSERT em lote. O RETURNING não garante a ordem das linhas,
+        # mas (avaliado, tipo) é único dentro do lote e serve de chave
+        criadas = {
+            (avaliacao.avaliado_id, avaliacao.tipo_avaliacao): avaliacao
+            for avaliacao in db.session.scalars(
+                insert(Avaliacao).returning(Avaliacao),
+                [linha for _, linha in novas]
+            )
+        }
+        atualizar_resumos(linha['avaliado_id'] for _, linha in novas)
+        marcar_paineis([(usuario.id, linha['avaliado_id'], linha['tipo_avaliacao']) for _, linha in novas])
+
+        # Serializar antes do commit: após ele os objetos expiram e cada um
+        # seria recarregado individualmente
+        usuarios = dict(avaliados)
+        usuarios[usuario.id] = usuario
+        for indice, linha in novas:
+            avaliacao = criadas[(linha['avaliado_id'], linha['tipo_avaliacao'])]
+            resultados[indice] = {'indice': indice, 'status': 201, 'avaliacao': avaliacao.to_dict(usuarios)}
+
+        db.session.commit()
+
+    return resultados
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from src.models.avaliacao import db
+
+# Limites (le) dos histogramas
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas(self, nome, rotulos):
+        acumulado = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            acumulado += contagem
+            yield f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}'
+        yield f'{nome}_bucket{{{rotulos},le="+Inf"}} {self.total}'
+        yield f'{nome}_sum{{{rotulos}}} {self.soma:.6f}'
+        yield f'{nome}_count{{{rotulos}}} {self.total}'
+
+
+class Metricas:
+    """Métricas das requisições deste processo, por blueprint e endpoint.
+
+    Cada worker do gunicorn tem as suas: o /metrics de um worker mostra só
+    as requisições que ele atendeu.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def registrar(self, blueprint, endpoint, metodo, status, duracao, consultas, tempo_sql):
+        with self._lock:
+            serie = self._series.get((blueprint, endpoint, metodo))
+            if serie is None:
+                serie = self._series[(blueprint, endpoint, metodo)] = {
+                    'latencia': Histograma(LIMITES_LATENCIA),
+                    'consultas': Histograma(LIMITES_CONSULTAS),
+                    'tempo_sql': 0.0,
+                    'status': {},
+                }
+            serie['latencia'].observar(duracao)
+            serie['consultas'].observar(consultas)
+            serie['tempo_sql'] += tempo_sql
+            serie['status'][status] = serie['status'].get(status, 0) + 1
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus"""
+        linhas = [
+            '# HELP http_requisicoes_total Requisições atendidas por endpoint e status',
+            '# TYPE http_requisicoes_total counter',
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+            for (blueprint, endpoint, metodo), serie in series:
+                rotulos = f'blueprint="{blueprint}",endpoint="{endpoint}",metodo="{metodo}"'
+                for status, total in sorted(serie['status'].items()):
+                    linhas.append(f'http_requisicoes_total{{{rotulos},status="{status}"}} {total}')
+
+            linhas += [
+                '# HELP http_requisicao_duracao_segundos Latência total da requisição',
+                '# TYPE http_requisicao_duracao_segundos histogram',
+            ]
+            for (blueprint, endpoint, metodo), serie in series:
+                rotulos = f'blueprint="{blueprint}",endpoint="{endpoint}",metodo="{metodo}"'
+                linhas.extend(serie['latencia'].linhas('http_requisicao_duracao_segundos', rotulos))
+
+            linhas += [
+                '# HELP db_consultas_por_requisicao Consultas SQL executadas por requisição',
+                '# TYPE db_consultas_por_requisicao histogram',
+            ]
+            for (blueprint, endpoint, metodo), serie in series:
+                rotulos = f'blueprint="{blueprint}",endpoint="{endpoint}",metodo="{metodo}"'
+                linhas.extend(serie['consultas'].linhas('db_consultas_por_requisicao', rotulos))
+
+            linhas += [
+                '# HELP db_tempo_segundos_total Tempo gasto em SQL pelas requisições',
+                '# TYPE db_tempo_segundos_total counter',
+            ]
+            for (blueprint, endpoint, metodo), serie in series:
+                rotulos = f'blueprint="{blueprint}",endpoint="{endpoint}",metodo="{metodo}"'
+                linhas.append(f'db_tempo_segundos_total{{{rotulos}}} {serie["tempo_sql"]:.6f}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _antes_da_consulta(conexao, cursor, sql, parametros, contexto, varias):
+    conexao.info['metricas_inicio'] = time.perf_counter()
+
+
+def _depois_da_consulta(conexao, cursor, sql, parametros, contexto, varias):
+    # Fora de uma requisição (CLI, scripts) não há onde acumular
+    if has_app_context() and '_metricas_consultas' in g:
+        g._metricas_consultas += 1
+        g._metricas_sql += time.perf_counter() - conexao.info['metricas_inicio']
+
+
+def _iniciar_requisicao():
+    g._metricas_inicio = time.perf_counter()
+    g._metricas_consultas = 0
+    g._metricas_sql = 0.0
+
+
+def _finalizar_requisicao(resposta):
+    if '_metricas_inicio' not in g or request.endpoint == 'metricas':
+        return resposta
+
+    duracao = time.perf_counter() - g._metricas_inicio
+    consultas, tempo_sql = g._metricas_consultas, g._metricas_sql
+    resposta.headers['Server-Timing'] = (
+        f'db;dur={tempo_sql * 1000:.1f};desc="{consultas} consultas", total;dur={duracao * 1000:.1f}'
+    )
+
+    current_app.extensions['metricas'].registrar(
+        request.blueprint or '-', request.endpoint or '-', request.method,
+        resposta.status_code, duracao, consultas, tempo_sql,
+    )
+
+    limite = current_app.config['METRICAS_LIMITE_CONSULTAS']
+    if limite and consultas > limite:
+        current_app.logger.warning(
+            '%s %s (%s): %d consultas, %.1f ms em SQL, %.1f ms no total',
+            request.method, request.path, request.endpoint, consultas, tempo_sql * 1000, duracao * 1000,
+        )
+    return resposta
+
+
+def _exportar():
+    return Response(current_app.extensions['metricas'].exportar(),
+                    mimetype='text/plain; version=0.0.4')
+
+
+def configurar_metricas(app):
+    """Conta consultas e tempo de SQL por requisição e expõe /metrics.
+
+    Deve ser chamado depois de configurar_banco. METRICAS_HABILITADAS=0 desliga tudo.
+    """
+    app.config.setdefault('METRICAS_HABILITADAS', os.environ.get('METRICAS_HABILITADAS', '1') != '0')
+    # Requisições com mais consultas que isso são registradas no log (0 desativa)
+    app.config.setdefault('METRICAS_LIMITE_CONSULTAS', int(os.environ.get('METRICAS_LIMITE_CONSULTAS', 30)))
+    if not app.config['METRICAS_HABILITADAS']:
+        return None
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _antes_da_consulta)
+    event.listen(engine, 'after_cursor_execute', _depois_da_consulta)
+
+    metricas = app.extensions['metricas'] = Metricas()
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
+    app.add_url_rule('/metrics', 'metricas', _exportar)
+    return metricas
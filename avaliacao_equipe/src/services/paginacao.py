@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import current_app, jsonify, request
+from sqlalchemy import tuple_
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+class Pagina:
+    """Parâmetros de paginação lidos da query string (limit, cursor, fields, total)"""
+
+    def __init__(self, limite, cursor, campos, contar_total):
+        self.limite = limite
+        self.cursor = cursor
+        self.campos = campos
+        self.contar_total = contar_total
+
+    @classmethod
+    def da_requisicao(cls):
+        """Valida os parâmetros; ValueError com mensagem para o cliente se inválidos"""
+        try:
+            limite = int(request.args.get('limit', LIMITE_PADRAO))
+        except ValueError:
+            raise ValueError('limit deve ser um número inteiro')
+        if not 1 <= limite <= LIMITE_MAXIMO:
+            raise ValueError(f'limit deve estar entre 1 e {LIMITE_MAXIMO}')
+
+        cursor = request.args.get('cursor') or None
+        if cursor is not None:
+            cursor = _decodificar_cursor(cursor)
+
+        campos = [campo.strip() for campo in request.args.get('fields', '').split(',') if campo.strip()]
+
+        # A contagem custa uma consulta sobre a tabela inteira: total=0 a dispensa
+        contar_total = request.args.get('total', '1') != '0' and current_app.config.get('PAGINACAO_TOTAL', True)
+        return cls(limite, cursor, campos, contar_total)
+
+    def buscar(self, consulta, chaves, descendente=False):
+        """Executa a consulta a partir do cursor, ordenada por `chaves` (a última deve ser única).
+
+        Retorna os objetos da página, o cursor da próxima (ou None) e o total
+        de registros da consulta, se pedido.
+        """
+        total = consulta.order_by(None).count() if self.contar_total else None
+
+        if self.cursor is not None:
+            if len(self.cursor) != len(chaves):
+                raise ValueError('cursor inválido')
+            valores = [_valor_da_chave(chave, valor) for chave, valor in zip(chaves, self.cursor)]
+            posicao = tuple_(*chaves)
+            consulta = consulta.filter(posicao < tuple_(*valores) if descendente else posicao > tuple_(*valores))
+
+        ordem = [chave.desc() if descendente else chave.asc() for chave in chaves]
+        # Um registro a mais indica se há próxima página sem outra consulta
+        itens = consulta.order_by(*ordem).limit(self.limite + 1).all()
+
+        proximo = None
+        if len(itens) > self.limite:
+            itens = itens[:self.limite]
+            proximo = _codificar_cursor([getattr(itens[-1], chave.key) for chave in chaves])
+        return itens, proximo, total
+
+    def responder(self, dados, proximo, total):
+        """Lista JSON com a projeção de `fields` e os cabeçalhos de paginação"""
+        if self.campos and dados:
+            invalidos = [campo for campo in self.campos if campo not in dados[0]]
+            if invalidos:
+                raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+            dados = [{campo: item[campo] for campo in self.campos} for item in dados]
+        resposta = jsonify(dados)
+        if total is not None:
+            resposta.headers['X-Total-Count'] = str(total)
+        if proximo:
+            resposta.headers['X-Next-Cursor'] = proximo
+            parametros = dict(request.args.to_dict(), cursor=proximo)
+            resposta.headers['Link'] = f'<{request.path}?{urlencode(parametros)}>; rel="next"'
+        return resposta
+
+
+def _codificar_cursor(valores):
+    valores = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError('cursor inválido')
+    if not isinstance(valores, list):
+        raise ValueError('cursor inválido')
+    return valores
+
+
+def _valor_da_chave(chave, valor):
+    if valor is not None and chave.type.python_type is datetime:
+        try:
+            return datetime.fromisoformat(valor)
+        except (TypeError, ValueError):
+            raise ValueError('cursor inválido')
+    return valor
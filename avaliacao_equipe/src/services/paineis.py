@@ -0,0 +1,179 @@
+"""Painéis de estatísticas dos gestores pré-calculados (tabela painel_gestor).
+
+O painel de um gestor depende das avaliações que ele fez, das
+autoavaliações dos subordinados diretos (comparativo) e das avaliações de
+gestor recebidas pela equipe inteira (resumo por critério). Cada escrita em
+avaliacao marca os painéis afetados na mesma transação e agenda a tarefa
+atualizar_paineis, que os reconstrói fora da requisição. O GET lê uma linha.
+"""
+from datetime import datetime
+
+from flask import Response, current_app, request
+from sqlalchemy import delete, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+
+from src.models.avaliacao import db
+from src.models.hierarquia import UsuarioHierarquia
+from src.models.painel import PainelGestor
+from src.models.usuario import Usuario
+from src.services.ciclos import ciclo_aberto_id
+from src.services.estatisticas import calcular_estatisticas
+from src.services.tarefas import agendar, tipo_de_tarefa
+
+TAREFA = 'atualizar_paineis'
+
+
+def _insert():
+    """INSERT com ON CONFLICT do banco em uso"""
+    dialeto = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    return dialeto.insert(PainelGestor)
+
+
+def _gestores_afetados(avaliacoes):
+    """Condição sobre Usuario.id para os gestores cujo painel inclui as avaliações
+    (tuplas avaliador_id, avaliado_id, tipo_avaliacao)"""
+    avaliadores, autoavaliados, avaliados = set(), set(), set()
+    for avaliador_id, avaliado_id, tipo in avaliacoes:
+        avaliadores.add(avaliador_id)
+        if tipo == 'autoavaliacao':
+            autoavaliados.add(avaliado_id)
+        elif tipo == 'subordinado':
+            avaliados.add(avaliado_id)
+
+    condicoes = [Usuario.id.in_(avaliadores)]
+    if autoavaliados:
+        # Comparativo: o gestor direto de quem se autoavaliou
+        subordinado = aliased(Usuario)
+        condicoes.append(Usuario.id.in_(
+            select(subordinado.gestor_id).where(subordinado.id.in_(autoavaliados))
+        ))
+    if avaliados:
+        # Resumo da equipe: todos os gestores acima do avaliado
+        condicoes.append(Usuario.id.in_(
+            select(UsuarioHierarquia.ancestral_id).where(UsuarioHierarquia.descendente_id.in_(avaliados))
+        ))
+    return or_(*condicoes)
+
+
+def marcar_paineis(avaliacoes=None):
+    """Marca como desatualizados os painéis do ciclo aberto afetados pelas
+    avaliações (tuplas avaliador_id, avaliado_id, tipo_avaliacao) e agenda a
+    reconstrução. Sem avaliações, marca todos os painéis já gravados (mudanças
+    em usuários, hierarquia ou pesos). Não faz commit: chamar antes do commit
+    da escrita, como atualizar_resumos.
+    """
+    ciclo_id = ciclo_aberto_id()
+    if ciclo_id is None:
+        return
+    agora = datetime.utcnow()
+
+    if avaliacoes is None:
+        db.session.execute(
+            update(PainelGestor).where(PainelGestor.ciclo_id == ciclo_id)
+            .values(versao=PainelGestor.versao + 1,
+                    desatualizado_em=func.coalesce(PainelGestor.desatualizado_em, agora))
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Gestores ainda sem painel ganham a linha: o painel fica pronto antes da primeira visita
+        gestores = select(Usuario.id, literal(ciclo_id), literal(1), literal(agora)).where(
+            Usuario.tipo == 'gestor', _gestores_afetados(avaliacoes)
+        )
+        inserir = _insert().from_select(['gestor_id', 'ciclo_id', 'versao', 'desatualizado_em'], gestores)
+        db.session.execute(inserir.on_conflict_do_update(
+            index_elements=['gestor_id', 'ciclo_id'],
+            set_={'versao': PainelGestor.versao + 1,
+                  'desatualizado_em': func.coalesce(PainelGestor.desatualizado_em, inserir.excluded.desatualizado_em)}
+        ))
+    agendar(TAREFA)
+
+
+def _gravar(gestor_id, ciclo_id, versao, corpo, agora):
+    """Grava o painel calculado a partir da `versao` lida; não grava se outra
+    escrita o marcou no meio do cálculo (continua desatualizado)"""
+    valores = {'dados': corpo, 'atualizado_em': agora, 'desatualizado_em': None}
+    if versao is None:
+        db.session.execute(_insert().values(gestor_id=gestor_id, ciclo_id=ciclo_id, versao=0, **valores)
+                           .on_conflict_do_nothing(index_elements=['gestor_id', 'ciclo_id']))
+    else:
+        db.session.execute(
+            update(PainelGestor)
+            .where(PainelGestor.gestor_id == gestor_id, PainelGestor.ciclo_id == ciclo_id,
+                   PainelGestor.versao == versao)
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+
+def reconstruir_paineis(progresso=None):
+    """Recalcula os painéis desatualizados do ciclo aberto, um commit por painel
+    (o lock de escrita do SQLite fica preso só durante a gravação). Painéis de
+    outros ciclos e de quem deixou de ser gestor são apagados. Retorna quantos."""
+    ciclo_id = ciclo_aberto_id()
+    antigos = delete(PainelGestor).execution_options(synchronize_session=False)
+    if ciclo_id is not None:
+        antigos = antigos.where(PainelGestor.ciclo_id != ciclo_id)
+    db.session.execute(antigos)
+    db.session.commit()
+    if ciclo_id is None:
+        return 0
+
+    pendentes = db.session.execute(
+        select(PainelGestor.gestor_id, PainelGestor.versao)
+        .where(PainelGestor.ciclo_id == ciclo_id, PainelGestor.desatualizado_em.isnot(None))
+        .order_by(PainelGestor.desatualizado_em)
+    ).all()
+    for numero, (gestor_id, versao) in enumerate(pendentes, 1):
+        usuario = db.session.get(Usuario, gestor_id)
+        if usuario is None or usuario.tipo != 'gestor' or not usuario.ativo:
+            db.session.execute(delete(PainelGestor).where(
+                PainelGestor.gestor_id == gestor_id, PainelGestor.ciclo_id == ciclo_id
+            ).execution_options(synchronize_session=False))
+            db.session.commit()
+            continue
+        corpo = current_app.json.dumps(calcular_estatisticas(usuario))
+        _gravar(gestor_id, ciclo_id, versao, corpo, datetime.utcnow())
+        if progresso:
+            progresso(paineis=numero, total=len(pendentes))
+    return len(pendentes)
+
+
+@tipo_de_tarefa(TAREFA)
+def tarefa_atualizar_paineis(execucao):
+    return {'paineis': reconstruir_paineis(execucao.progresso)}
+
+
+def responder_painel(usuario):
+    """Estatísticas de um gestor a partir do painel gravado, com `atualizado_em`
+    e `desatualizado` (reconstrução agendada). Sem painel, ou com um
+    desatualizado há mais de PAINEL_ATRASO_MAXIMO segundos (executor parado),
+    calcula na requisição e grava. None se não houver ciclo aberto."""
+    ciclo_id = ciclo_aberto_id()
+    if ciclo_id is None:
+        return None
+    agora = datetime.utcnow()
+    painel = db.session.get(PainelGestor, (usuario.id, ciclo_id))
+    atraso_maximo = current_app.config.get('PAINEL_ATRASO_MAXIMO', 300)
+
+    if painel is None or painel.dados is None or (
+        painel.desatualizado_em is not None
+        and (agora - painel.desatualizado_em).total_seconds() > atraso_maximo
+    ):
+        versao = painel.versao if painel is not None else None
+        corpo = current_app.json.dumps(calcular_estatisticas(usuario))
+        _gravar(usuario.id, ciclo_id, versao, corpo, agora)
+        atualizado_em, desatualizado = agora, False
+    else:
+        corpo = painel.dados
+        atualizado_em, desatualizado = painel.atualizado_em, painel.desatualizado_em is not None
+
+    # Os campos de frescor entram na frente do objeto gravado, sem desserializá-lo
+    frescor = current_app.json.dumps({'atualizado_em': atualizado_em.isoformat(), 'desatualizado': desatualizado})
+    resposta = Response(frescor[:-1] + ', ' + corpo[1:], mimetype='application/json')
+    resposta.set_etag(f'{ciclo_id}.{usuario.id}.{atualizado_em.timestamp():.6f}.{int(desatualizado)}')
+    resposta.last_modified = atualizado_em
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
@@ -0,0 +1,177 @@
+from itertools import chain
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import func, select, update
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, NOTA_MAXIMA, NOTA_MINIMA, REGISTRO_CRITERIOS, db
+from src.services.ciclos import ciclo_aberto_id
+
+TAMANHO_LOTE = 5000
+
+
+def ler_pesos(texto):
+    """Converte CRITERIOS_PESOS ("lideranca=2,producao=1.5") em dict; ValueError se inválido"""
+    pesos = {}
+    for item in (texto or '').split(','):
+        if not item.strip():
+            continue
+        nome, _, valor = item.partition('=')
+        nome = nome.strip()
+        if nome not in CRITERIOS:
+            raise ValueError(f'CRITERIOS_PESOS: critério desconhecido {nome!r}')
+        try:
+            pesos[nome] = float(valor)
+        except ValueError:
+            raise ValueError(f'CRITERIOS_PESOS: peso inválido para {nome}')
+        if pesos[nome] < 0:
+            raise ValueError(f'CRITERIOS_PESOS: peso negativo para {nome}')
+    return pesos
+
+
+def pesos_criterios():
+    """Peso de cada critério: o padrão do registro, sobreposto por CRITERIOS_PESOS do app"""
+    pesos = {criterio.nome: criterio.peso for criterio in REGISTRO_CRITERIOS}
+    if has_app_context():
+        pesos.update(current_app.config.get('CRITERIOS_PESOS') or {})
+    return pesos
+
+
+def vetor_pesos(pesos=None):
+    pesos = pesos or pesos_criterios()
+    vetor = np.array([pesos[criterio] for criterio in CRITERIOS], dtype=np.float64)
+    if not vetor.sum():
+        raise ValueError('A soma dos pesos dos critérios deve ser positiva')
+    return vetor
+
+
+def converter_notas(data, parcial=False):
+    """Notas dos critérios presentes em `data` como inteiros entre NOTA_MINIMA e NOTA_MAXIMA.
+
+    Sem `parcial`, todos os critérios são obrigatórios. ValueError com a
+    mensagem para o cliente se algum valor for inválido.
+    """
+    notas = {}
+    for criterio in CRITERIOS:
+        if criterio not in data:
+            if parcial:
+                continue
+            raise ValueError(f'Campo {criterio} é obrigatório')
+        valor = data[criterio]
+        try:
+            nota = int(valor)
+        except (TypeError, ValueError):
+            nota = None
+        # "7" e 7 são aceitos; 7.5 e true não
+        if isinstance(valor, bool) or isinstance(valor, float) and valor != nota:
+            nota = None
+        if nota is None or not NOTA_MINIMA <= nota <= NOTA_MAXIMA:
+            raise ValueError(f'{criterio} deve ser um número inteiro entre {NOTA_MINIMA} e {NOTA_MAXIMA}')
+        notas[criterio] = nota
+    return notas
+
+
+def medias_ponderadas(matriz, pesos=None):
+    """media_geral de cada linha de uma matriz (avaliações x critérios), com uma casa decimal"""
+    vetor = vetor_pesos(pesos)
+    return np.round(matriz @ vetor / vetor.sum(), 1)
+
+
+def media_ponderada(notas, pesos=None):
+    """media_geral de uma avaliação a partir do dict critério -> nota"""
+    matriz = np.array([[notas[criterio] for criterio in CRITERIOS]], dtype=np.float64)
+    return float(medias_ponderadas(matriz, pesos)[0])
+
+
+def _matriz(consulta):
+    """Resultado de uma consulta só com colunas numéricas como matriz float64.
+
+    np.fromiter sobre as linhas encadeadas evita np.array(lista de Row), que
+    trata cada Row como sequência genérica e é várias vezes mais lento.
+    """
+    resultado = db.session.execute(consulta)
+    colunas = len(resultado.keys())
+    return np.fromiter(chain.from_iterable(resultado), dtype=np.float64).reshape(-1, colunas)
+
+
+def carregar_notas(*filtros):
+    """Ids e matriz de notas (avaliações x critérios) das avaliações filtradas, em uma consulta.
+
+    Só as colunas dos critérios são lidas, sem montar objetos do ORM.
+    """
+    dados = _matriz(
+        select(Avaliacao.id, *[getattr(Avaliacao, criterio) for criterio in CRITERIOS])
+        .where(*filtros).order_by(Avaliacao.id)
+    )
+    return dados[:, 0].astype(np.int64), dados[:, 1:]
+
+
+def resumir_notas(matriz, pesos=None):
+    """Média geral, média, desvio padrão e distribuição das notas de cada critério"""
+    if not len(matriz):
+        return {'total': 0, 'media_geral': None, 'criterios': {}}
+
+    medias = matriz.mean(axis=0)
+    desvios = matriz.std(axis=0)
+    # Distribuição de todos os critérios com um único bincount: a nota de cada
+    # coluna é deslocada para a sua própria faixa de NOTA_MINIMA..NOTA_MAXIMA
+    faixa = NOTA_MAXIMA - NOTA_MINIMA + 1
+    deslocadas = (matriz.astype(np.int64) - NOTA_MINIMA) + np.arange(len(CRITERIOS)) * faixa
+    distribuicao = np.bincount(deslocadas.ravel(), minlength=len(CRITERIOS) * faixa).reshape(len(CRITERIOS), faixa)
+
+    return {
+        'total': len(matriz),
+        'media_geral': round(float(medias_ponderadas(matriz, pesos).mean()), 2),
+        'criterios': {
+            criterio.nome: {
+                'rotulo': criterio.rotulo,
+                'media': round(float(medias[i]), 2),
+                'desvio': round(float(desvios[i]), 2),
+                'distribuicao': distribuicao[i].tolist(),
+            }
+            for i, criterio in enumerate(REGISTRO_CRITERIOS)
+        },
+    }
+
+
+def recalcular_medias(ciclo_id=None, todos=False, tamanho_lote=TAMANHO_LOTE):
+    """Recalcula media_geral com os pesos atuais.
+
+    Por padrão só as avaliações do ciclo aberto (ou do `ciclo_id`): ciclos
+    encerrados guardam as médias com os pesos da época. `todos` inclui os
+    encerrados ainda não arquivados; avaliacao_arquivo nunca é alterada.
+    Lê as notas em lotes por id, calcula as médias do lote de uma vez e
+    grava só as que mudaram. Retorna o número de avaliações alteradas; o
+    resumo (reconstruir_resumos) deve ser refeito em seguida.
+    """
+    filtros = []
+    if not todos:
+        ciclo_id = ciclo_id or ciclo_aberto_id()
+        if ciclo_id is None:
+            return 0
+        filtros.append(Avaliacao.ciclo_id == ciclo_id)
+
+    pesos = pesos_criterios()
+    colunas = [getattr(Avaliacao, criterio) for criterio in CRITERIOS]
+    alteradas = 0
+    ultimo_id = 0
+    while True:
+        dados = _matriz(
+            select(Avaliacao.id, func.coalesce(Avaliacao.media_geral, -1), *colunas)
+            .where(Avaliacao.id > ultimo_id, *filtros).order_by(Avaliacao.id).limit(tamanho_lote)
+        )
+        if not len(dados):
+            break
+
+        ids = dados[:, 0].astype(np.int64)
+        novas = medias_ponderadas(dados[:, 2:], pesos)
+        mudaram = dados[:, 1] != novas
+        if mudaram.any():
+            db.session.execute(update(Avaliacao), [
+                {'id': int(avaliacao_id), 'media_geral': float(media)}
+                for avaliacao_id, media in zip(ids[mudaram], novas[mudaram])
+            ])
+            alteradas += int(mudaram.sum())
+        db.session.commit()
+        ultimo_id = int(ids[-1])
+    return alteradas
@@ -0,0 +1,127 @@
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import aliased
+
+from src.models.avaliacao import Avaliacao, db
+from src.models.resumo import ResumoAvaliacao
+from src.models.usuario import Usuario
+from src.services.ciclos import ciclo_aberto_id
+
+
+def _consultar_agregados():
+    """Uma única consulta agregada por (avaliado, avaliador), no ciclo aberto.
+
+    As avaliações do ciclo são agregadas em uma subconsulta, lida de uma vez
+    pela faixa do ciclo no índice; com o join direto, o SQLite escolhia o
+    índice (ciclo, avaliador), que agrupa na ordem certa, e relia a faixa do
+    ciclo inteira para cada usuário. Usuários ativos sem avaliação aparecem
+    com avaliador_id nulo (outer join), e o nome do avaliador vem de um alias
+    de Usuario, sem consultas extras.
+    """
+    avaliador = aliased(Usuario)
+    eh_autoavaliacao = and_(
+        Avaliacao.tipo_avaliacao == 'autoavaliacao',
+        Avaliacao.avaliador_id == Avaliacao.avaliado_id
+    )
+    nota_auto = case((eh_autoavaliacao, Avaliacao.media_geral))
+
+    agregados = (
+        select(
+            Avaliacao.avaliado_id,
+            Avaliacao.avaliador_id,
+            func.sum(Avaliacao.media_geral).label('soma_media'),
+            func.count(Avaliacao.media_geral).label('total_media'),
+            func.sum(nota_auto).label('soma_auto'),
+            func.count(nota_auto).label('total_auto')
+        )
+        .where(Avaliacao.ciclo_id == ciclo_aberto_id())
+        .group_by(Avaliacao.avaliado_id, Avaliacao.avaliador_id)
+        .subquery()
+    )
+
+    return (
+        db.session.query(
+            Usuario.id.label('avaliado_id'),
+            Usuario.nome.label('funcionario'),
+            Usuario.cargo,
+            agregados.c.avaliador_id,
+            avaliador.nome.label('avaliador_nome'),
+            agregados.c.soma_media,
+            agregados.c.total_media,
+            agregados.c.soma_auto,
+            agregados.c.total_auto
+        )
+        .select_from(Usuario)
+        .outerjoin(agregados, agregados.c.avaliado_id == Usuario.id)
+        .outerjoin(avaliador, avaliador.id == agregados.c.avaliador_id)
+        .filter(Usuario.ativo == True)
+        .order_by(Usuario.id)
+        .all()
+    )
+
+
+def _media(soma, total):
+    return soma / total if total else None
+
+
+def _autoavaliacoes(linhas):
+    """Média da autoavaliação de cada avaliado a partir das linhas agregadas"""
+    somas = {}
+    for linha in linhas:
+        if linha.total_auto:
+            soma, total = somas.get(linha.avaliado_id, (0, 0))
+            somas[linha.avaliado_id] = (soma + linha.soma_auto, total + linha.total_auto)
+    return {avaliado_id: _media(soma, total) for avaliado_id, (soma, total) in somas.items()}
+
+
+def ranking_por_funcionario():
+    """Ranking de todos os usuários ativos no ciclo aberto, lido da tabela de resumo"""
+    linhas = (
+        db.session.query(
+            Usuario.id,
+            Usuario.nome,
+            Usuario.cargo,
+            ResumoAvaliacao.media_geral,
+            ResumoAvaliacao.media_auto
+        )
+        .outerjoin(ResumoAvaliacao, and_(ResumoAvaliacao.avaliado_id == Usuario.id,
+                                         ResumoAvaliacao.ciclo_id == ciclo_aberto_id()))
+        .filter(Usuario.ativo == True)
+        .order_by(Usuario.id)
+        .all()
+    )
+
+    resultado = [{
+        'id': linha.id,
+        'nome': linha.nome,
+        'cargo': linha.cargo,
+        'media_geral': round(linha.media_geral, 2) if linha.media_geral is not None else None,
+        'autoavaliacao': linha.media_auto
+    } for linha in linhas]
+
+    # Ordenar por média geral
+    return sorted(resultado, key=lambda x: x['media_geral'] or 0, reverse=True)
+
+
+def ranking_por_avaliador():
+    """Ranking com uma linha por (avaliado, avaliador)"""
+    linhas = _consultar_agregados()
+    autoavaliacoes = _autoavaliacoes(linhas)
+
+    resultado = []
+    for linha in linhas:
+        # Usuários sem nenhuma avaliação não entram neste ranking
+        if linha.avaliador_id is None:
+            continue
+
+        media_geral = _media(linha.soma_media, linha.total_media)
+        autoavaliacao = autoavaliacoes.get(linha.avaliado_id)
+        resultado.append({
+            'avaliado_id': linha.avaliado_id,
+            'funcionario': linha.funcionario,
+            'cargo': linha.cargo,
+            'avaliador': linha.avaliador_nome or '-',
+            'media_geral': round(media_geral, 2) if media_geral else None,
+            'autoavaliacao': round(autoavaliacao, 2) if autoavaliacao else None
+        })
+
+    return sorted(resultado, key=lambda x: x['media_geral'] or 0, reverse=True)
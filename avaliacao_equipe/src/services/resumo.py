@@ -0,0 +1,99 @@
+from sqlalchemy import and_, case, func, select
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.resumo import ResumoAvaliacao
+from src.services.ciclos import ciclo_aberto_id
+
+CHAVES = ('ciclo_id', 'avaliado_id')
+
+
+def _consulta_agregada(*filtros):
+    """Médias por ciclo e avaliado, calculadas no banco (uma linha por par)"""
+    eh_autoavaliacao = and_(
+        Avaliacao.tipo_avaliacao == 'autoavaliacao',
+        Avaliacao.avaliador_id == Avaliacao.avaliado_id
+    )
+    eh_gestor = Avaliacao.tipo_avaliacao == 'subordinado'
+
+    colunas = [
+        Avaliacao.ciclo_id,
+        Avaliacao.avaliado_id,
+        func.count(Avaliacao.id).label('total_avaliacoes'),
+        func.avg(Avaliacao.media_geral).label('media_geral'),
+        func.count(case((eh_gestor, Avaliacao.id))).label('total_gestor'),
+        func.avg(case((eh_gestor, Avaliacao.media_geral))).label('media_gestor'),
+        func.count(case((eh_autoavaliacao, Avaliacao.id))).label('total_auto'),
+        func.avg(case((eh_autoavaliacao, Avaliacao.media_geral))).label('media_auto'),
+    ]
+    colunas += [func.avg(getattr(Avaliacao, criterio)).label(f'media_{criterio}') for criterio in CRITERIOS]
+
+    return (
+        db.session.query(*colunas)
+        .filter(*filtros)
+        .group_by(Avaliacao.ciclo_id, Avaliacao.avaliado_id)
+    )
+
+
+def _valores(linha):
+    return {chave: getattr(linha, chave) for chave in linha._fields if chave not in CHAVES}
+
+
+def atualizar_resumos(avaliados_ids):
+    """Recalcula, no ciclo aberto, o resumo dos avaliados informados na transação corrente.
+
+    Deve ser chamado após as alterações em avaliacao e antes do commit, para
+    que resumo e avaliações sejam gravados (ou desfeitos) juntos.
+    """
+    avaliados_ids = set(avaliados_ids)
+    ciclo_id = ciclo_aberto_id()
+    if not avaliados_ids or ciclo_id is None:
+        return
+
+    db.session.flush()
+    linhas = _consulta_agregada(Avaliacao.ciclo_id == ciclo_id, Avaliacao.avaliado_id.in_(avaliados_ids)).all()
+    resumos = {
+        resumo.avaliado_id: resumo
+        for resumo in ResumoAvaliacao.query.filter(
+            ResumoAvaliacao.ciclo_id == ciclo_id, ResumoAvaliacao.avaliado_id.in_(avaliados_ids)
+        )
+    }
+
+    for linha in linhas:
+        resumo = resumos.pop(linha.avaliado_id, None)
+        if resumo is None:
+            resumo = ResumoAvaliacao(ciclo_id=ciclo_id, avaliado_id=linha.avaliado_id)
+            db.session.add(resumo)
+        for chave, valor in _valores(linha).items():
+            setattr(resumo, chave, valor)
+
+    # Avaliados que ficaram sem nenhuma avaliação
+    for resumo in resumos.values():
+        db.session.delete(resumo)
+
+
+def reconstruir_resumos(ciclo_id=None, todos=False):
+    """Reconstrói os resumos do ciclo aberto (ou do `ciclo_id`) a partir das avaliações.
+
+    `todos` refaz os de todos os ciclos não arquivados; os dos arquivados
+    ficam como estão, pois as suas avaliações já não mudam. Retorna quantos.
+    """
+    if todos:
+        ciclos = select(Ciclo.id).where(Ciclo.arquivado_em.is_(None))
+    else:
+        ciclo_id = ciclo_id or ciclo_aberto_id()
+        if ciclo_id is None:
+            return 0
+        ciclos = [ciclo_id]
+    try:
+        ResumoAvaliacao.query.filter(ResumoAvaliacao.ciclo_id.in_(ciclos)).delete(synchronize_session=False)
+        linhas = _consulta_agregada(Avaliacao.ciclo_id.in_(ciclos)).all()
+        db.session.add_all(
+            ResumoAvaliacao(ciclo_id=linha.ciclo_id, avaliado_id=linha.avaliado_id, **_valores(linha))
+            for linha in linhas
+        )
+        db.session.commit()
+        return len(linhas)
+    except Exception:
+        db.session.rollback()
+        raise
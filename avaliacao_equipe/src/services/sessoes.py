@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+from flask import current_app, has_app_context
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SessaoBanco
+
+from src.config import DIRETORIO_BANCO
+from src.services.cache import VersoesArquivo
+
+ID_SESSAO = re.compile(r'[A-Za-z0-9_-]{43}')
+# Chave de Session.info com os usuários a revogar no commit (revogar_sessoes_no_commit)
+REVOGAR_NO_COMMIT = 'sessoes_a_revogar'
+
+
+class Sessao(SessionMixin):
+    """Sessão guardada no servidor; o cookie leva só o id.
+
+    Os dados são lidos do armazenamento no primeiro acesso: requisições que
+    não usam a sessão (arquivos estáticos) não tocam nele.
+    """
+
+    def __init__(self, interface, sid):
+        self.interface = interface
+        self.sid = sid
+        self.modified = False
+        self.accessed = False
+        self.usuario_inicial = None
+        self._dados = None
+
+    @property
+    def dados(self):
+        if self._dados is None:
+            self.accessed = True
+            self._dados = self.interface.carregar(self.sid) if self.sid else None
+            if self._dados is None:
+                # Expirada, revogada ou inexistente: a próxima gravação cria outra
+                self._dados, self.sid = {}, None
+            self.usuario_inicial = self._dados.get('user_id')
+        return self._dados
+
+    def __getitem__(self, chave):
+        return self.dados[chave]
+
+    def __setitem__(self, chave, valor):
+        self.dados[chave] = valor
+        self.modified = True
+
+    def __delitem__(self, chave):
+        del self.dados[chave]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.dados)
+
+    def __len__(self):
+        return len(self.dados)
+
+
+class SessoesMemoria:
+    """Sessões na memória do processo: só servem a um worker (desenvolvimento e testes)"""
+
+    def __init__(self):
+        self._registros = {}
+        self._revogacoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, sid):
+        with self._lock:
+            return self._registros.get(sid)
+
+    def guardar(self, sid, registro):
+        with self._lock:
+            self._registros[sid] = registro
+
+    def remover(self, sid):
+        with self._lock:
+            self._registros.pop(sid, None)
+
+    def revogacao(self, usuario_id):
+        return self._revogacoes.get(usuario_id, 0)
+
+    def revogar(self, usuario_id):
+        with self._lock:
+            self._revogacoes[usuario_id] = self._revogacoes.get(usuario_id, 0) + 1
+
+    def remover_todas(self):
+        with self._lock:
+            total = len(self._registros)
+            self._registros.clear()
+        return total
+
+    def remover_expiradas(self, agora):
+        with self._lock:
+            expiradas = [sid for sid, registro in self._registros.items() if registro['expira_em'] < agora]
+            for sid in expiradas:
+                del self._registros[sid]
+        return len(expiradas)
+
+
+class SessoesArquivo:
+    """Uma sessão por arquivo, compartilhada pelos workers da mesma máquina.
+
+    A revogação por usuário usa contadores como os do cache de respostas:
+    a sessão guarda o contador do usuário no login e deixa de valer quando
+    ele muda, sem procurar as sessões do usuário entre os arquivos.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = os.path.join(diretorio, 'ativas')
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._revogacoes = VersoesArquivo(os.path.join(diretorio, 'revogacoes'))
+
+    def obter(self, sid):
+        try:
+            with open(os.path.join(self.diretorio, sid), encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def guardar(self, sid, registro):
+        # Grava em um temporário e renomeia: um worker nunca lê a sessão pela metade
+        caminho = os.path.join(self.diretorio, sid)
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(registro, arquivo)
+        os.replace(temporario, caminho)
+
+    def remover(self, sid):
+        try:
+            os.remove(os.path.join(self.diretorio, sid))
+        except FileNotFoundError:
+            pass
+
+    def revogacao(self, usuario_id):
+        return self._revogacoes.versoes([f'usuario_{usuario_id}'])[0]
+
+    def revogar(self, usuario_id):
+        self._revogacoes.incrementar(f'usuario_{usuario_id}')
+
+    def remover_todas(self):
+        nomes = os.listdir(self.diretorio)
+        for sid in nomes:
+            self.remover(sid)
+        return len(nomes)
+
+    def remover_expiradas(self, agora):
+        total = 0
+        for sid in os.listdir(self.diretorio):
+            registro = self.obter(sid)
+            if registro is None or registro['expira_em'] < agora:
+                self.remover(sid)
+                total += 1
+        return total
+
+
+class InterfaceSessoes(SessionInterface):
+    """Sessões do Flask no servidor, com o tipo e o `ativo` do usuário gravados no login.
+
+    Uma sessão vale por PERMANENT_SESSION_LIFETIME a partir da última
+    gravação, ou até o usuário ser revogado (revogar_sessoes).
+    """
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        return Sessao(self, sid if sid and ID_SESSAO.fullmatch(sid) else None)
+
+    def carregar(self, sid):
+        registro = self.armazenamento.obter(sid)
+        if registro is None:
+            return None
+        usuario_id = registro['dados'].get('user_id')
+        if registro['expira_em'] < time.time() or (
+            usuario_id is not None and registro['revogacao'] != self.armazenamento.revogacao(usuario_id)
+        ):
+            self.armazenamento.remover(sid)
+            return None
+        return registro['dados']
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session.modified:
+            return
+
+        nome = self.get_cookie_name(app)
+        dominio, caminho = self.get_cookie_domain(app), self.get_cookie_path(app)
+        if not session:
+            # Logout: a sessão some do servidor, não só do navegador
+            if session.sid:
+                self.armazenamento.remover(session.sid)
+            response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+
+        usuario_id = session.get('user_id')
+        if session.sid is None or usuario_id != session.usuario_inicial:
+            # Id novo a cada login: um id obtido antes do login não serve depois
+            if session.sid:
+                self.armazenamento.remover(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+
+        self.armazenamento.guardar(session.sid, {
+            'expira_em': time.time() + app.permanent_session_lifetime.total_seconds(),
+            'revogacao': self.armazenamento.revogacao(usuario_id) if usuario_id is not None else None,
+            'dados': dict(session),
+        })
+        response.set_cookie(
+            nome, session.sid, expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app), domain=dominio, path=caminho,
+        )
+
+
+def configurar_sessoes(app):
+    """Instala as sessões no servidor: SESSAO_ARMAZENAMENTO=arquivos (padrão,
+    compartilhadas pelos workers em SESSAO_DIR) ou memoria (um processo só)"""
+    tipo = app.config.get('SESSAO_ARMAZENAMENTO', 'arquivos')
+    if tipo == 'memoria':
+        armazenamento = SessoesMemoria()
+    elif tipo == 'arquivos':
+        armazenamento = SessoesArquivo(app.config.get('SESSAO_DIR') or os.path.join(DIRETORIO_BANCO, 'sessoes'))
+    else:
+        raise ValueError(f'SESSAO_ARMAZENAMENTO inválido: {tipo!r} (use arquivos ou memoria)')
+    app.session_interface = InterfaceSessoes(armazenamento)
+    return app.session_interface
+
+
+def revogar_sessoes(*usuarios_ids):
+    """Invalida de uma vez todas as sessões abertas dos usuários, em todos os workers"""
+    if not has_app_context() or not isinstance(current_app.session_interface, InterfaceSessoes):
+        return
+    armazenamento = current_app.session_interface.armazenamento
+    for usuario_id in usuarios_ids:
+        armazenamento.revogar(usuario_id)
+
+
+def revogar_sessoes_no_commit(sessao_banco, *usuarios_ids):
+    """Revoga as sessões dos usuários quando a transação de `sessao_banco`
+    (SQLAlchemy) for confirmada; se ela for desfeita, ninguém é deslogado"""
+    if usuarios_ids:
+        sessao_banco.info.setdefault(REVOGAR_NO_COMMIT, set()).update(usuarios_ids)
+
+
+@event.listens_for(SessaoBanco, 'after_commit')
+def _revogar_confirmadas(sessao_banco):
+    revogar_sessoes(*sessao_banco.info.pop(REVOGAR_NO_COMMIT, ()))
+
+
+@event.listens_for(SessaoBanco, 'after_soft_rollback')
+def _descartar_desfeitas(sessao_banco, transacao_anterior):
+    # Só o rollback da transação externa desfaz as alterações que pediram a revogação
+    if transacao_anterior.parent is None:
+        sessao_banco.info.pop(REVOGAR_NO_COMMIT, None)
@@ -0,0 +1,429 @@
+"""Fila de tarefas em segundo plano guardada no próprio banco (tabela tarefa).
+
+Importações, exportações, rankings da empresa inteira e recálculos rodam
+fora da requisição: a rota grava a tarefa e responde 202, e um executor
+a executa em outra thread. O executor roda em um processo próprio
+(`flask executar-tarefas`, a linha worker do Procfile) ou, com
+TAREFAS_EXECUTOR=threads, dentro de cada processo web. Não há broker: os
+executores disputam as tarefas pendentes com um UPDATE condicional, o que
+basta para uma máquina com um banco SQLite.
+"""
+import inspect
+import json
+import os
+import secrets
+import shutil
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+
+from src.config import DIRETORIO_BANCO
+from src.models.avaliacao import db
+from src.models.tarefa import Tarefa
+from src.services.cache import AVALIACOES, invalidar
+from src.services.ciclos import ciclo_aberto_id, modelo_do_ciclo
+from src.services.exportacao import FORMATOS
+from src.services.importacao import LEITORES, importar_usuarios
+from src.services.pontuacao import recalcular_medias
+from src.services.ranking import ranking_por_avaliador, ranking_por_funcionario
+from src.services.resumo import reconstruir_resumos
+
+TIPOS_TAREFA = {}
+# Tarefas que continuam 'executando' após um executor morrer voltam à fila até este limite
+MAX_TENTATIVAS = 3
+# Segundos mínimos entre duas gravações de progresso da mesma tarefa
+INTERVALO_PROGRESSO = 1.0
+
+
+def tipo_de_tarefa(nome):
+    """Registra a função que executa as tarefas do tipo `nome`.
+
+    A função recebe a Execucao e os parâmetros da tarefa como argumentos
+    nomeados; o que ela retornar (JSON) fica em Tarefa.resultado.
+    """
+    def registrar(funcao):
+        TIPOS_TAREFA[nome] = funcao
+        return funcao
+    return registrar
+
+
+def diretorio_tarefas():
+    return current_app.config.get('TAREFAS_DIR') or os.path.join(DIRETORIO_BANCO, 'tarefas')
+
+
+def caminho_resultado(tarefa):
+    """Caminho do arquivo de resultado da tarefa, ou None se ela não gerou arquivo"""
+    if not tarefa.arquivo:
+        return None
+    return os.path.join(diretorio_tarefas(), str(tarefa.id), tarefa.arquivo)
+
+
+def _atualizar(tarefa_id, **valores):
+    # Conexão própria: não mistura a gravação com a transação da tarefa em curso
+    with db.engine.begin() as conexao:
+        return conexao.execute(update(Tarefa).where(Tarefa.id == tarefa_id).values(**valores)).rowcount
+
+
+class Execucao:
+    """O que a função de uma tarefa recebe: relato de progresso e arquivo de resultado"""
+
+    def __init__(self, tarefa_id):
+        self.tarefa_id = tarefa_id
+        self.diretorio = os.path.join(diretorio_tarefas(), str(tarefa_id))
+        self.nome_arquivo = None
+        self._ultimo_progresso = 0.0
+
+    def progresso(self, **valores):
+        """Grava o progresso, no máximo uma vez por INTERVALO_PROGRESSO.
+
+        Deve ser chamado fora de uma transação de escrita aberta (ex.: após
+        o commit de cada lote): no SQLite a gravação esperaria por ela.
+        """
+        agora = time.monotonic()
+        if agora - self._ultimo_progresso < INTERVALO_PROGRESSO:
+            return
+        self._ultimo_progresso = agora
+        try:
+            _atualizar(self.tarefa_id, progresso=valores, atualizada_em=datetime.utcnow())
+        except OperationalError:
+            # Progresso é informativo: banco ocupado não derruba a tarefa
+            current_app.logger.warning('Progresso da tarefa %s não gravado', self.tarefa_id)
+
+    def arquivo(self, nome):
+        """Caminho onde gravar o arquivo de resultado `nome` (um por tarefa)"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.nome_arquivo = nome
+        return os.path.join(self.diretorio, nome)
+
+
+def enfileirar(tipo, parametros=None, usuario_id=None):
+    """Grava uma tarefa pendente; ValueError se o tipo ou os parâmetros não servirem"""
+    funcao = TIPOS_TAREFA.get(tipo)
+    if funcao is None:
+        raise ValueError(f"Tipo de tarefa desconhecido: use {', '.join(sorted(TIPOS_TAREFA))}")
+    parametros = parametros or {}
+    try:
+        inspect.signature(funcao).bind(None, **parametros)
+    except TypeError as e:
+        raise ValueError(f'Parâmetros inválidos para {tipo}: {e}')
+
+    tarefa = Tarefa(tipo=tipo, status='pendente', parametros=parametros, criado_por=usuario_id)
+    db.session.add(tarefa)
+    db.session.commit()
+    executor = current_app.extensions.get('executor_tarefas')
+    if executor is not None:
+        executor.acordar()
+    return tarefa
+
+
+def agendar(tipo):
+    """Acrescenta à sessão uma tarefa `tipo` sem parâmetros, se não houver uma pendente.
+
+    Não faz commit: a tarefa é gravada junto com a escrita de quem chamou.
+    Serve às tarefas que processam tudo o que estiver marcado (ex.: painéis
+    desatualizados), em que uma execução pendente basta para várias escritas.
+    """
+    pendente = db.session.scalar(
+        select(Tarefa.id).where(Tarefa.status == 'pendente', Tarefa.tipo == tipo).limit(1)
+    )
+    if pendente is None:
+        db.session.add(Tarefa(tipo=tipo, status='pendente', parametros={}))
+
+
+def guardar_entrada(arquivo, extensao):
+    """Grava um arquivo enviado para uma tarefa ler depois; retorna o nome a passar nos parâmetros"""
+    diretorio = os.path.join(diretorio_tarefas(), 'entradas')
+    os.makedirs(diretorio, exist_ok=True)
+    nome = f'{secrets.token_hex(16)}.{extensao}'
+    arquivo.save(os.path.join(diretorio, nome))
+    return nome
+
+
+def _caminho_entrada(nome):
+    # Só o nome: os parâmetros não apontam para fora de TAREFAS_DIR/entradas
+    return os.path.join(diretorio_tarefas(), 'entradas', os.path.basename(nome))
+
+
+def cancelar(tarefa):
+    """Remove da fila uma tarefa que ainda não começou; False se ela já começou"""
+    agora = datetime.utcnow()
+    cancelada = db.session.execute(
+        update(Tarefa).where(Tarefa.id == tarefa.id, Tarefa.status == 'pendente')
+        .values(status='cancelada', concluida_em=agora, atualizada_em=agora)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    db.session.refresh(tarefa)
+    return bool(cancelada)
+
+
+def _reservar(executor):
+    """Passa a tarefa pendente mais antiga para 'executando'; None se a fila estiver vazia.
+
+    A leitura e o UPDATE condicional ficam em transações separadas: no
+    SQLite uma transação de leitura não pode virar de escrita se outro
+    processo gravou no meio. Se outro executor pegou a tarefa antes, o
+    UPDATE não altera nada e a próxima é tentada.
+    """
+    while True:
+        with db.engine.connect() as conexao:
+            tarefa_id = conexao.scalar(
+                select(Tarefa.id).where(Tarefa.status == 'pendente').order_by(Tarefa.id).limit(1)
+            )
+        if tarefa_id is None:
+            return None
+        agora = datetime.utcnow()
+        with db.engine.begin() as conexao:
+            reservada = conexao.execute(
+                update(Tarefa).where(Tarefa.id == tarefa_id, Tarefa.status == 'pendente')
+                .values(status='executando', executor=executor, iniciada_em=agora, atualizada_em=agora,
+                        tentativas=Tarefa.tentativas + 1)
+            ).rowcount
+        if reservada:
+            return tarefa_id
+
+
+def recuperar_abandonadas(limite):
+    """Tarefas 'executando' sem sinal de vida há `limite` segundos (executor morto)
+    voltam para a fila, ou falham depois de MAX_TENTATIVAS. Retorna quantas."""
+    antes = datetime.utcnow() - timedelta(seconds=limite)
+    abandonada = (Tarefa.status == 'executando') & (Tarefa.atualizada_em < antes)
+    with db.engine.begin() as conexao:
+        falharam = conexao.execute(
+            update(Tarefa).where(abandonada, Tarefa.tentativas >= MAX_TENTATIVAS)
+            .values(status='falhou', erro='Executor interrompido repetidamente', concluida_em=datetime.utcnow())
+        ).rowcount
+        voltaram = conexao.execute(
+            update(Tarefa).where(abandonada).values(status='pendente', executor=None)
+        ).rowcount
+    return falharam + voltaram
+
+
+def executar_tarefa(tarefa_id):
+    """Executa uma tarefa já reservada e grava o resultado ou o erro.
+    Retorna o status final, ou None se a tarefa não existir mais."""
+    tarefa = db.session.get(Tarefa, tarefa_id)
+    if tarefa is None:
+        # Removida entre a reserva e a execução
+        db.session.remove()
+        return None
+    execucao = Execucao(tarefa_id)
+    try:
+        funcao = TIPOS_TAREFA.get(tarefa.tipo)
+        if funcao is None:
+            raise ValueError(f'Tipo de tarefa desconhecido: {tarefa.tipo}')
+        parametros = tarefa.parametros or {}
+        # A tarefa não fica presa à sessão: a função pode fazer commit e rollback à vontade
+        db.session.expunge(tarefa)
+        resultado = funcao(execucao, **parametros)
+        valores = {'status': 'concluida', 'resultado': resultado, 'arquivo': execucao.nome_arquivo}
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Tarefa %s falhou', tarefa_id)
+        valores = {'status': 'falhou', 'erro': str(e) or type(e).__name__}
+    finally:
+        db.session.remove()
+    agora = datetime.utcnow()
+    _atualizar(tarefa_id, concluida_em=agora, atualizada_em=agora, **valores)
+    return valores['status']
+
+
+class ExecutorTarefas:
+    """Threads que consomem a fila, cada uma com o seu contexto de aplicação.
+
+    Uma thread extra renova atualizada_em das tarefas em execução a cada
+    TAREFAS_BATIMENTO segundos e devolve à fila as de executores mortos.
+    """
+
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.threads = threads or app.config.get('TAREFAS_THREADS', 2)
+        self.intervalo = app.config.get('TAREFAS_INTERVALO', 2.0)
+        self.batimento = app.config.get('TAREFAS_BATIMENTO', 30)
+        self.nome = f'{socket.gethostname()}:{os.getpid()}'
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._em_execucao = set()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def iniciar(self):
+        for numero in range(self.threads):
+            self._threads.append(threading.Thread(target=self._consumir, name=f'tarefas-{numero}', daemon=True))
+        self._threads.append(threading.Thread(target=self._bater, name='tarefas-batimento', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def acordar(self):
+        self._acordar.set()
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def aguardar(self):
+        """Bloqueia até parar(); as tarefas em curso terminam antes"""
+        while any(thread.is_alive() for thread in self._threads):
+            for thread in self._threads:
+                thread.join(timeout=1)
+
+    def _consumir(self):
+        while not self._parar.is_set():
+            try:
+                with self.app.app_context():
+                    tarefa_id = _reservar(self.nome)
+                    if tarefa_id is not None:
+                        with self._lock:
+                            self._em_execucao.add(tarefa_id)
+                        try:
+                            executar_tarefa(tarefa_id)
+                        finally:
+                            with self._lock:
+                                self._em_execucao.discard(tarefa_id)
+                        continue
+            except Exception:
+                self.app.logger.exception('Erro no executor de tarefas')
+            # Fila vazia: espera o intervalo ou um enfileirar() neste processo
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+    def _bater(self):
+        while not self._parar.wait(self.batimento):
+            try:
+                with self.app.app_context():
+                    with self._lock:
+                        ids = list(self._em_execucao)
+                    if ids:
+                        with db.engine.begin() as conexao:
+                            conexao.execute(update(Tarefa).where(Tarefa.id.in_(ids))
+                                            .values(atualizada_em=datetime.utcnow()))
+                    recuperar_abandonadas(self.batimento * 4)
+            except Exception:
+                self.app.logger.exception('Erro ao renovar as tarefas em execução')
+
+
+def executar_em_primeiro_plano(app, threads=None):
+    """Executor de `flask executar-tarefas`: roda até SIGTERM/SIGINT"""
+    executor = ExecutorTarefas(app, threads).iniciar()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sinal, lambda *_: executor.parar())
+    executor.aguardar()
+
+
+def configurar_tarefas(app):
+    """TAREFAS_EXECUTOR=processo (padrão): só `flask executar-tarefas` executa
+    as tarefas. threads: cada processo web inicia o seu executor na primeira
+    requisição, depois do fork do gunicorn (threads não sobrevivem ao fork)."""
+    modo = app.config.get('TAREFAS_EXECUTOR', 'processo')
+    if modo not in ('processo', 'threads'):
+        raise ValueError(f'TAREFAS_EXECUTOR inválido: {modo!r} (use processo ou threads)')
+    if modo == 'threads':
+        iniciado = {}
+
+        @app.before_request
+        def iniciar_executor():
+            pid = os.getpid()
+            if iniciado.get('pid') != pid:
+                iniciado['pid'] = pid
+                app.extensions['executor_tarefas'] = ExecutorTarefas(app).iniciar()
+
+
+def limpar_tarefas(dias):
+    """Apaga as tarefas finalizadas há mais de `dias` dias, os seus arquivos e
+    entradas não usadas mais antigas que isso. Retorna quantas tarefas."""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    tarefas = Tarefa.query.filter(
+        Tarefa.status.in_(('concluida', 'falhou', 'cancelada')), Tarefa.concluida_em < limite
+    ).all()
+    for tarefa in tarefas:
+        shutil.rmtree(os.path.join(diretorio_tarefas(), str(tarefa.id)), ignore_errors=True)
+        db.session.delete(tarefa)
+    db.session.commit()
+
+    entradas = os.path.join(diretorio_tarefas(), 'entradas')
+    if os.path.isdir(entradas):
+        for nome in os.listdir(entradas):
+            caminho = os.path.join(entradas, nome)
+            if os.path.getmtime(caminho) < limite.timestamp():
+                os.remove(caminho)
+    return len(tarefas)
+
+
+RANKINGS = {'funcionario': ranking_por_funcionario, 'avaliador': ranking_por_avaliador}
+
+
+@tipo_de_tarefa('importar_usuarios')
+def tarefa_importar_usuarios(execucao, entrada=None, formato='json'):
+    """Arquivo enviado (guardar_entrada) ou, sem `entrada`, o USUARIOS_SEED_PATH"""
+    if formato not in LEITORES:
+        raise ValueError(f"Formato não suportado: use {', '.join(LEITORES)}")
+    if entrada:
+        caminho = _caminho_entrada(entrada)
+    else:
+        caminho = current_app.config.get('USUARIOS_SEED_PATH')
+        if not caminho:
+            raise ValueError('USUARIOS_SEED_PATH não configurado')
+    try:
+        with open(caminho, 'rb') as f:
+            return importar_usuarios(
+                LEITORES[formato](f),
+                progresso=lambda r: execucao.progresso(
+                    lidos=r['lidos'], criados=r['criados'], atualizados=r['atualizados'], erros=r['total_erros']
+                )
+            )
+    finally:
+        if entrada:
+            os.remove(caminho)
+
+
+@tipo_de_tarefa('exportar_avaliacoes')
+def tarefa_exportar_avaliacoes(execucao, formato='csv', ciclo=None):
+    """As avaliações de um ciclo (padrão: o aberto) em um arquivo CSV ou NDJSON"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido; use {', '.join(FORMATOS)}")
+    ciclo_id = ciclo or ciclo_aberto_id()
+    modelo = modelo_do_ciclo(ciclo_id) if ciclo_id else None
+    if modelo is None:
+        raise ValueError('Ciclo não encontrado')
+
+    gerar, _ = FORMATOS[formato]
+    tamanho = 0
+    with open(execucao.arquivo(f'avaliacoes.{formato}'), 'w', encoding='utf-8', newline='') as arquivo:
+        for pedaco in gerar(ciclo_id, modelo):
+            arquivo.write(pedaco)
+            tamanho += len(pedaco)
+            execucao.progresso(caracteres=tamanho)
+    return {'ciclo_id': ciclo_id, 'formato': formato, 'caracteres': tamanho}
+
+
+@tipo_de_tarefa('ranking')
+def tarefa_ranking(execucao, por='funcionario'):
+    """Ranking da empresa inteira por funcionário ou por avaliador, em JSON"""
+    if por not in RANKINGS:
+        raise ValueError(f"por inválido; use {', '.join(RANKINGS)}")
+    linhas = RANKINGS[por]()
+    with open(execucao.arquivo(f'ranking_{por}.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(linhas, arquivo, ensure_ascii=False)
+    return {'por': por, 'total': len(linhas)}
+
+
+@tipo_de_tarefa('recalcular_medias')
+def tarefa_recalcular_medias(execucao, ciclo=None, todos=False):
+    """media_geral com os pesos de CRITERIOS_PESOS (só o ciclo aberto, salvo
+    `ciclo` ou `todos`; ver recalcular_medias) e resumos reconstruídos"""
+    # Importar aqui para evitar importação circular (paineis registra uma tarefa)
+    from src.services.paineis import marcar_paineis
+
+    alteradas = recalcular_medias(ciclo, todos)
+    total = reconstruir_resumos(ciclo, todos)
+    marcar_paineis()
+    db.session.commit()
+    invalidar(AVALIACOES)
+    return {'medias_alteradas': alteradas, 'resumos': total}
@@ -302,38 +302,72 @@ function resetForm() {
     }
 }
 
-// Load avaliacoes
-async function loadAvaliacoes() {
+// Paginated lists: the API returns the next page cursor in the X-Next-Cursor header
+const PAGE_SIZE = 20;
+
+async function fetchPage(url, cursor) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE, total: 0 });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${url}?${params}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    return { items: await response.json(), next: response.headers.get('X-Next-Cursor') };
+}
+
+// Append a "load more" button that also fires by itself when scrolled into view
+function appendLoadMore(container, next, loadNext) {
+    if (!next) return;
+
+    const button = document.createElement('button');
+    button.className = 'tab-btn';
+    button.style.cssText = 'display: block; margin: 1rem auto;';
+    button.textContent = 'Carregar mais';
+    button.onclick = () => {
+        button.remove();
+        loadNext(next);
+    };
+    container.appendChild(button);
+
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                observer.disconnect();
+                button.click();
+            }
+        });
+        observer.observe(button);
+    }
+}
+
+// Load avaliacoes (cursor = null loads the first page)
+async function loadAvaliacoes(cursor = null) {
     const container = document.getElementById('avaliacoesList');
     if (!container) return;
     
-    container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Carregando avaliações...</p>';
+    if (!cursor) {
+        container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Carregando avaliações...</p>';
+    }
 
     try {
-        const response = await fetch('/api/avaliacoes');
-        if (response.ok) {
-            const avaliacoes = await response.json();
-            displayAvaliacoes(avaliacoes);
-        } else {
-            container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Erro ao carregar avaliações</p>';
-        }
+        const page = await fetchPage('/api/avaliacoes', cursor);
+        displayAvaliacoes(page.items, Boolean(cursor));
+        appendLoadMore(container, page.next, loadAvaliacoes);
     } catch (error) {
         console.error('Erro ao carregar avaliações:', error);
         container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Erro ao carregar avaliações</p>';
     }
 }
 
-// Display avaliacoes
-function displayAvaliacoes(avaliacoes) {
+// Display avaliacoes (append adds a further page below the ones already shown)
+function displayAvaliacoes(avaliacoes, append = false) {
     const container = document.getElementById('avaliacoesList');
     if (!container) return;
     
-    if (avaliacoes.length === 0) {
+    if (avaliacoes.length === 0 && !append) {
         container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Nenhuma avaliação encontrada</p>';
         return;
     }
 
-    container.innerHTML = avaliacoes.map(avaliacao => `
+    const html = avaliacoes.map(avaliacao => `
         <div class="avaliacao-card" style="background: var(--glass-bg); backdrop-filter: blur(10px); border-radius: 20px; padding: 2rem; margin-bottom: 2rem; border: 1px solid var(--glass-border); transition: all 0.3s ease;">
             <div class="avaliacao-header" style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1.5rem;">
                 <div>
@@ -422,35 +456,39 @@ function displayAvaliacoes(avaliacoes) {
             ` : ''}
         </div>
     `).join('');
+
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
 }
 
-// Load colaboradores
-async function loadColaboradores() {
+// Load colaboradores (cursor = null loads the first page)
+async function loadColaboradores(cursor = null) {
     const container = document.getElementById('colaboradoresList');
     if (!container) return;
     
-    container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Carregando colaboradores...</p>';
+    if (!cursor) {
+        container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Carregando colaboradores...</p>';
+    }
 
     try {
-        const response = await fetch('/api/usuarios');
-        if (response.ok) {
-            const usuarios = await response.json();
-            displayColaboradores(usuarios);
-        } else {
-            container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Erro ao carregar colaboradores</p>';
-        }
+        const page = await fetchPage('/api/usuarios', cursor);
+        displayColaboradores(page.items, Boolean(cursor));
+        appendLoadMore(container, page.next, loadColaboradores);
     } catch (error) {
         console.error('Erro ao carregar colaboradores:', error);
         container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Erro ao carregar colaboradores</p>';
     }
 }
 
-// Display colaboradores
-function displayColaboradores(usuarios) {
+// Display colaboradores (append adds a further page below the ones already shown)
+function displayColaboradores(usuarios, append = false) {
     const container = document.getElementById('colaboradoresList');
     if (!container) return;
     
-    container.innerHTML = usuarios.map(usuario => `
+    const html = usuarios.map(usuario => `
         <div class="criteria-item" style="margin-bottom: 1rem;">
             <h4>${usuario.nome}</h4>
             <p><strong>Email:</strong> ${usuario.email}</p>
@@ -458,9 +496,17 @@ function displayColaboradores(usuarios) {
             <p><strong>Tipo:</strong> ${usuario.tipo}</p>
         </div>
     `).join('');
+
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
 }
 
 // Load estatisticas
+let recarregarEstatisticas = null;
+
 async function loadEstatisticas() {
     const container = document.getElementById('estatisticasContent');
     if (!container) return;
@@ -472,6 +518,11 @@ async function loadEstatisticas() {
         if (response.ok) {
             const stats = await response.json();
             displayEstatisticas(stats);
+            // Manager dashboard is being rebuilt in the background: fetch again shortly
+            if (stats.desatualizado) {
+                clearTimeout(recarregarEstatisticas);
+                recarregarEstatisticas = setTimeout(loadEstatisticas, 5000);
+            }
         } else {
             container.innerHTML = '<p style="text-align: center; color: var(--text-secondary); margin: 2rem 0;">Erro ao carregar estatísticas</p>';
         }
@@ -487,8 +538,15 @@ function displayEstatisticas(stats) {
     if (!container) return;
     
     const isGestor = currentUser && currentUser.tipo === 'gestor';
+    // atualizado_em is UTC without a timezone suffix (manager dashboards only)
+    const atualizadoEm = stats.atualizado_em ? new Date(stats.atualizado_em + 'Z').toLocaleString('pt-BR') : null;
     
     container.innerHTML = `
+        ${atualizadoEm ? `
+            <p style="text-align: right; color: var(--text-secondary); font-size: 0.85rem; margin: 0 0 1rem 0;">
+                Atualizado em ${atualizadoEm}${stats.desatualizado ? ' · atualizando...' : ''}
+            </p>
+        ` : ''}
         <div class="stats-grid" style="display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 2rem; margin-bottom: 3rem;">
             <div class="stat-card" style="background: var(--glass-bg); backdrop-filter: blur(10px); border-radius: 20px; padding: 2rem; text-align: center; border: 1px solid var(--glass-border);">
                 <div style="font-size: 3rem; font-weight: 700; color: #9c27b0; margin-bottom: 0.5rem;">${stats.total_avaliacoes}</div>
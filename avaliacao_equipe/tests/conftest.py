@@ -0,0 +1,34 @@
+import pytest
+
+from src.main import create_app
+from src.models.avaliacao import db
+from src.migrations import aplicar_migracoes
+
+
+def configuracao_de_teste(diretorio):
+    """Banco em memória e arquivos (versões do cache, sessões, tarefas) em
+    `diretorio`, fora de src/database: cada teste começa do zero"""
+    return {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SESSAO_ARMAZENAMENTO': 'memoria',
+        'SESSAO_DIR': str(diretorio / 'sessoes'),
+        'RESPOSTA_CACHE_DIR': str(diretorio / 'cache'),
+        'TAREFAS_EXECUTOR': 'processo',
+        'TAREFAS_DIR': str(diretorio / 'tarefas'),
+    }
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App com banco SQLite em memória e sessões no próprio processo"""
+    app = create_app(configuracao_de_teste(tmp_path))
+    with app.app_context():
+        aplicar_migracoes()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
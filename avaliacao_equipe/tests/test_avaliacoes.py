@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.usuario import Usuario
+from src.services.ciclos import abrir_ciclo, arquivar_ciclo
+
+N = 5
+
+
+def _popular(gestor, ciclo, inicio, quantidade):
+    """Cria `quantidade` subordinados do gestor, cada um com uma avaliação dele"""
+    agora = datetime.utcnow()
+    for matricula in range(inicio, inicio + quantidade):
+        subordinado = Usuario(matricula=matricula, nome=f'Subordinado {matricula}',
+                              email=f'sub{matricula}@empresa.com', tipo='funcionario', gestor_id=gestor.id)
+        db.session.add(subordinado)
+        db.session.flush()
+        avaliacao = Avaliacao(ciclo_id=ciclo.id, avaliador_id=gestor.id, avaliado_id=subordinado.id,
+                              tipo_avaliacao='subordinado', data_avaliacao=agora - timedelta(minutes=matricula),
+                              **{criterio: 7 for criterio in CRITERIOS})
+        avaliacao.calcular_media()
+        db.session.add(avaliacao)
+    db.session.commit()
+
+
+def _consultas_do_get(cliente):
+    """Quantas instruções SQL o GET /api/avaliacoes executa"""
+    consultas = []
+
+    def contar(conexao, cursor, sql, parametros, contexto, varias):
+        consultas.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    try:
+        resposta = cliente.get('/api/avaliacoes?limit=500')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', contar)
+    assert resposta.status_code == 200
+    # Confere com a contagem de src/services/metricas.py (Server-Timing)
+    assert f'desc="{len(consultas)} consultas"' in resposta.headers['Server-Timing']
+    return len(consultas), len(resposta.get_json())
+
+
+def test_listar_avaliacoes_nao_cresce_com_o_numero_de_avaliacoes(app, cliente):
+    gestor = Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor')
+    db.session.add(gestor)
+    db.session.commit()
+    # aplicar_migracoes já abre o ciclo inicial
+    ciclo = Ciclo.query.filter_by(status='aberto').one()
+
+    _popular(gestor, ciclo, 100, N)
+    assert cliente.post('/api/login', json={'email': 'gestor@empresa.com'}).status_code == 200
+    # A primeira requisição carrega ciclo aberto e usuário da sessão
+    cliente.get('/api/avaliacoes')
+    consultas, itens = _consultas_do_get(cliente)
+    assert itens == N
+
+    _popular(gestor, ciclo, 100 + N, 9 * N)
+    cliente.get('/api/avaliacoes')
+    consultas_depois, itens = _consultas_do_get(cliente)
+    assert itens == 10 * N
+    assert consultas_depois == consultas
+
+
+def test_paginar_avaliacoes_por_cursor(app, cliente):
+    gestor = Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor')
+    db.session.add(gestor)
+    db.session.commit()
+    _popular(gestor, Ciclo.query.filter_by(status='aberto').one(), 100, N)
+    cliente.post('/api/login', json={'email': 'gestor@empresa.com'})
+
+    vistas, cursor = [], ''
+    while True:
+        resposta = cliente.get(f'/api/avaliacoes?limit=2&cursor={cursor}')
+        vistas += [avaliacao['id'] for avaliacao in resposta.get_json()]
+        cursor = resposta.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    esperadas = db.session.scalars(
+        db.select(Avaliacao.id).order_by(Avaliacao.data_avaliacao.desc(), Avaliacao.id.desc())
+    ).all()
+    assert vistas == esperadas
+
+
+def test_obter_avaliacao_de_ciclo_arquivado(app, cliente):
+    gestor = Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor')
+    db.session.add(gestor)
+    db.session.commit()
+    anterior = Ciclo.query.filter_by(status='aberto').one()
+    _popular(gestor, anterior, 100, 1)
+    arquivada = Avaliacao.query.one().id
+    abrir_ciclo('2027')
+    arquivar_ciclo(anterior)
+
+    # O ciclo aberto ainda não tem avaliações: o id arquivado não é reaproveitado
+    _popular(gestor, Ciclo.query.filter_by(status='aberto').one(), 200, 1)
+    assert Avaliacao.query.one().id > arquivada
+
+    cliente.post('/api/login', json={'email': 'gestor@empresa.com'})
+    resposta = cliente.get(f'/api/avaliacoes/{arquivada}')
+    assert resposta.status_code == 200
+    assert resposta.get_json()['ciclo_id'] == anterior.id
+    assert cliente.get('/api/avaliacoes/999').status_code == 404
@@ -0,0 +1,22 @@
+import gc
+import weakref
+
+from src import config
+from src.main import create_app
+from src.models.avaliacao import db
+
+
+def test_engines_descartados_no_fork_sem_ficarem_vivos(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'RESPOSTA_CACHE_DIR': str(tmp_path / 'cache'),
+        'SESSAO_DIR': str(tmp_path / 'sessoes'),
+    })
+    with app.app_context():
+        engine = db.engine
+    assert engine in config._ENGINES
+
+    referencia = weakref.ref(engine)
+    del app, engine
+    gc.collect()
+    assert referencia() is None
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'benchmarks', 'escrita_concorrente.py')
+
+
+def test_escritores_concorrentes_sem_lock_nem_5xx():
+    """Processos escritores e leitores em um banco WAL temporário: nenhuma
+    resposta 5xx nem "database is locked" (o script sai com código 1)"""
+    resultado = subprocess.run(
+        [sys.executable, SCRIPT, '--escritores', '4', '--leitores', '2', '--equipe', '10'],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+    assert 'WAL + busy_timeout' in resultado.stdout
@@ -0,0 +1,26 @@
+from src.migrations import aplicar_migracoes
+from src.models.avaliacao import db
+from src.models.usuario import Usuario
+
+
+def test_banco_atualizado_nao_tem_migracoes_pendentes(app):
+    # O fixture já aplicou as migrações em um banco vazio
+    assert aplicar_migracoes() == []
+
+
+def test_preencher_gestores_nao_sobrescreve_gestor_id(app):
+    a = Usuario(matricula=1, nome='Ana', email='ana@empresa.com', tipo='gestor')
+    c = Usuario(matricula=2, nome='Caio', email='caio@empresa.com', tipo='gestor')
+    db.session.add_all([a, c])
+    db.session.flush()
+    # Gestor alterado depois da importação: gestor_imediato ainda traz o nome antigo
+    editado = Usuario(matricula=3, nome='Beto', email='beto@empresa.com', gestor_imediato='Ana', gestor_id=c.id)
+    sem_gestor = Usuario(matricula=4, nome='Davi', email='davi@empresa.com', gestor_imediato='Ana')
+    db.session.add_all([editado, sem_gestor])
+    db.session.commit()
+
+    assert aplicar_migracoes() == ['preencher_gestores']
+    db.session.expire_all()
+    assert editado.gestor_id == c.id
+    assert sem_gestor.gestor_id == a.id
+    assert aplicar_migracoes() == []
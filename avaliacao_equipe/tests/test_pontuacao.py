@@ -0,0 +1,29 @@
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.usuario import Usuario
+from src.services.pontuacao import recalcular_medias
+
+
+def _avaliacao(ciclo, avaliador, avaliado):
+    # media_geral desatualizada: qualquer recálculo a altera
+    return Avaliacao(ciclo_id=ciclo.id, avaliador_id=avaliador.id, avaliado_id=avaliado.id,
+                     tipo_avaliacao='subordinado', media_geral=0.0, **{criterio: 7 for criterio in CRITERIOS})
+
+
+def test_recalcular_medias_so_no_ciclo_aberto(app):
+    gestor = Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor')
+    funcionario = Usuario(matricula=2, nome='Funcionário', email='func@empresa.com')
+    encerrado = Ciclo(nome='2025', status='encerrado')
+    db.session.add_all([gestor, funcionario, encerrado])
+    db.session.flush()
+    aberto = Ciclo.query.filter_by(status='aberto').one()
+    db.session.add_all([_avaliacao(aberto, gestor, funcionario), _avaliacao(encerrado, gestor, funcionario)])
+    db.session.commit()
+
+    assert recalcular_medias() == 1
+    medias = dict(db.session.query(Avaliacao.ciclo_id, Avaliacao.media_geral))
+    assert medias == {aberto.id: 7.0, encerrado.id: 0.0}
+
+    assert recalcular_medias(todos=True) == 1
+    medias = dict(db.session.query(Avaliacao.ciclo_id, Avaliacao.media_geral))
+    assert medias == {aberto.id: 7.0, encerrado.id: 7.0}
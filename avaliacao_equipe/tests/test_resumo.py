@@ -0,0 +1,29 @@
+from src.models.avaliacao import Avaliacao, CRITERIOS, db
+from src.models.ciclo import Ciclo
+from src.models.resumo import ResumoAvaliacao
+from src.models.usuario import Usuario
+from src.services.ciclos import abrir_ciclo
+from src.services.ranking import ranking_por_funcionario
+from src.services.resumo import reconstruir_resumos
+
+
+def test_resumo_do_ciclo_encerrado_e_mantido(app):
+    gestor = Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor')
+    funcionario = Usuario(matricula=2, nome='Funcionário', email='func@empresa.com')
+    db.session.add_all([gestor, funcionario])
+    db.session.flush()
+    anterior = Ciclo.query.filter_by(status='aberto').one()
+    db.session.add(Avaliacao(ciclo_id=anterior.id, avaliador_id=gestor.id, avaliado_id=funcionario.id,
+                             tipo_avaliacao='subordinado', media_geral=8.0,
+                             **{criterio: 8 for criterio in CRITERIOS}))
+    db.session.commit()
+    assert reconstruir_resumos() == 1
+    assert ranking_por_funcionario()[0]['media_geral'] == 8.0
+
+    novo = abrir_ciclo('2027')
+    assert db.session.get(ResumoAvaliacao, (anterior.id, funcionario.id)).media_geral == 8.0
+    assert reconstruir_resumos() == 0
+    assert db.session.get(ResumoAvaliacao, (anterior.id, funcionario.id)) is not None
+    # O ranking é do ciclo aberto, que ainda não tem avaliações
+    assert novo.id != anterior.id
+    assert all(linha['media_geral'] is None for linha in ranking_por_funcionario())
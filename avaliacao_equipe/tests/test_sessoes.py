@@ -0,0 +1,36 @@
+from src.models.avaliacao import db
+from src.models.usuario import Usuario
+from src.services.importacao import importar_usuarios
+
+
+def _logar(cliente):
+    db.session.add(Usuario(matricula=1, nome='Gestor', email='gestor@empresa.com', tipo='gestor'))
+    db.session.commit()
+    assert cliente.post('/api/login', json={'email': 'gestor@empresa.com'}).status_code == 200
+    assert cliente.get('/api/me').status_code == 200
+
+
+def test_rollback_nao_revoga_sessoes(app, cliente):
+    _logar(cliente)
+    usuario = Usuario.query.filter_by(email='gestor@empresa.com').one()
+    usuario.tipo = 'funcionario'
+    db.session.flush()
+    db.session.rollback()
+    assert cliente.get('/api/me').status_code == 200
+
+
+def test_commit_revoga_sessoes(app, cliente):
+    _logar(cliente)
+    usuario = Usuario.query.filter_by(email='gestor@empresa.com').one()
+    usuario.tipo = 'funcionario'
+    db.session.flush()
+    # Antes do commit a sessão continua valendo
+    assert cliente.get('/api/me').status_code == 200
+    db.session.commit()
+    assert cliente.get('/api/me').status_code == 401
+
+
+def test_importacao_revoga_depois_do_commit_do_lote(app, cliente):
+    _logar(cliente)
+    importar_usuarios([{'matricula': 1, 'nome': 'Gestor', 'email': 'gestor@empresa.com', 'tipo': 'funcionario'}])
+    assert cliente.get('/api/me').status_code == 401
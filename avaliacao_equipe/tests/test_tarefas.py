@@ -0,0 +1,34 @@
+from src.models.avaliacao import db
+from src.models.tarefa import Tarefa
+from src.models.usuario import Usuario
+from src.services.tarefas import executar_tarefa
+
+
+def test_executar_tarefa_removida(app):
+    assert executar_tarefa(12345) is None
+
+
+def test_executar_tarefa_de_tipo_desconhecido(app):
+    tarefa = Tarefa(tipo='nao_existe', status='executando')
+    db.session.add(tarefa)
+    db.session.commit()
+    tarefa_id = tarefa.id
+    assert executar_tarefa(tarefa_id) == 'falhou'
+    assert 'nao_existe' in db.session.get(Tarefa, tarefa_id).erro
+
+
+def test_populate_users_so_para_administradores(app, cliente):
+    db.session.add_all([
+        Usuario(matricula=1, nome='Admin', email='admin@empresa.com', tipo='admin'),
+        Usuario(matricula=2, nome='Funcionário', email='func@empresa.com'),
+    ])
+    db.session.commit()
+    assert cliente.post('/api/populate_users').status_code == 401
+
+    cliente.post('/api/login', json={'email': 'func@empresa.com'})
+    assert cliente.post('/api/populate_users').status_code == 403
+
+    # Administrador, mas sem USUARIOS_SEED_PATH configurado
+    cliente.post('/api/login', json={'email': 'admin@empresa.com'})
+    assert cliente.post('/api/populate_users').status_code == 400
+    assert db.session.query(Tarefa).count() == 0